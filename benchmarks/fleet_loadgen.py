@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+============================================
+DomiSafe IoT System - Fleet Load Generator
+============================================
+Spawns N virtual DomiSafe nodes across a process pool. Every node
+is the real pipeline on simulated hardware: FakeHardware sensors →
+local_db (device_id-tagged rows) → MqttClient publishes →
+SyncService to the cloud DB, each with its own device_id.
+
+Targets default to local stand-ins (LocalBroker in this process,
+one LocalCloudDB file per worker); point them at real services
+with --broker / --pg-url, and optionally probe the Flask app
+with --web-url.
+
+Reports event throughput, latency percentiles (local write,
+publish, broker delivery, sync pass, web requests) and local
+backlog growth.
+
+Run with: python3 benchmarks/fleet_loadgen.py --nodes 40 --workers 4 --env-rate 1 --duration 30
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+PROBE_TOPIC = "loadgen/{device}/probe"
+
+
+# =======================================================
+# WORKER PROCESS
+# =======================================================
+def _node_loop(node, args, stop):
+    """One virtual node: Poisson env/motion events at the configured rates."""
+    import modules.local_db as local_db
+
+    rng = random.Random(node["device_id"])
+    hw, mqtt, device, counts = node["hw"], node["mqtt"], node["device_id"], node["counts"]
+    probe = PROBE_TOPIC.format(device=device)
+    next_env = time.monotonic() + rng.expovariate(args["env_rate"])
+    next_motion = (time.monotonic() + rng.expovariate(args["motion_rate"])
+                   if args["motion_rate"] else float("inf"))
+
+    while not stop.is_set():
+        now = time.monotonic()
+        wait = min(next_env, next_motion) - now
+        if wait > 0:
+            stop.wait(min(wait, 0.5))
+            continue
+
+        if now >= next_env:
+            temp, hum = hw.dht.temperature, hw.dht.humidity
+            local_db.save_env(temp, hum, device_id=device)
+            mqtt.publish("temperature", temp)
+            mqtt.publish("humidity", hum)
+            counts["env"] += 1
+            next_env += rng.expovariate(args["env_rate"])
+
+        if now >= next_motion:
+            local_db.save_motion(1, None, device_id=device)
+            mqtt.publish("motion", 1)
+            # Probe carries the send time so the collector can measure delivery latency
+            mqtt.client.publish(probe, repr(time.time()))
+            counts["motion"] += 1
+            next_motion += rng.expovariate(args["motion_rate"])
+
+
+def run_worker(worker_id, args):
+    import logging
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger("modules").setLevel(logging.ERROR)
+
+    import modules.local_db as local_db
+    from modules import metrics
+    from modules.cloud_db import CloudDB
+    from modules.fake_cloud_db import LocalCloudDB
+    from modules.fake_hardware import FakeHardware
+    from modules.mqtt_client import MqttClient
+    from modules.sync_service import SyncService
+
+    workdir = args["workdir"]
+    local_db.DB_PATH = os.path.join(workdir, f"worker_{worker_id}.db")
+    local_db.init_db()
+
+    if args["pg_url"]:
+        cloud = None
+    else:
+        cloud = LocalCloudDB(os.path.join(workdir, f"cloud_{worker_id}.db"))
+
+    nodes = []
+    for i in range(args["nodes_per_worker"][worker_id]):
+        device = f"node-{worker_id:02d}-{i:03d}"
+        cfg_path = os.path.join(workdir, f"{device}.json")
+        with open(cfg_path, "w") as f:
+            json.dump({
+                "device_id": device,
+                "ADAFRUIT_IO_USERNAME": "loadgen",
+                "ADAFRUIT_IO_KEY": "loadgen",
+                "MQTT_BROKER": args["broker_host"],
+                "MQTT_PORT": args["broker_port"],
+                "MQTT_TLS": False,
+                "NEON_DB_URL": args["pg_url"] or "",
+                "sync_interval": args["sync_interval"],
+            }, f)
+        hw = FakeHardware(camera=False, seed=device)
+        mqtt = MqttClient(config_file=cfg_path, subscribe=False)
+        db = CloudDB(cfg_path) if args["pg_url"] else cloud
+        sync = SyncService(cfg_path, cloud_db=db, device_id=device)
+        nodes.append({"device_id": device, "hw": hw, "mqtt": mqtt, "sync": sync,
+                      "counts": {"env": 0, "motion": 0}})
+
+    stop = threading.Event()
+    threads = [threading.Thread(target=_node_loop, args=(n, args, stop), daemon=True)
+               for n in nodes]
+    for n in nodes:
+        n["sync"].start()
+    start = time.monotonic()
+    for t in threads:
+        t.start()
+
+    backlog = []
+    while time.monotonic() - start < args["duration"]:
+        time.sleep(1)
+        backlog.append((round(time.monotonic() - start, 1),
+                        local_db.count_unsynced("environment") + local_db.count_unsynced("motion")))
+    elapsed = time.monotonic() - start
+
+    stop.set()
+    for n in nodes:
+        n["sync"].running = False
+    for t in threads:
+        t.join(timeout=2)
+    for n in nodes:
+        n["sync"].thread.join(timeout=5)
+        n["mqtt"].client.loop_stop()
+        n["mqtt"].client.disconnect()
+
+    hist = {name: m for (name, labels), m in metrics.registry.metrics.items()
+            if isinstance(m, metrics.Histogram) and not labels}
+    synced = sum(m.value for (name, _), m in metrics.registry.metrics.items()
+                 if name == "sync_rows_total")
+    return {
+        "worker": worker_id,
+        "elapsed": elapsed,
+        "events": {k: sum(n["counts"][k] for n in nodes) for k in ("env", "motion")},
+        "synced": synced,
+        "backlog": backlog,
+        "latency": {name: {"count": h.count, "p50": h.percentile(50), "p95": h.percentile(95),
+                           "p99": h.percentile(99), "max": h.max}
+                    for name, h in hist.items() if h.count},
+    }
+
+
+# =======================================================
+# COLLECTORS (main process)
+# =======================================================
+def collect_probes(host, port, stop, latencies):
+    import paho.mqtt.client as mqtt
+    client = mqtt.Client(client_id="loadgen-collector")
+
+    def on_message(c, u, msg):
+        try:
+            latencies.append(time.time() - float(msg.payload))
+        except ValueError:
+            pass
+
+    client.on_message = on_message
+    client.connect(host, port)
+    client.subscribe(PROBE_TOPIC.format(device="+"))
+    client.loop_start()
+    stop.wait()
+    client.loop_stop()
+    client.disconnect()
+
+
+def probe_web(url, rate, stop, latencies, errors):
+    interval = 1.0 / rate
+    while not stop.wait(interval):
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(url, timeout=10) as r:
+                r.read()
+            latencies.append(time.perf_counter() - start)
+        except Exception:
+            errors.append(1)
+
+
+def pct(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q / 100.0 * len(values)))]
+
+
+# =======================================================
+# MAIN
+# =======================================================
+def main():
+    parser = argparse.ArgumentParser(description="Simulate a fleet of DomiSafe nodes")
+    parser.add_argument("--nodes", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument("--duration", type=float, default=30, help="seconds")
+    parser.add_argument("--env-rate", type=float, default=1.0, help="env events/s per node")
+    parser.add_argument("--motion-rate", type=float, default=0.05, help="motion events/s per node")
+    parser.add_argument("--sync-interval", type=float, default=5)
+    parser.add_argument("--broker", default="", help="host:port (default: local stand-in)")
+    parser.add_argument("--pg-url", default="", help="Postgres URL (default: SQLite stand-in)")
+    parser.add_argument("--web-url", default="", help="e.g. http://127.0.0.1:5000/api/live-data")
+    parser.add_argument("--web-rate", type=float, default=5, help="web requests/s")
+    parser.add_argument("--json", action="store_true", help="print raw results as JSON")
+    args = parser.parse_args()
+
+    broker = None
+    if args.broker:
+        host, port = args.broker.rsplit(":", 1)
+        port = int(port)
+    else:
+        from modules.fake_broker import LocalBroker
+        broker = LocalBroker().start()
+        host, port = broker.host, broker.port
+
+    workers = max(1, min(args.workers, args.nodes))
+    per_worker = [args.nodes // workers + (1 if i < args.nodes % workers else 0) for i in range(workers)]
+
+    stop = threading.Event()
+    probe_lat, web_lat, web_err = [], [], []
+    side = [threading.Thread(target=collect_probes, args=(host, port, stop, probe_lat), daemon=True)]
+    if args.web_url:
+        side.append(threading.Thread(target=probe_web, args=(args.web_url, args.web_rate, stop,
+                                                              web_lat, web_err), daemon=True))
+    for t in side:
+        t.start()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        wargs = {
+            "workdir": workdir, "nodes_per_worker": per_worker, "duration": args.duration,
+            "env_rate": args.env_rate, "motion_rate": args.motion_rate,
+            "sync_interval": args.sync_interval, "broker_host": host, "broker_port": port,
+            "pg_url": args.pg_url,
+        }
+        print(f"🚀 {args.nodes} nodes in {workers} worker(s) for {args.duration:.0f}s "
+              f"(env {args.env_rate}/s, motion {args.motion_rate}/s per node)")
+        ctx = multiprocessing.get_context("spawn")
+        with ctx.Pool(workers) as pool:
+            results = pool.starmap(run_worker, [(i, wargs) for i in range(workers)])
+
+    time.sleep(0.5)
+    stop.set()
+    for t in side:
+        t.join(timeout=5)
+
+    if args.json:
+        print(json.dumps({"workers": results, "broker_ms": [x * 1000 for x in probe_lat]}, indent=2))
+
+    elapsed = max(r["elapsed"] for r in results)
+    env = sum(r["events"]["env"] for r in results)
+    motion = sum(r["events"]["motion"] for r in results)
+    synced = sum(r["synced"] for r in results)
+    first = sum(r["backlog"][0][1] for r in results if r["backlog"])
+    last = sum(r["backlog"][-1][1] for r in results if r["backlog"])
+
+    print(f"\n{'events/s':>12}{'synced/s':>12}{'backlog':>10}{'growth/s':>10}")
+    print(f"{(env + motion) / elapsed:>12.1f}{synced / elapsed:>12.1f}{last:>10}"
+          f"{(last - first) / max(1.0, elapsed - 1):>10.1f}")
+
+    print(f"\n{'latency (ms)':<28}{'count':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}")
+    names = sorted({n for r in results for n in r["latency"]})
+    for name in names:
+        # Worker histograms can't be merged exactly from percentiles: show the worst worker
+        rows = [r["latency"][name] for r in results if name in r["latency"]]
+        count = sum(x["count"] for x in rows)
+        worst = {k: max(x[k] for x in rows) * 1000 for k in ("p50", "p95", "p99", "max")}
+        print(f"{name:<28}{count:>8}{worst['p50']:>9.2f}{worst['p95']:>9.2f}"
+              f"{worst['p99']:>9.2f}{worst['max']:>9.2f}")
+    for name, values in (("broker_delivery", probe_lat), ("web_request", web_lat)):
+        if values:
+            print(f"{name:<28}{len(values):>8}{pct(values, 50) * 1000:>9.2f}{pct(values, 95) * 1000:>9.2f}"
+                  f"{pct(values, 99) * 1000:>9.2f}{max(values) * 1000:>9.2f}")
+    if web_err:
+        print(f"⚠️ {len(web_err)} web request(s) failed")
+
+    if broker:
+        print(f"\n📨 Broker: {broker.messages_in} in, {broker.messages_out} out")
+        broker.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
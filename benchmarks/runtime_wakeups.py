@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+============================================
+DomiSafe IoT System - Runtime Benchmark
+============================================
+Threaded vs asyncio runtime: CPU time, context switches (wake-ups)
+and thread count over the same workload, no GPIO needed.
+
+Needs a plain (non-TLS) MQTT broker, e.g. `mosquitto -p 1883`.
+Run with: python3 benchmarks/runtime_wakeups.py --seconds 60
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+
+def write_config(args, workdir):
+    path = os.path.join(workdir, "config.json")
+    with open(path, "w") as f:
+        json.dump({
+            "ADAFRUIT_IO_USERNAME": "bench",
+            "ADAFRUIT_IO_KEY": "bench",
+            "MQTT_BROKER": args.host,
+            "MQTT_PORT": args.port,
+            "MQTT_TLS": False,
+            "security_check_interval": args.security_interval,
+            "env_interval": args.env_interval,
+            "heartbeat_interval": 3600,
+            "cloud_sync_enabled": False,
+            "env_simulate": True
+        }, f)
+    return path
+
+
+def usage():
+    r = resource.getrusage(resource.RUSAGE_SELF)
+    return r.ru_utime + r.ru_stime, r.ru_nvcsw, r.ru_nivcsw
+
+
+# ============================================
+# ONE MODE (runs in a child process)
+# ============================================
+def run_mode(mode, config_path, seconds):
+    import logging
+    logging.basicConfig(level=logging.WARNING)
+
+    import modules.local_db as local_db
+    local_db.DB_PATH = os.path.join(os.path.dirname(config_path), "bench.db")
+    local_db.init_db()
+
+    from modules.security_system import SecuritySystem
+    from modules.environment_monitor import EnvironmentMonitor
+    from modules.config_loader import load_config
+
+    cfg = load_config(config_path)
+    security = SecuritySystem(use_gpio=False)
+    environment = EnvironmentMonitor(config_path)
+
+    if mode == "threaded":
+        from modules.mqtt_client import MqttClient
+        from modules.scheduler import Scheduler
+
+        mqtt = MqttClient(config_path, subscribe=True, security=security)
+
+        def env_job():
+            data = environment.read()
+            if data:
+                mqtt.publish("temperature", data["temperature"])
+                mqtt.publish("humidity", data["humidity"])
+                local_db.save_env(data["temperature"], data["humidity"])
+
+        def security_job():
+            status = security.check()
+            mqtt.publish("motion", int(status["motion"]))
+            mqtt.publish("led_status", status["led_status"])
+
+        scheduler = Scheduler()
+        scheduler.add_job("security", cfg["security_check_interval"], security_job)
+        scheduler.add_job("environment", cfg["env_interval"], env_job)
+        threading.Timer(seconds, scheduler.stop).start()
+
+        start = usage()
+        scheduler.run()
+        threads = threading.active_count()
+        end = usage()
+        mqtt.client.loop_stop()
+
+    else:
+        from modules.async_runtime import AsyncRuntime
+
+        runtime = AsyncRuntime(security, environment, config_path)
+        threads = 0
+
+        async def bounded():
+            nonlocal threads
+            asyncio.get_running_loop().call_later(seconds, runtime.stop)
+            await runtime.run()
+
+        def count_threads():
+            nonlocal threads
+            threads = threading.active_count()
+        threading.Timer(seconds * 0.9, count_threads).start()
+
+        start = usage()
+        asyncio.run(bounded())
+        end = usage()
+
+    environment.stop()
+    print(json.dumps({
+        "mode": mode,
+        "cpu_s": round(end[0] - start[0], 4),
+        "voluntary_ctx": end[1] - start[1],
+        "involuntary_ctx": end[2] - start[2],
+        "threads": threads
+    }))
+
+
+# ============================================
+# DRIVER
+# ============================================
+def main():
+    parser = argparse.ArgumentParser(description="Threaded vs asyncio runtime benchmark")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1883)
+    parser.add_argument("--seconds", type=float, default=30)
+    parser.add_argument("--security-interval", type=float, default=0.5)
+    parser.add_argument("--env-interval", type=float, default=2)
+    parser.add_argument("--mode", choices=["threaded", "asyncio"], help=argparse.SUPPRESS)
+    parser.add_argument("--config", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args.config, args.seconds)
+        return 0
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        config_path = write_config(args, workdir)
+        for mode in ("threaded", "asyncio"):
+            out = subprocess.run(
+                [sys.executable, __file__, "--mode", mode, "--config", config_path,
+                 "--seconds", str(args.seconds)],
+                cwd=workdir, capture_output=True, text=True, check=True
+            )
+            results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+    print(f"\n{'mode':<10}{'cpu s':>10}{'vol ctx':>10}{'invol ctx':>11}{'threads':>9}{'wakeups/s':>11}")
+    for r in results:
+        wakeups = (r["voluntary_ctx"] + r["involuntary_ctx"]) / args.seconds
+        print(f"{r['mode']:<10}{r['cpu_s']:>10.3f}{r['voluntary_ctx']:>10}"
+              f"{r['involuntary_ctx']:>11}{r['threads']:>9}{wakeups:>11.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""
+============================================
+DomiSafe IoT System - Pipeline Benchmarks
+============================================
+End-to-end benchmarks on simulated hardware, a local MQTT broker
+and a SQLite cloud stand-in — runs on any Linux box, no Pi needed:
+
+- events/sec through the sensor → SQLite → MQTT path
+- alert latency: PIR trigger → motion message seen by a subscriber
+- sync throughput: local rows → cloud DB rows/sec
+
+Run with: python -m pytest benchmarks/ --benchmark-only
+(skipped automatically when pytest-benchmark isn't installed)
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+mqtt = pytest.importorskip("paho.mqtt.client")
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+import modules.local_db as local_db
+from modules.environment_monitor import EnvironmentMonitor
+from modules.fake_broker import LocalBroker
+from modules.fake_cloud_db import LocalCloudDB
+from modules.fake_hardware import FakeHardware
+from modules.mqtt_client import MqttClient
+from modules.security_system import SecuritySystem
+from modules.sync_service import SyncService
+
+EVENT_BATCH = 200
+SYNC_ROWS = 1000
+
+
+@pytest.fixture(scope="module")
+def broker():
+    b = LocalBroker().start()
+    yield b
+    b.stop()
+
+
+@pytest.fixture
+def node(tmp_path, monkeypatch, broker):
+    """One simulated DomiSafe node wired to the local broker."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(local_db, "DB_PATH", str(tmp_path / "node.db"))
+    local_db.init_db()
+
+    config_path = str(tmp_path / "config.json")
+    with open(config_path, "w") as f:
+        json.dump({
+            "ADAFRUIT_IO_USERNAME": "bench",
+            "ADAFRUIT_IO_KEY": "bench",
+            "MQTT_BROKER": broker.host,
+            "MQTT_PORT": broker.port,
+            "MQTT_TLS": False,
+            "NEON_DB_URL": "",
+            "capture_dir": str(tmp_path / "captures"),
+            "dht_sample_interval": 2.0,
+        }, f)
+
+    hw = FakeHardware(seed=1)
+    security = SecuritySystem(hardware=hw, config_path=config_path)
+    environment = EnvironmentMonitor(config_path, sensor=hw.dht)
+    client = MqttClient(config_file=config_path, subscribe=False)
+
+    yield {"hw": hw, "security": security, "environment": environment,
+           "mqtt": client, "config": config_path, "broker": broker}
+
+    environment.stop()
+    client.client.loop_stop()
+    client.client.disconnect()
+
+
+def test_event_throughput(benchmark, node):
+    security, environment, client = node["security"], node["environment"], node["mqtt"]
+    environment.read(wait=5)
+
+    def batch():
+        for _ in range(EVENT_BATCH):
+            data = environment.read()
+            local_db.save_env(data["temperature"], data["humidity"])
+            client.publish("temperature", data["temperature"])
+            client.publish("humidity", data["humidity"])
+            status = security.check(pulse_motor=False)
+            client.publish("motion", int(status["motion"]))
+
+    benchmark.pedantic(batch, rounds=5, iterations=1, warmup_rounds=1)
+    if benchmark.stats:
+        benchmark.extra_info["events_per_sec"] = round(EVENT_BATCH / benchmark.stats.stats.mean, 1)
+
+
+def test_alert_latency(benchmark, node):
+    hw, security, client, broker = node["hw"], node["security"], node["mqtt"], node["broker"]
+
+    received = threading.Event()
+    sub = mqtt.Client(client_id="bench-subscriber")
+    sub.on_message = lambda c, u, msg: msg.payload == b"1" and received.set()
+    sub.connect(broker.host, broker.port)
+    sub.subscribe("bench/feeds/motion")
+    sub.loop_start()
+    time.sleep(0.2)
+
+    def alert():
+        received.clear()
+        hw.motion.trigger()
+        status = security.check(pulse_motor=False)
+        assert status["motion"] and status["capture_id"]
+        client.publish("motion", 1)
+        assert received.wait(5), "motion alert never reached the subscriber"
+
+    try:
+        benchmark.pedantic(alert, rounds=5, iterations=1)
+    finally:
+        sub.loop_stop()
+        sub.disconnect()
+    if benchmark.stats:
+        benchmark.extra_info["alert_p_max_s"] = round(benchmark.stats.stats.max, 3)
+
+
+def test_sync_throughput(benchmark, node):
+    cloud = LocalCloudDB(":memory:", config_path=node["config"])
+    sync = SyncService(node["config"], cloud_db=cloud)
+
+    for i in range(SYNC_ROWS):
+        local_db.save_env(20 + i % 10, 50)
+    for _ in range(SYNC_ROWS // 10):
+        local_db.save_motion(1, None)
+    total = SYNC_ROWS + SYNC_ROWS // 10
+    rounds = []     # --benchmark-disable runs a single round
+
+    def unsync():
+        rounds.append(1)
+        with sqlite3.connect(local_db.DB_PATH) as conn:
+            conn.execute("UPDATE environment SET synced=0")
+            conn.execute("UPDATE motion SET synced=0")
+        return (), {}
+
+    benchmark.pedantic(sync.sync_all, setup=unsync, rounds=5, iterations=1)
+    assert local_db.count_unsynced("environment") == 0
+    assert cloud.count("environment") == SYNC_ROWS * len(rounds)
+    if benchmark.stats:
+        benchmark.extra_info["rows_per_sec"] = round(total / benchmark.stats.stats.mean, 1)
+    cloud.close()
@@ -0,0 +1,110 @@
+"""
+============================================
+DomiSafe IoT System - Local Timestamp Benchmarks
+============================================
+The pre-migration local layout (ISO-8601 TEXT timestamps, no index)
+vs the current one (INTEGER epoch ms, indexed), 30 days of 30 s
+environment rows:
+
+- range scan: one day's rows by timestamp
+- sync serialization: fetch 1000 unsynced rows and encode them as
+  psycopg query parameters. ISO strings go out as untyped text that
+  Postgres has to parse; datetimes go out as 8-byte binary timestamps.
+
+Run with: python -m pytest benchmarks/test_timestamp_bench.py --benchmark-only
+(skipped automatically when pytest-benchmark isn't installed)
+"""
+
+import os
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+import modules.local_db as local_db
+from modules.cloud_db import as_timestamp
+
+DAYS = 30
+INTERVAL = 30
+SAMPLES = DAYS * 86400 // INTERVAL
+SYNC_BATCH = 1000
+START = datetime(2026, 1, 1)
+
+ISO_SCHEMA = """
+    CREATE TABLE environment (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp TEXT,
+        temperature REAL,
+        humidity REAL,
+        synced INTEGER DEFAULT 0,
+        device_id TEXT
+    )
+"""
+
+
+@pytest.fixture(scope="module", params=["iso_text", "epoch_ms"])
+def layout(request, tmp_path_factory):
+    path = str(tmp_path_factory.mktemp(request.param) / "iot_data.db")
+    stamps = [START + timedelta(seconds=i * INTERVAL) for i in range(SAMPLES)]
+    with sqlite3.connect(path) as conn:
+        if request.param == "iso_text":
+            conn.execute(ISO_SCHEMA)
+            values = [t.isoformat() for t in stamps]
+        else:
+            saved, local_db.DB_PATH = local_db.DB_PATH, path
+            local_db.init_db()
+            local_db.DB_PATH = saved
+            values = [local_db.to_ms(t) for t in stamps]
+        # Newest SYNC_BATCH rows still waiting for the cloud
+        conn.executemany("""
+            INSERT INTO environment (timestamp, temperature, humidity, synced, device_id)
+            VALUES (?, 21.5, 40.0, ?, 'pi_home_security')
+        """, [(v, int(i < SAMPLES - SYNC_BATCH)) for i, v in enumerate(values)])
+    day = START + timedelta(days=DAYS // 2)
+    bounds = (day, day + timedelta(days=1))
+    if request.param == "iso_text":
+        bounds = tuple(b.isoformat() for b in bounds)
+    else:
+        bounds = tuple(local_db.to_ms(b) for b in bounds)
+    return {"kind": request.param, "path": path, "bounds": bounds}
+
+
+def test_range_scan(benchmark, layout):
+    conn = sqlite3.connect(layout["path"])
+
+    def scan():
+        return conn.execute("""
+            SELECT timestamp, temperature, humidity FROM environment
+            WHERE timestamp >= ? AND timestamp < ? ORDER BY timestamp
+        """, layout["bounds"]).fetchall()
+
+    rows = benchmark(scan)
+    conn.close()
+    assert len(rows) == 86400 // INTERVAL
+    benchmark.extra_info["layout"] = layout["kind"]
+
+
+def test_sync_serialization(benchmark, layout, monkeypatch):
+    adapt = pytest.importorskip("psycopg.adapt")
+    tx = adapt.Transformer()
+    formats = [adapt.PyFormat.AUTO] * 4
+    monkeypatch.setattr(local_db, "DB_PATH", layout["path"])
+
+    def serialize():
+        out = 0
+        for row in local_db.fetch_unsynced("environment"):
+            # CloudDB.insert_environment() converts epoch ms at this edge
+            params = (as_timestamp(row[1]), row[2], row[3], row[4])
+            out += len(tx.dump_sequence(params, formats)[0])
+        return out
+
+    ts_bytes = benchmark(serialize)
+    benchmark.extra_info["layout"] = layout["kind"]
+    benchmark.extra_info["timestamp_wire_bytes"] = ts_bytes // SYNC_BATCH
+    benchmark.extra_info["timestamp_oid"] = tx.types[0]
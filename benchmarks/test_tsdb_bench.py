@@ -0,0 +1,74 @@
+"""
+============================================
+DomiSafe IoT System - Time-Series Store Benchmarks
+============================================
+Environment history as plain SQLite rows vs Gorilla-compressed
+chunks (modules/tsdb.py), on a week of 30 s samples:
+
+- disk footprint: bytes per sample after VACUUM
+- range scan: one day out of the week through local_db.read_env()
+
+Run with: python -m pytest benchmarks/test_tsdb_bench.py --benchmark-only
+(skipped automatically when pytest-benchmark isn't installed)
+"""
+
+import os
+import random
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+import modules.local_db as local_db
+
+DAYS = 7
+INTERVAL = 30
+SAMPLES = DAYS * 86400 // INTERVAL
+START = datetime(2026, 1, 1)
+
+
+def _history():
+    rng = random.Random(7)
+    temp, hum = 21.0, 45.0
+    for i in range(SAMPLES):
+        temp = round(temp + rng.choice((0, 0, 0, 0.1, -0.1)), 1)
+        hum = round(min(100.0, max(0.0, hum + rng.choice((0, 0, 0, 1, -1)))), 1)
+        ts = START + timedelta(seconds=i * INTERVAL, milliseconds=rng.randint(0, 20))
+        yield local_db.to_ms(ts), temp, hum, 1, local_db.DEFAULT_DEVICE_ID
+
+
+@pytest.fixture(scope="module", params=["rows", "chunks"])
+def history(request, tmp_path_factory):
+    path = str(tmp_path_factory.mktemp(request.param) / "iot_data.db")
+    saved = local_db.DB_PATH
+    local_db.DB_PATH = path
+    local_db.init_db()
+    with sqlite3.connect(path) as conn:
+        conn.executemany("""
+            INSERT INTO environment (timestamp, temperature, humidity, synced, device_id)
+            VALUES (?, ?, ?, ?, ?)
+        """, _history())
+    if request.param == "chunks":
+        local_db.compress_environment()
+    with sqlite3.connect(path) as conn:
+        conn.execute("VACUUM")
+    yield {"kind": request.param, "path": path}
+    local_db.DB_PATH = saved
+
+
+def test_env_range_scan(benchmark, history):
+    local_db.DB_PATH = history["path"]
+    day = START + timedelta(days=3)
+    start, end = local_db.to_ms(day), local_db.to_ms(day + timedelta(days=1))
+
+    rows = benchmark(local_db.read_env, start, end)
+
+    assert len(rows) == 86400 // INTERVAL
+    benchmark.extra_info["store"] = history["kind"]
+    benchmark.extra_info["bytes_per_sample"] = round(os.path.getsize(history["path"]) / SAMPLES, 2)
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+============================================
+DomiSafe IoT System - Web App Load Test
+============================================
+Drives the Flask app under each serving mode with a fixed pool of
+keep-alive clients and reports throughput and latency:
+
+- dev: the old `app.run()` (single-threaded Werkzeug)
+- waitress: one process, --threads request threads
+- gunicorn-N: wsgi:app with web_app/gunicorn.conf.py, N gthread workers
+
+The app runs against a seeded LocalCloudDB file (7 days of 30 s
+environment rows, motion every 7 min), and every Adafruit IO read
+sleeps --adafruit-ms to stand in for the real HTTPS round trip,
+which is what used to block every other user. Request mix: dashboard,
+environment/security history pages, live-data and paged JSON APIs.
+
+Run with: python3 benchmarks/web_loadtest.py --workers 1 2 4 --clients 16 --duration 10
+(needs gunicorn and waitress; modes whose server is missing are skipped)
+"""
+
+import argparse
+import http.client
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+WEB = os.path.join(ROOT, "web_app")
+sys.path.insert(0, ROOT)
+
+START = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=7)
+PATHS = [
+    "/",
+    "/environment?date={day}",
+    "/security?date={day}",
+    "/api/live-data",
+    "/api/environment?limit=100",
+]
+
+
+# =======================================================
+# SERVER SIDE (imported by gunicorn / waitress / dev)
+# =======================================================
+def make_app():
+    """The real app, with the cloud DB and Adafruit IO swapped for stand-ins."""
+    sys.path.insert(0, WEB)
+    import app as webapp
+    from modules.fake_cloud_db import LocalCloudDB
+    from modules.service_init import ServiceStarter
+
+    delay = float(os.environ["LOADTEST_ADAFRUIT_MS"]) / 1000
+
+    def get_adafruit(feed_name):
+        time.sleep(delay)
+        return "1"
+
+    cloud = webapp.cloud_db = LocalCloudDB(os.environ["LOADTEST_DB"])
+    webapp.get_adafruit = get_adafruit
+    webapp.services = ServiceStarter()
+    webapp.services.add("cloud_db", cloud.connect, check=lambda: cloud.conn is not None)
+    return webapp.app
+
+
+def seed(path):
+    from modules.fake_cloud_db import LocalCloudDB
+
+    db = LocalCloudDB(path)
+    db.connect()
+    with db._shared.cursor() as cur:
+        cur.executemany(
+            "INSERT INTO environment (timestamp, temperature, humidity, device_id) VALUES (%s, %s, %s, %s)",
+            [(START + timedelta(seconds=30 * i), 20 + (i % 50) / 10, 45.0, "pi_home_security")
+             for i in range(7 * 2880)],
+        )
+        cur.executemany(
+            "INSERT INTO motion_events (timestamp, motion, image_name, device_id) VALUES (%s, %s, %s, %s)",
+            [(START + timedelta(minutes=7 * i), int(i % 3 == 0), f"m{i}.jpg", "pi_home_security")
+             for i in range(7 * 205)],
+        )
+    db._shared.commit()
+    db.close()
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def launch(mode, port, args):
+    here = os.path.abspath(__file__)
+    if mode == "dev":
+        code = ("import sys; sys.path.insert(0, %r); import web_loadtest as w; "
+                "w.make_app().run(port=%d, threaded=False)" % (os.path.dirname(here), port))
+        cmd = [sys.executable, "-c", code]
+    elif mode == "waitress":
+        code = ("import sys; sys.path.insert(0, %r); import web_loadtest as w; from waitress import serve; "
+                "serve(w.make_app(), host='127.0.0.1', port=%d, threads=%d)" % (os.path.dirname(here), port, args.threads))
+        cmd = [sys.executable, "-c", code]
+    else:
+        workers = mode.split("-")[1]
+        cmd = [sys.executable, "-m", "gunicorn", "-c", os.path.join(WEB, "gunicorn.conf.py"),
+               "--bind", f"127.0.0.1:{port}", "--workers", workers, "--threads", str(args.threads),
+               "--access-logfile", "/dev/null", "--pythonpath", os.path.dirname(here),
+               "web_loadtest:make_app()"]
+    return subprocess.Popen(cmd, cwd=WEB, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_ready(port, timeout=20):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            conn.request("GET", "/readyz")
+            if conn.getresponse().status == 200:
+                return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+
+# =======================================================
+# CLIENT SIDE
+# =======================================================
+def client(port, stop, latencies, errors, seed_, keepalive):
+    rng = random.Random(seed_)
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    while not stop.is_set():
+        path = rng.choice(PATHS).format(day=(START + timedelta(days=rng.randint(0, 6))).date())
+        t = time.perf_counter()
+        try:
+            conn.request("GET", path)
+            resp = conn.getresponse()
+            resp.read()
+            if resp.status != 200:
+                errors.append(resp.status)
+        except (OSError, http.client.HTTPException):
+            errors.append("conn")
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            continue
+        latencies.append(time.perf_counter() - t)
+        if not keepalive:
+            conn.close()
+
+
+def run_mode(mode, args):
+    port = _free_port()
+    proc = launch(mode, port, args)
+    try:
+        if not wait_ready(port):
+            return None
+        stop, latencies, errors = threading.Event(), [], []
+        threads = [threading.Thread(target=client, args=(port, stop, latencies, errors, i, not args.new_connections))
+                   for i in range(args.clients)]
+        for t in threads:
+            t.start()
+        time.sleep(args.duration)
+        stop.set()
+        for t in threads:
+            t.join()
+    finally:
+        proc.terminate()
+        proc.wait(10)
+
+    latencies.sort()
+    pct = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000  # noqa: E731
+    return {"mode": mode, "requests": len(latencies), "rps": len(latencies) / args.duration,
+            "p50": pct(0.50), "p95": pct(0.95), "p99": pct(0.99), "errors": len(errors)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", default=["dev", "waitress", "gunicorn"])
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, 2, 4])
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--adafruit-ms", type=float, default=50)
+    parser.add_argument("--new-connections", action="store_true",
+                        help="one connection per request instead of keep-alive")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="domisafe-web-")
+    os.environ["LOADTEST_DB"] = os.path.join(tmp, "cloud.db")
+    os.environ["LOADTEST_ADAFRUIT_MS"] = str(args.adafruit_ms)
+    seed(os.environ["LOADTEST_DB"])
+
+    modes = []
+    for mode in args.modes:
+        modes += [f"gunicorn-{n}" for n in args.workers] if mode == "gunicorn" else [mode]
+
+    print(f"{args.clients} clients, {args.duration:.0f} s per mode, "
+          f"Adafruit IO reads {args.adafruit_ms:.0f} ms, {args.threads} threads per worker")
+    print(f"{'mode':<12}{'requests':>10}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}")
+    for mode in modes:
+        r = run_mode(mode, args)
+        if r is None:
+            print(f"{mode:<12}  (server did not start — installed?)")
+            continue
+        print(f"{r['mode']:<12}{r['requests']:>10}{r['rps']:>9.1f}{r['p50']:>9.1f}"
+              f"{r['p95']:>9.1f}{r['p99']:>9.1f}{r['errors']:>8}")
+
+
+if __name__ == "__main__":
+    main()
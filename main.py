@@ -5,57 +5,87 @@ DomiSafe IoT System - Main Application (FIXED)
 Fixed: Security checks mqtt.is_security_enabled() before triggering alerts
 """
 
-import time, threading, logging, signal, sys, os
-from datetime import datetime
+import time, logging, signal, sys
 from modules.mqtt_client import MqttClient
 from modules.security_system import SecuritySystem
 from modules.environment_monitor import EnvironmentMonitor
-from modules.local_db import init_db, save_env, save_motion
+from modules.local_db import init_db, save_env, save_motion, link_capture, count_unsynced, fetch_captures, maintain
 from modules.sync_service import SyncService
+from modules.upload_service import UploadService
+from modules.scheduler import Scheduler, JOB_INTERVALS
+from modules.config_loader import load_config, registry as config_registry
+from modules.logging_setup import setup_logging, stop_logging, queue_stats
+from modules import metrics
 
-os.makedirs("logs", exist_ok=True)
-timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-log_file = f"logs/run_{timestamp}.log"
-
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler(log_file, mode='w'),
-        logging.StreamHandler()
-    ]
-)
+# JSON lines in logs/domisafe.log (rotated), written off-thread
+setup_logging()
 log = logging.getLogger("domisafe")
 
 RUNNING = True
 sync_service = None
+upload_service = None
+scheduler = None
+environment = None
 
 def stop_all(signum=None, frame=None):
-    global RUNNING, sync_service
+    global RUNNING, sync_service, upload_service, scheduler, environment
     log.info("🛑 Shutting down...")
     RUNNING = False
+    config_registry.stop()
+    if scheduler:
+        scheduler.stop()
+        scheduler.log_stats()
     if sync_service:
         sync_service.stop()
+    if upload_service:
+        upload_service.stop()
+    if environment:
+        environment.stop()
     time.sleep(1)
+    stop_logging()
     sys.exit(0)
 
 signal.signal(signal.SIGINT, stop_all)
 signal.signal(signal.SIGTERM, stop_all)
 
+def register_backlog_metrics(cfg):
+    """Backlog gauges, evaluated whenever metrics are exported."""
+    for table in ("environment", "motion"):
+        metrics.registry.gauge("sync_backlog_rows", "Local rows not yet in the cloud DB",
+                               {"table": table}, func=lambda t=table: count_unsynced(t))
+    metrics.registry.gauge("upload_backlog_captures", "Captures not yet on Drive",
+                           func=lambda: len(fetch_captures(uploaded=False)))
+    metrics.registry.gauge("log_queue_depth", "Records waiting for the log writer",
+                           func=lambda: queue_stats()[0])
+    metrics.registry.gauge("log_records_dropped", "Records dropped on a full log queue",
+                           func=lambda: queue_stats()[1])
+    if cfg["metrics_port"]:
+        try:
+            metrics.serve(cfg["metrics_port"])
+        except OSError as e:
+            log.warning(f"Metrics port {cfg['metrics_port']} unavailable: {e}")
+
 def main():
-    global RUNNING, sync_service
+    global RUNNING, sync_service, upload_service, scheduler, environment
     
     log.info("=" * 50)
     log.info("🏠 DomiSafe IoT System")
     log.info("=" * 50)
     
+    cfg = load_config()
+    if "--asyncio" in sys.argv or cfg.get("runtime") == "asyncio":
+        return main_async()
+    
     try:
-        init_db()
+        init_db(cfg["device_id"])
+        log.info(f"🏷️ Device: {cfg['device_id']}")
         security = SecuritySystem(use_gpio=True)
         mqtt = MqttClient(subscribe=True, security=security)
         environment = EnvironmentMonitor()
         sync_service = SyncService()
-        sync_service.start()
+        upload_service = UploadService()
+        upload_service.start()
+        register_backlog_metrics(cfg)
         log.info("✅ All systems ready")
     except Exception as e:
         log.error(f"❌ Init failed: {e}")
@@ -63,82 +93,105 @@ def main():
     
     time.sleep(2)
     
-    def environment_loop():
-        log.info("🌡️ Environment monitoring started")
-        while RUNNING:
-            try:
-                data = environment.read()
-                mqtt.publish("temperature", data["temperature"])
-                mqtt.publish("humidity", data["humidity"])
-                save_env(data["temperature"], data["humidity"])
-                log.debug(f"📊 Env: {data['temperature']}°C, {data['humidity']}%")
-            except Exception as e:
-                log.error(f"Env error: {e}")
-            time.sleep(30)
-        log.info("🌡️ Environment stopped")
+    def environment_job():
+        data = environment.read()
+        if data is None:
+            log.warning("🌡️ No valid environment reading yet — skipping")
+            return
+        mqtt.publish("temperature", data["temperature"])
+        mqtt.publish("humidity", data["humidity"])
+        save_env(data["temperature"], data["humidity"])
+        log.debug(f"📊 Env: {data['temperature']}°C, {data['humidity']}%")
     
-    def security_loop():
-        log.info("🔒 Security monitoring started")
-        while RUNNING:
-            try:
-                # FIXED: Check if security is enabled via MQTT state
-                if not mqtt.is_security_enabled():
-                    # Security disabled - just publish current states without alerting
-                    mqtt.publish("motion", 0)
-                    mqtt.publish("led_status", 0)
-                    mqtt.publish("buzzer_status", 0)
-                    mqtt.publish("motor_status", 0)
-                    time.sleep(5)
-                    continue
-                
-                # Security is ENABLED - run normal detection
-                status = security.check()
-                mqtt.publish("motion", int(status["motion"]))
-                mqtt.publish("led_status", status["led_status"])
-                
-                if status.get("buzzer_pulsed"):
-                    mqtt.publish("buzzer_status", 1)
-                    time.sleep(0.3)
-                    mqtt.publish("buzzer_status", 0)
-                else:
-                    mqtt.publish("buzzer_status", status["buzzer_status"])
-                
-                if status.get("motor_pulsed"):
-                    mqtt.publish("motor_status", 1)
-                    time.sleep(0.3)
-                    mqtt.publish("motor_status", 0)
-                
-                if status["image_b64"]:
-                    mqtt.publish("camera_last_image", status["image_b64"])
-                
-                if status["motion"]:
-                    img_name = f"motion_{datetime.now():%Y%m%d_%H%M%S}.jpg"
-                    save_motion(1, img_name)
-                    log.info(f"🚨 Motion event saved: {img_name}")
-                    
-            except Exception as e:
-                log.error(f"Security error: {e}")
-            time.sleep(5)
-        log.info("🔒 Security stopped")
+    def security_job():
+        # FIXED: Check if security is enabled via MQTT state
+        if not mqtt.is_security_enabled():
+            # Security disabled - just publish current states without alerting
+            mqtt.publish("motion", 0)
+            mqtt.publish("led_status", 0)
+            mqtt.publish("buzzer_status", 0)
+            mqtt.publish("motor_status", 0)
+            return
+        
+        # Security is ENABLED - run normal detection
+        status = security.check()
+        mqtt.publish("motion", int(status["motion"]))
+        mqtt.publish("led_status", status["led_status"])
+        
+        if status.get("buzzer_pulsed"):
+            mqtt.publish("buzzer_status", 1)
+            time.sleep(0.3)
+            mqtt.publish("buzzer_status", 0)
+        else:
+            mqtt.publish("buzzer_status", status["buzzer_status"])
+        
+        if status.get("motor_pulsed"):
+            mqtt.publish("motor_status", 1)
+            time.sleep(0.3)
+            mqtt.publish("motor_status", 0)
+        
+        if status["image_b64"]:
+            mqtt.publish("camera_last_image", status["image_b64"])
+        
+        if status["motion"]:
+            img_name = status.get("image_name")
+            motion_id = save_motion(1, img_name)
+            if status.get("capture_id"):
+                link_capture(status["capture_id"], motion_id)
+                upload_service.notify()
+            log.info(f"🚨 Motion event saved: #{motion_id} ({img_name or 'no image'})")
     
-    # Start environment monitoring in background thread
-    threading.Thread(target=environment_loop, daemon=True).start()
+    # All periodic work runs off one deadline-based scheduler
+    scheduler = Scheduler()
+    # Detection sleeps (0.8 s buzzer, 0.3 s status pulses) and the capture
+    # must not hold up the other deadlines: run it off the scheduler thread
+    scheduler.add_job("security", cfg["security_check_interval"], security_job, blocking=True)
+    scheduler.add_job("environment", cfg["env_interval"], environment_job)
+    # Cloud sync runs on its own thread, woken by local writes
+    sync_service.start()
+    scheduler.add_job("heartbeat", cfg["heartbeat_interval"], scheduler.log_stats,
+                      first_delay=cfg["heartbeat_interval"])
+    if cfg["metrics_file"]:
+        # Backlog gauges hit SQLite — keep it off the scheduler thread
+        scheduler.add_job("metrics", cfg["metrics_interval"],
+                          lambda: metrics.write_file(cfg["metrics_file"]), blocking=True)
+    # Retention + incremental vacuum, time-boxed per pass
+    scheduler.add_job("maintenance", cfg["local_maintenance_interval"],
+                      lambda: maintain(cfg["local_retention_days"], cfg["local_archive_dir"] or None,
+                                       cfg["local_maintenance_budget_ms"] / 1000, cfg["env_chunk_size"],
+                                       cfg["cloud_sync_enabled"]),
+                      blocking=True)
+    scheduler.follow_config(JOB_INTERVALS)
+    if cfg["config_watch_interval"]:
+        config_registry.watch(cfg["config_watch_interval"])
+    log.info("🔒 Security monitoring started")
+    log.info("🌡️ Environment monitoring started")
     
     try:
-        # Run security loop in main thread
-        security_loop()
+        # Run the scheduler in the main thread
+        scheduler.run()
     except KeyboardInterrupt:
         log.info("Keyboard interrupt")
     
     stop_all()
 
-if __name__ == "__main__":
+def main_async():
+    """Single event loop runtime (see modules/async_runtime.py)."""
+    import asyncio
+    from modules.async_runtime import AsyncRuntime
+    
+    cfg = load_config()
     try:
-        main()
-    finally:
-        log.info("📤 Uploading logs...")
-        try:
-            if os.path.exists("upload_logs.py"):
-                os.system("python3 upload_logs.py")
-        except Exception as e:
-            log.error(f"Upload failed: {e}")
\ No newline at end of file
+        init_db(cfg["device_id"])
+        security = SecuritySystem(use_gpio=True)
+        environment = EnvironmentMonitor()
+        register_backlog_metrics(cfg)
+    except Exception as e:
+        log.error(f"❌ Init failed: {e}")
+        sys.exit(1)
+    
+    asyncio.run(AsyncRuntime(security, environment).run())
+
+if __name__ == "__main__":
+    # Uploads happen continuously in UploadService; nothing to do at exit
+    main()
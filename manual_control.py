@@ -149,7 +149,10 @@ class ManualControl:
     def read_environment(self):
         """Read temperature and humidity"""
         print("\n🌡️  Reading environment sensor...")
-        data = self.env_monitor.read()
+        data = self.env_monitor.read(wait=10)
+        if not data:
+            print("❌ No valid reading from sensor")
+            return
         
         print(f"  Temperature: {data['temperature']}°C")
         print(f"  Humidity: {data['humidity']}%")
@@ -219,11 +222,14 @@ class ManualControl:
         print("\n📤 Publishing test data...")
         
         # Read real sensor data
-        env_data = self.env_monitor.read()
+        env_data = self.env_monitor.read(wait=10)
         
         # Publish
-        self.mqtt.publish("temperature", env_data["temperature"])
-        self.mqtt.publish("humidity", env_data["humidity"])
+        if env_data:
+            self.mqtt.publish("temperature", env_data["temperature"])
+            self.mqtt.publish("humidity", env_data["humidity"])
+        else:
+            print("⚠️  No valid environment reading - skipping temperature/humidity")
         self.mqtt.publish("motion", 1 if (self.pir and self.pir.motion_detected) else 0)
         
         print("✅ Test data published")
@@ -265,8 +271,11 @@ class ManualControl:
         # Test 3: Sensors
         print("\n3️⃣  Sensors:")
         try:
-            data = self.env_monitor.read()
-            print(f"  ✅ Environment: {data['temperature']}°C, {data['humidity']}%")
+            data = self.env_monitor.read(wait=10)
+            if data:
+                print(f"  ✅ Environment: {data['temperature']}°C, {data['humidity']}%")
+            else:
+                print("  ⚠️  Environment: no valid reading")
         except Exception as e:
             print(f"  ❌ Environment: {e}")
         
@@ -0,0 +1,190 @@
+"""
+============================================
+DomiSafe IoT System - asyncio Runtime
+============================================
+Optional single-event-loop runtime for the edge daemon
+(`python3 main.py --asyncio` or "runtime": "asyncio" in config.json).
+
+- MQTT socket served by the event loop (AsyncMqttClient)
+- Cloud writes over async psycopg (AsyncSyncService), woken by local writes
+- GPIO, camera and SQLite calls run in a small executor
+- Drive uploads keep their own background thread (UploadService)
+- Every subsystem is a task; SIGINT/SIGTERM cancels them all
+  and shuts resources down in order
+"""
+
+import asyncio
+import logging
+import signal
+from concurrent.futures import ThreadPoolExecutor
+
+from modules.config_loader import load_config, registry as config_registry
+from modules import metrics
+from modules.local_db import save_env, save_motion, link_capture, maintain
+from modules.mqtt_client import AsyncMqttClient
+from modules.scheduler import AsyncScheduler, JOB_INTERVALS
+from modules.sync_service import AsyncSyncService
+from modules.upload_service import UploadService
+
+log = logging.getLogger(__name__)
+
+
+class AsyncRuntime:
+    def __init__(self, security, environment, config_path="config.json",
+                 mqtt=None, sync=None, uploads=None, workers=4):
+        self.cfg = load_config(config_path)
+        self.config_path = config_path
+        self.security = security
+        self.environment = environment
+        self.mqtt = mqtt
+        self.sync = sync
+        self.uploads = uploads
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="domisafe-io")
+        self.scheduler = AsyncScheduler()
+        self._stop = None
+        self._pulses = set()
+
+    async def _call(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    def stop(self):
+        if self._stop and not self._stop.is_set():
+            log.info("🛑 Shutting down...")
+            self._stop.set()
+
+    # -------------------------------------------------------
+    # JOBS
+    # -------------------------------------------------------
+    async def environment_job(self):
+        data = self.environment.read()
+        if data is None:
+            log.warning("🌡️ No valid environment reading yet — skipping")
+            return
+        self.mqtt.publish("temperature", data["temperature"])
+        self.mqtt.publish("humidity", data["humidity"])
+        await self._call(save_env, data["temperature"], data["humidity"])
+
+    async def security_job(self):
+        if not self.mqtt.is_security_enabled():
+            for feed in ("motion", "led_status", "buzzer_status", "motor_status"):
+                self.mqtt.publish(feed, 0)
+            return
+
+        status = await self._call(self.security.check, False)
+        self.mqtt.publish("motion", int(status["motion"]))
+        self.mqtt.publish("led_status", status["led_status"])
+
+        if status.get("buzzer_pulsed"):
+            self.mqtt.publish("buzzer_status", 1)
+            await asyncio.sleep(0.3)
+            self.mqtt.publish("buzzer_status", 0)
+        else:
+            self.mqtt.publish("buzzer_status", status["buzzer_status"])
+
+        if status.get("motor_pulsed"):
+            # Pulse as a task instead of a thread per pulse
+            task = asyncio.create_task(self._pulse_motor())
+            self._pulses.add(task)
+            task.add_done_callback(self._pulses.discard)
+
+        if status["image_b64"]:
+            self.mqtt.publish("camera_last_image", status["image_b64"])
+
+        if status["motion"]:
+            img_name = status.get("image_name")
+            motion_id = await self._call(save_motion, 1, img_name)
+            if status.get("capture_id"):
+                await self._call(link_capture, status["capture_id"], motion_id)
+                if self.uploads:
+                    self.uploads.notify()
+            log.info(f"🚨 Motion event saved: #{motion_id} ({img_name or 'no image'})")
+
+    async def _pulse_motor(self):
+        self.mqtt.publish("motor_status", 1)
+        try:
+            await self._call(self.security.set_motor, 1)
+            await asyncio.sleep(2)
+        finally:
+            await self._call(self.security.set_motor, 0)
+            self.mqtt.publish("motor_status", 0)
+
+    # -------------------------------------------------------
+    # MAIN ENTRY
+    # -------------------------------------------------------
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self.stop)
+
+        if self.mqtt is None:
+            self.mqtt = AsyncMqttClient(loop, self.executor, config_file=self.config_path,
+                                        subscribe=True, security=self.security)
+        if self.sync is None:
+            self.sync = AsyncSyncService(self.config_path, executor=self.executor)
+        if self.uploads is None:
+            self.uploads = UploadService(self.config_path)
+        self.uploads.start()
+
+        cfg = self.cfg
+        self.scheduler.add_job("security", cfg["security_check_interval"], self.security_job)
+        self.scheduler.add_job("environment", cfg["env_interval"], self.environment_job)
+        if not self.sync.enabled:
+            log.info("⚠️ Cloud sync disabled in config")
+
+        async def heartbeat():
+            self.scheduler.log_stats()
+        self.scheduler.add_job("heartbeat", cfg["heartbeat_interval"], heartbeat,
+                               first_delay=cfg["heartbeat_interval"])
+
+        if cfg["metrics_file"]:
+            async def export_metrics():
+                await self._call(metrics.write_file, cfg["metrics_file"])
+            self.scheduler.add_job("metrics", cfg["metrics_interval"], export_metrics)
+
+        async def maintenance():
+            await self._call(maintain, cfg["local_retention_days"],
+                             cfg["local_archive_dir"] or None,
+                             cfg["local_maintenance_budget_ms"] / 1000, cfg["env_chunk_size"],
+                             cfg["cloud_sync_enabled"])
+        self.scheduler.add_job("maintenance", cfg["local_maintenance_interval"], maintenance)
+        self.scheduler.follow_config(JOB_INTERVALS, self.config_path)
+        if cfg["config_watch_interval"]:
+            config_registry.watch(cfg["config_watch_interval"])
+
+        tasks = [asyncio.create_task(self.scheduler.run(), name="scheduler")]
+        if hasattr(self.mqtt, "run"):
+            tasks.append(asyncio.create_task(self.mqtt.run(), name="mqtt"))
+        if self.sync.enabled:
+            # Woken by local writes rather than a fixed scheduler job
+            tasks.append(asyncio.create_task(self.sync.run(), name="sync"))
+        stopper = asyncio.create_task(self._stop.wait(), name="stop")
+        log.info("✅ All systems ready (asyncio runtime)")
+
+        try:
+            done, _ = await asyncio.wait(tasks + [stopper], return_when=asyncio.FIRST_COMPLETED)
+            for t in done:
+                if t is not stopper and not t.cancelled() and t.exception():
+                    log.error(f"Task {t.get_name()} crashed: {t.exception()}")
+        finally:
+            await self._shutdown(tasks + [stopper] + list(self._pulses))
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                loop.remove_signal_handler(sig)
+
+    async def _shutdown(self, tasks):
+        # Cancel every task first, then release resources in dependency order
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        config_registry.stop()
+        self.scheduler.log_stats()
+        if hasattr(self.mqtt, "close"):
+            await self.mqtt.close()
+        if hasattr(self.sync, "stop"):
+            await self.sync.stop()
+        if self.uploads:
+            await self._call(self.uploads.stop)
+        if hasattr(self.environment, "stop"):
+            await self._call(self.environment.stop)
+        self.executor.shutdown(wait=True)
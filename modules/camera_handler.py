@@ -1,5 +1,5 @@
-import logging, base64, os, cv2
-from datetime import datetime
+import logging, base64, cv2
+from modules.capture_store import CaptureStore
 try:
     from picamera2 import Picamera2
 except Exception:
@@ -8,10 +8,13 @@ except Exception:
 log = logging.getLogger(__name__)
 
 class CameraHandler:
-    def __init__(self):
-        os.makedirs("captures", exist_ok=True)
-        self.cam = None
-        if Picamera2:
+    def __init__(self, store=None, camera=None):
+        """`camera`: any Picamera2-like object (e.g. FakeCamera); default = real Pi camera."""
+        self.store = store or CaptureStore()
+        self.cam = camera
+        if self.cam is not None:
+            self.cam.start()
+        elif Picamera2:
             try:
                 self.cam = Picamera2()
                 self.cam.start()
@@ -19,16 +22,20 @@ class CameraHandler:
             except Exception as e:
                 log.warning(f"Camera init failed: {e}")
 
-    def capture_b64(self):
+    def capture(self):
+        """Capture a frame into the CaptureStore; returns its index record (or None)."""
         if not self.cam:
             return None
         try:
             frame = self.cam.capture_array()
             frame = cv2.resize(frame, (640, 480))
-            path = f"captures/motion_{datetime.now():%Y%m%d_%H%M%S}.jpg"
-            cv2.imwrite(path, frame)
-            with open(path, "rb") as f:
-                return base64.b64encode(f.read()).decode()
+            return self.store.save(frame)
         except Exception as e:
             log.warning(f"Capture failed: {e}")
-            return None
\ No newline at end of file
+            return None
+
+    def capture_b64(self):
+        record = self.capture()
+        if not record:
+            return None
+        return base64.b64encode(record["jpeg"]).decode()
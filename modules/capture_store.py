@@ -0,0 +1,229 @@
+"""
+============================================
+DomiSafe IoT System - Capture Store
+============================================
+Owns everything under captures/:
+- Date-sharded layout: captures/YYYY/MM/DD/motion_*.jpg (+ thumbs/)
+- Thumbnails generated once, at write time
+- SQLite index (local_db.captures) keyed by motion-event id,
+  so listing never needs a directory scan
+- Disk quota + age-based eviction; age never evicts a capture
+  that hasn't reached Drive yet
+"""
+
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+
+from modules.config_loader import load_config, subscribe
+from modules.local_db import (
+    init_db, save_capture, link_capture, fetch_captures,
+    fetch_eviction_candidates, capture_usage, delete_captures
+)
+
+try:
+    import cv2
+    HAS_CV2 = True
+except Exception:
+    HAS_CV2 = False
+
+log = logging.getLogger(__name__)
+
+
+class CaptureStore:
+    def __init__(self, root=None, config_path="config.json"):
+        cfg = load_config(config_path)
+        self.root = root or cfg.get("capture_dir", "captures")
+        self.quota_bytes = int(float(cfg.get("capture_quota_mb", 500)) * 1024 * 1024)
+        self.max_age_days = cfg.get("capture_retention_days", 30)
+        self.thumb_size = tuple(cfg.get("thumbnail_size", [160, 120]))
+        self.lock = threading.Lock()
+        self._overdue = 0       # pending captures past retention, last warned about
+
+        os.makedirs(self.root, exist_ok=True)
+        init_db()
+        self._adopt_legacy()
+        subscribe(self._on_config, ["capture_quota_mb", "capture_retention_days"], config_path)
+
+    def _on_config(self, changed, cfg):
+        self.quota_bytes = int(float(cfg["capture_quota_mb"]) * 1024 * 1024)
+        self.max_age_days = cfg["capture_retention_days"]
+        self.enforce()
+
+    # -------------------------------------------------------
+    # PATHS
+    # -------------------------------------------------------
+    def abspath(self, rel_path):
+        return os.path.join(self.root, rel_path) if rel_path else None
+
+    def _shard(self, when):
+        return when.strftime("%Y/%m/%d")
+
+    # -------------------------------------------------------
+    # WRITE
+    # -------------------------------------------------------
+    def save(self, frame, when=None, motion_id=None):
+        """Encode `frame` once, write it + its thumbnail, index it.
+
+        Returns the index record plus the encoded JPEG under "jpeg",
+        so callers never have to re-read the file they just wrote.
+        """
+        if not HAS_CV2:
+            raise RuntimeError("OpenCV not available")
+
+        when = when or datetime.now()
+        shard = self._shard(when)
+        name = f"motion_{when:%Y%m%d_%H%M%S_%f}.jpg"
+        rel_path = f"{shard}/{name}"
+        rel_thumb = f"{shard}/thumbs/{name}"
+
+        ok, buf = cv2.imencode(".jpg", frame)
+        if not ok:
+            raise RuntimeError("JPEG encoding failed")
+        jpeg = buf.tobytes()
+
+        os.makedirs(os.path.dirname(self.abspath(rel_thumb)), exist_ok=True)
+        with open(self.abspath(rel_path), "wb") as f:
+            f.write(jpeg)
+        size = len(jpeg)
+
+        thumb = cv2.resize(frame, self.thumb_size, interpolation=cv2.INTER_AREA)
+        ok, tbuf = cv2.imencode(".jpg", thumb)
+        if ok:
+            with open(self.abspath(rel_thumb), "wb") as f:
+                f.write(tbuf.tobytes())
+            size += len(tbuf)
+        else:
+            rel_thumb = None
+
+        capture_id = save_capture(rel_path, rel_thumb, size, when.isoformat(), motion_id)
+        log.debug(f"📸 Stored capture {rel_path} ({size} bytes)")
+
+        self.enforce()
+
+        return {
+            "id": capture_id,
+            "motion_id": motion_id,
+            "timestamp": when.isoformat(),
+            "path": rel_path,
+            "thumb_path": rel_thumb,
+            "size_bytes": size,
+            "jpeg": jpeg
+        }
+
+    def attach(self, capture_id, motion_id):
+        link_capture(capture_id, motion_id)
+
+    # -------------------------------------------------------
+    # LIST (index only — no directory scans)
+    # -------------------------------------------------------
+    def list(self, motion_id=None, uploaded=None, limit=None):
+        return fetch_captures(motion_id=motion_id, uploaded=uploaded, limit=limit)
+
+    def usage(self):
+        count, total = capture_usage()
+        return {"count": count, "bytes": total, "quota_bytes": self.quota_bytes}
+
+    # -------------------------------------------------------
+    # RETENTION
+    # -------------------------------------------------------
+    def enforce(self):
+        """Evict uploaded captures past retention, then trim oldest files until under quota."""
+        with self.lock:
+            evicted = 0
+
+            if self.max_age_days:
+                cutoff = (datetime.now() - timedelta(days=self.max_age_days)).isoformat()
+                while True:
+                    # Only uploaded ones: a pending capture is the sole copy
+                    rows = fetch_captures(uploaded=True, before=cutoff, limit=100)
+                    if not rows:
+                        break
+                    evicted += self._evict(rows)
+                overdue, _ = capture_usage(uploaded=False, before=cutoff)
+                if overdue and overdue != self._overdue:
+                    log.warning(f"⚠️ Keeping {overdue} capture(s) past retention: "
+                                f"not uploaded to Drive yet")
+                self._overdue = overdue
+
+            if self.quota_bytes > 0:
+                _, total = capture_usage()
+                while total > self.quota_bytes:
+                    rows = fetch_eviction_candidates(limit=50)
+                    if not rows:
+                        break
+                    batch = []
+                    for row in rows:
+                        batch.append(row)
+                        total -= row[5] or 0
+                        if total <= self.quota_bytes:
+                            break
+                    evicted += self._evict(batch)
+
+            if evicted:
+                log.info(f"🧹 Evicted {evicted} capture(s)")
+            return evicted
+
+    def _evict(self, rows):
+        for row in rows:
+            for rel in (row[3], row[4]):
+                path = self.abspath(rel)
+                if path and os.path.exists(path):
+                    try:
+                        os.remove(path)
+                    except OSError as e:
+                        log.warning(f"Could not remove {path}: {e}")
+            self._prune_dirs(row[3])
+        delete_captures([row[0] for row in rows])
+        return len(rows)
+
+    def _prune_dirs(self, rel_path):
+        # Drop thumbs/ and empty YYYY/MM/DD parents; os.rmdir refuses non-empty dirs
+        day_dir = os.path.dirname(self.abspath(rel_path))
+        for d in (os.path.join(day_dir, "thumbs"), day_dir,
+                  os.path.dirname(day_dir), os.path.dirname(os.path.dirname(day_dir))):
+            if os.path.abspath(d) == os.path.abspath(self.root):
+                break
+            try:
+                os.rmdir(d)
+            except OSError:
+                break
+
+    # -------------------------------------------------------
+    # LEGACY FLAT FILES (captures/motion_*.jpg)
+    # -------------------------------------------------------
+    def _adopt_legacy(self):
+        legacy = [e for e in os.scandir(self.root)
+                  if e.is_file() and e.name.lower().endswith((".jpg", ".jpeg", ".png"))]
+        if not legacy:
+            return
+
+        for entry in legacy:
+            when = datetime.fromtimestamp(entry.stat().st_mtime)
+            rel_path = f"{self._shard(when)}/{entry.name}"
+            os.makedirs(os.path.dirname(self.abspath(rel_path)), exist_ok=True)
+            os.replace(entry.path, self.abspath(rel_path))
+            rel_thumb = self._legacy_thumb(rel_path)
+            size = os.path.getsize(self.abspath(rel_path))
+            if rel_thumb:
+                size += os.path.getsize(self.abspath(rel_thumb))
+            save_capture(rel_path, rel_thumb, size, when.isoformat())
+
+        log.info(f"📦 Indexed {len(legacy)} legacy capture(s)")
+
+    def _legacy_thumb(self, rel_path):
+        if not HAS_CV2:
+            return None
+        try:
+            img = cv2.imread(self.abspath(rel_path))
+            if img is None:
+                return None
+            rel_thumb = f"{os.path.dirname(rel_path)}/thumbs/{os.path.basename(rel_path)}"
+            os.makedirs(os.path.dirname(self.abspath(rel_thumb)), exist_ok=True)
+            thumb = cv2.resize(img, self.thumb_size, interpolation=cv2.INTER_AREA)
+            cv2.imwrite(self.abspath(rel_thumb), thumb)
+            return rel_thumb
+        except Exception as e:
+            log.warning(f"Thumbnail failed for {rel_path}: {e}")
+            return None
@@ -1,10 +1,266 @@
 import psycopg
+import base64
 import logging
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
 from modules.config_loader import load_config
 from typing import Optional
 
 log = logging.getLogger(__name__)
 
+# Shared by CloudDB and AsyncCloudDB.
+# Both tables are range-partitioned by month (environment_y2026m01, ...);
+# partitions are created on demand and expired ones dropped whole.
+# No primary key: on a partitioned table it would have to include
+# timestamp, and nothing looks rows up by id.
+SCHEMA_SQL = [
+    """
+    CREATE TABLE IF NOT EXISTS environment (
+        id SERIAL,
+        timestamp TIMESTAMP,
+        temperature REAL,
+        humidity REAL,
+        device_id VARCHAR(50) DEFAULT 'pi_home_security'
+    ) PARTITION BY RANGE (timestamp)
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS motion_events (
+        id SERIAL,
+        timestamp TIMESTAMP,
+        motion INTEGER,
+        image_name TEXT,
+        device_id VARCHAR(50) DEFAULT 'pi_home_security'
+    ) PARTITION BY RANGE (timestamp)
+    """,
+    # Every read is per device, newest first (cascades to each partition);
+    # id makes one index range cover get_page()'s (timestamp, id) keyset
+    "CREATE INDEX IF NOT EXISTS idx_environment_device_ts_id ON environment (device_id, timestamp, id)",
+    "CREATE INDEX IF NOT EXISTS idx_motion_events_device_ts_id ON motion_events (device_id, timestamp, id)",
+    # Intrusions only (security page, ?motion=1)
+    "CREATE INDEX IF NOT EXISTS idx_motion_events_device_ts_id_hit ON motion_events (device_id, timestamp, id) "
+    "WHERE motion = 1",
+    # Superseded by the *_ts_id indexes above
+    "DROP INDEX IF EXISTS idx_environment_device_ts",
+    "DROP INDEX IF EXISTS idx_motion_events_device_ts",
+    "DROP INDEX IF EXISTS idx_motion_events_device_ts_hit",
+]
+
+PARTITIONED_TABLES = ("environment", "motion_events")
+
+# Before SCHEMA_SQL: a pre-partitioning heap table is moved aside as <table>_legacy
+MIGRATE_LEGACY_SQL = """
+    DO $$
+    DECLARE t text;
+    BEGIN
+        FOREACH t IN ARRAY ARRAY['environment', 'motion_events'] LOOP
+            IF EXISTS (SELECT 1 FROM pg_class
+                       WHERE oid = to_regclass(t) AND relkind = 'r') THEN
+                EXECUTE format('ALTER TABLE %I RENAME TO %I', t, t || '_legacy');
+                EXECUTE format('ALTER INDEX IF EXISTS %I RENAME TO %I',
+                               'idx_' || t || '_device_ts', 'idx_' || t || '_legacy_device_ts');
+            END IF;
+        END LOOP;
+    END $$
+"""
+
+# After SCHEMA_SQL: the legacy table becomes one partition covering
+# everything up to the end of its newest month, the id sequences move
+# past every id already stored, and the helpers used for on-demand
+# creation and retention are (re)defined.
+PARTITION_SQL = [
+    """
+    DO $$
+    DECLARE t text; bound timestamp;
+    BEGIN
+        FOREACH t IN ARRAY ARRAY['environment', 'motion_events'] LOOP
+            IF to_regclass(t || '_legacy') IS NOT NULL AND NOT EXISTS (
+                    SELECT 1 FROM pg_inherits WHERE inhrelid = to_regclass(t || '_legacy')) THEN
+                -- Range partitions can't hold a NULL key
+                EXECUTE format('DELETE FROM %I WHERE timestamp IS NULL', t || '_legacy');
+                EXECUTE format('SELECT date_trunc(''month'', COALESCE(max(timestamp), localtimestamp))'
+                               ' + interval ''1 month'' FROM %I', t || '_legacy') INTO bound;
+                EXECUTE format('ALTER TABLE %I ATTACH PARTITION %I FOR VALUES FROM (MINVALUE) TO (%L)',
+                               t, t || '_legacy', bound);
+            END IF;
+        END LOOP;
+    END $$
+    """,
+    # The legacy heap's own indexes duplicate the parent's (which ATTACH
+    # built on it): drop every one that isn't a partition of a parent
+    # index or backing a constraint
+    """
+    DO $$
+    DECLARE t text; idx text;
+    BEGIN
+        FOREACH t IN ARRAY ARRAY['environment', 'motion_events'] LOOP
+            FOR idx IN SELECT i.indexrelid::regclass::text FROM pg_index i
+                       WHERE i.indrelid = to_regclass(t || '_legacy')
+                         AND NOT EXISTS (SELECT 1 FROM pg_inherits h WHERE h.inhrelid = i.indexrelid)
+                         AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid) LOOP
+                EXECUTE 'DROP INDEX ' || idx;
+            END LOOP;
+        END LOOP;
+    END $$
+    """,
+    # The new SERIAL starts at 1 while the legacy partition already holds
+    # those ids; (timestamp, id) keyset pages need them unique
+    """
+    DO $$
+    DECLARE t text; seq text; top bigint; last bigint;
+    BEGIN
+        FOREACH t IN ARRAY ARRAY['environment', 'motion_events'] LOOP
+            seq := pg_get_serial_sequence(t, 'id');
+            EXECUTE format('SELECT max(id) FROM %I', t) INTO top;
+            IF seq IS NOT NULL AND top IS NOT NULL THEN
+                EXECUTE format('SELECT last_value FROM %s', seq) INTO last;
+                PERFORM setval(seq, GREATEST(top, last));
+            END IF;
+        END LOOP;
+    END $$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION domisafe_ensure_partition(parent text, month_start timestamp)
+    RETURNS void AS $$
+    DECLARE part text := parent || to_char(month_start, '"_y"YYYY"m"MM');
+    BEGIN
+        IF to_regclass(part) IS NOT NULL THEN
+            RETURN;
+        END IF;
+        EXECUTE format('CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                       part, parent, month_start, month_start + interval '1 month');
+    EXCEPTION
+        -- Covered by the legacy partition, or created concurrently by another node
+        WHEN invalid_object_definition OR duplicate_table THEN NULL;
+    END $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION domisafe_drop_partitions(parent text, cutoff timestamp)
+    RETURNS integer AS $$
+    DECLARE r record; upper_bound timestamp; dropped integer := 0;
+    BEGIN
+        FOR r IN SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) AS bound
+                 FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+                 WHERE i.inhparent = to_regclass(parent) LOOP
+            upper_bound := substring(r.bound FROM 'TO [(]''([^'']+)''[)]')::timestamp;
+            IF upper_bound IS NOT NULL AND upper_bound <= cutoff THEN
+                EXECUTE format('DROP TABLE %I', r.relname);
+                dropped := dropped + 1;
+            END IF;
+        END LOOP;
+        RETURN dropped;
+    END $$ LANGUAGE plpgsql
+    """,
+]
+
+# The migration (MIGRATE_LEGACY_SQL, SCHEMA_SQL, PARTITION_SQL) runs once
+# per SCHEMA_VERSION, not on every connect; the advisory lock keeps two
+# nodes from running it at the same time
+SCHEMA_VERSION = 3
+SCHEMA_VERSION_SQL = "CREATE TABLE IF NOT EXISTS domisafe_schema (version INTEGER NOT NULL)"
+MIGRATION_LOCK = 0x646f6d69
+
+# Partition DDL takes an ACCESS EXCLUSIVE lock on the parent table; give
+# up quickly instead of queueing every insert behind a long reader
+DDL_LOCK_TIMEOUT = "2s"
+
+ENSURE_PARTITION_SQL = "SELECT domisafe_ensure_partition(%s, %s)"
+DROP_PARTITIONS_SQL = "SELECT domisafe_drop_partitions(%s, %s)"
+
+INSERT_ENV_SQL = """
+    INSERT INTO environment (timestamp, temperature, humidity, device_id)
+    VALUES (%s, %s, %s, %s)
+"""
+
+INSERT_MOTION_SQL = """
+    INSERT INTO motion_events (timestamp, motion, image_name, device_id)
+    VALUES (%s, %s, %s, %s)
+"""
+
+DEFAULT_DEVICE_ID = "pi_home_security"
+
+# stream_rows(): export kind → (columns, table); rows per server-side fetch
+EXPORT_QUERIES = {
+    "environment": ("timestamp, temperature, humidity", "environment"),
+    "motion": ("timestamp, motion, image_name", "motion_events"),
+}
+EXPORT_BATCH = 5000
+
+# NOTIFY'd after a sync pass pushed rows; payload = device_id
+SYNC_CHANNEL = "domisafe_synced"
+LISTEN_RETRY_MAX = 60
+
+# get_page(): kind → (columns, table); id is the keyset tiebreaker
+PAGE_QUERIES = {
+    "environment": ("id, timestamp, temperature, humidity", "environment"),
+    "motion": ("id, timestamp, motion, image_name", "motion_events"),
+}
+PAGE_SIZE = 100
+MAX_PAGE = 1000
+
+
+class CloudUnavailable(Exception):
+    """get_page() couldn't read (no connection or the query failed) —
+    unlike an empty page, this is not the end of the history."""
+
+
+def as_timestamp(value):
+    """Local rows carry epoch ms; the cloud columns hold naive local TIMESTAMPs."""
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value / 1000)
+    return value
+
+
+def month_start(ts):
+    """datetime, date or ISO string → first day of its month."""
+    text = str(ts)
+    return date(int(text[:4]), int(text[5:7]), 1)
+
+
+def add_months(day, n):
+    year, month = divmod(day.month - 1 + n, 12)
+    return date(day.year + year, month + 1, 1)
+
+
+def retention_cutoff(months, today=None):
+    """Partitions ending on or before this date are past `months` of retention."""
+    return add_months(month_start(today or date.today()), -months)
+
+
+def encode_cursor(key):
+    """(timestamp, id) → opaque URL-safe page token."""
+    ts, row_id = key
+    return base64.urlsafe_b64encode(f"{ts.isoformat()}|{row_id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    """Inverse of encode_cursor(); ValueError on anything malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+        ts, row_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(ts), int(row_id)
+    except Exception as e:
+        raise ValueError(f"bad cursor: {token!r}") from e
+
+
+def _schema_version(cur):
+    cur.execute(SCHEMA_VERSION_SQL)
+    cur.execute("SELECT COALESCE(max(version), 0) FROM domisafe_schema")
+    return cur.fetchone()[0]
+
+
+async def _schema_version_async(cur):
+    await cur.execute(SCHEMA_VERSION_SQL)
+    await cur.execute("SELECT COALESCE(max(version), 0) FROM domisafe_schema")
+    return (await cur.fetchone())[0]
+
+
+def _day_range(date_str):
+    """'YYYY-MM-DD' → (start, end) ISO strings for a half-open timestamp range."""
+    day = date.fromisoformat(str(date_str))
+    return day.isoformat(), (day + timedelta(days=1)).isoformat()
+
 
 class CloudDB:
     def __init__(self, config_path: str = "config.json", db_url: Optional[str] = None):
@@ -18,18 +274,31 @@ class CloudDB:
         self.conn_string = db_url if db_url else cfg.get("NEON_DB_URL", "")
         self.conn = None
         self.enabled = cfg.get("cloud_sync_enabled", True)
+        self.device_id = cfg.get("device_id") or DEFAULT_DEVICE_ID
+        self.retention_months = cfg.get("cloud_retention_months", 0)
+        self._partitions = set()        # (table, month start) known to exist
+        self.maintenance_ok = True      # last maintain() finished (False: retry soon)
+        self.connect_timeout = cfg.get("cloud_connect_timeout", 10)
+        self._connect_lock = threading.Lock()
+
+    # Subclasses on engines without native partitioning turn this off
+    partitioned = True
 
     # ============================================================
     # CONNECT
     # ============================================================
     def connect(self):
+        # Someone else (e.g. the web app's background init) is already
+        # connecting: report "not yet" instead of queueing behind them
+        if not self._connect_lock.acquire(blocking=False):
+            return False
         try:
             if not self.conn_string:
                 log.warning("⚠️ No NEON_DB_URL in config")
                 return False
 
             # psycopg3 connection
-            self.conn = psycopg.connect(self.conn_string)
+            self.conn = psycopg.connect(self.conn_string, connect_timeout=self.connect_timeout)
             log.info("✅ Connected to cloud database")
 
             self._init_tables()
@@ -39,6 +308,18 @@ class CloudDB:
             log.error(f"❌ Cloud DB connection failed: {e}")
             return False
 
+        finally:
+            self._connect_lock.release()
+
+    def after_fork(self):
+        """Forget handles inherited from a parent process (pre-forking servers).
+
+        The parent's socket is dropped, not closed: closing it here would
+        end the parent's session too. The next query reconnects.
+        """
+        self.conn = None
+        self._connect_lock = threading.Lock()
+
     # ============================================================
     # INIT TABLES
     # ============================================================
@@ -48,91 +329,171 @@ class CloudDB:
 
         try:
             with self.conn.cursor() as cur:
-                cur.execute("""
-                    CREATE TABLE IF NOT EXISTS environment (
-                        id SERIAL PRIMARY KEY,
-                        timestamp TIMESTAMP,
-                        temperature REAL,
-                        humidity REAL,
-                        device_id VARCHAR(50) DEFAULT 'pi_home_security'
-                    )
-                """)
-
-                cur.execute("""
-                    CREATE TABLE IF NOT EXISTS motion_events (
-                        id SERIAL PRIMARY KEY,
-                        timestamp TIMESTAMP,
-                        motion INTEGER,
-                        image_name TEXT,
-                        device_id VARCHAR(50) DEFAULT 'pi_home_security'
-                    )
-                """)
+                if not self.partitioned:
+                    for stmt in SCHEMA_SQL:
+                        cur.execute(stmt)
+                elif _schema_version(cur) < SCHEMA_VERSION:
+                    cur.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK,))
+                    if _schema_version(cur) < SCHEMA_VERSION:
+                        for stmt in [MIGRATE_LEGACY_SQL, *SCHEMA_SQL, *PARTITION_SQL]:
+                            cur.execute(stmt)
+                        cur.execute("INSERT INTO domisafe_schema (version) VALUES (%s)",
+                                    (SCHEMA_VERSION,))
+                        log.info(f"✅ Cloud schema migrated to v{SCHEMA_VERSION}")
 
                 self.conn.commit()
                 log.info("✅ Cloud tables initialized")
 
+            self._partitions.clear()
+            self.maintain()
+
         except Exception as e:
             log.error(f"Failed to init tables: {e}")
 
     # ============================================================
-    # INSERT ENVIRONMENT
+    # PARTITIONS
     # ============================================================
-    def insert_environment(self, timestamp, temperature, humidity):
-        if not self.conn:
-            return False
+    def _ensure_partition(self, cur, table, timestamp):
+        """Create the month partition `timestamp` falls in, once per process."""
+        if not self.partitioned:
+            return None
+        key = (table, month_start(timestamp))
+        if key not in self._partitions:
+            cur.execute(f"SET LOCAL lock_timeout = '{DDL_LOCK_TIMEOUT}'")
+            cur.execute(ENSURE_PARTITION_SQL, (table, key[1]))
+        return key
+
+    def maintain(self):
+        """
+        Pre-create this and next month's partitions, then drop the ones
+        past `cloud_retention_months` (0 = keep forever). Dropping a
+        partition is a catalog change, not a DELETE scan. Returns the
+        number dropped, or None if the pass failed (e.g. a reader held
+        the table past DDL_LOCK_TIMEOUT) and should be retried soon.
+        """
+        if not self.partitioned or not self.conn:
+            return 0
 
+        this_month = month_start(date.today())
+        cutoff = retention_cutoff(self.retention_months) if self.retention_months else None
+        dropped = 0
         try:
             with self.conn.cursor() as cur:
-                cur.execute("""
-                    INSERT INTO environment (timestamp, temperature, humidity)
-                    VALUES (%s, %s, %s)
-                """, (timestamp, temperature, humidity))
-
+                cur.execute(f"SET LOCAL lock_timeout = '{DDL_LOCK_TIMEOUT}'")
+                for table in PARTITIONED_TABLES:
+                    for month in (this_month, add_months(this_month, 1)):
+                        self._ensure_partition(cur, table, month)
+                    if cutoff:
+                        cur.execute(DROP_PARTITIONS_SQL, (table, cutoff))
+                        dropped += cur.fetchone()[0]
                 self.conn.commit()
-            return True
 
+            self._partitions.update((t, m) for t in PARTITIONED_TABLES
+                                    for m in (this_month, add_months(this_month, 1)))
+            if cutoff:
+                self._partitions = {k for k in self._partitions if k[1] >= cutoff}
+            if dropped:
+                log.info(f"🗑️ Dropped {dropped} cloud partition(s) older than {cutoff}")
+            self.maintenance_ok = True
+            return dropped
+
+        except psycopg.errors.LockNotAvailable:
+            log.warning("⏳ Partition maintenance timed out on a table lock — retrying later")
         except Exception as e:
-            log.error(f"Insert env failed: {e}")
+            log.error(f"Partition maintenance failed: {e}")
+        self.maintenance_ok = False
+        try:
+            self.conn.rollback()
+        except Exception:
             self.conn = None
-            return False
+        return None
 
     # ============================================================
-    # INSERT MOTION
+    # INSERTS (one statement batch, one commit)
     # ============================================================
-    def insert_motion(self, timestamp, motion, image_name=None):
+    def _insert_many(self, table, sql, rows):
+        """Insert `rows` (timestamp first) in one transaction; all or nothing."""
         if not self.conn:
             return False
+        if not rows:
+            return True
 
         try:
             with self.conn.cursor() as cur:
-                cur.execute("""
-                    INSERT INTO motion_events (timestamp, motion, image_name)
-                    VALUES (%s, %s, %s)
-                """, (timestamp, motion, image_name))
+                partitions = {self._ensure_partition(cur, table, row[0]) for row in rows}
+                cur.executemany(sql, rows)
 
                 self.conn.commit()
+            self._partitions.update(p for p in partitions if p)
             return True
 
+        except psycopg.errors.LockNotAvailable:
+            # New month's partition is waiting on a reader; next sync pass retries
+            log.warning("⏳ Partition create timed out on a table lock — retrying later")
+            self.conn.rollback()
+            return False
         except Exception as e:
-            log.error(f"Insert motion failed: {e}")
+            log.error(f"Insert into {table} failed: {e}")
             self.conn = None
             return False
 
+    def insert_environment_many(self, rows):
+        """rows: [(timestamp, temperature, humidity, device_id or None)]"""
+        return self._insert_many("environment", INSERT_ENV_SQL,
+                                 [(as_timestamp(ts), t, h, device_id or self.device_id)
+                                  for ts, t, h, device_id in rows])
+
+    def insert_motion_many(self, rows):
+        """rows: [(timestamp, motion, image_name, device_id or None)]"""
+        return self._insert_many("motion_events", INSERT_MOTION_SQL,
+                                 [(as_timestamp(ts), motion, image, device_id or self.device_id)
+                                  for ts, motion, image, device_id in rows])
+
+    def insert_environment(self, timestamp, temperature, humidity, device_id=None):
+        return self.insert_environment_many([(timestamp, temperature, humidity, device_id)])
+
+    def insert_motion(self, timestamp, motion, image_name=None, device_id=None):
+        return self.insert_motion_many([(timestamp, motion, image_name, device_id)])
+
+    # ============================================================
+    # READS
+    # ============================================================
+    # Reads never connect: whoever owns the object (the web app's
+    # ServiceStarter) does, so a request can't block on an outage.
+    # Without a connection they return empty results.
+    @contextmanager
+    def _reading(self):
+        """Cursor for one read. The transaction is rolled back right after
+        (nothing was written), so no table lock outlives the query and a
+        failed query can't leave the shared connection aborted. A dead
+        connection is dropped (conn = None) for the owner to replace."""
+        conn = self.conn
+        try:
+            with conn.cursor() as cur:
+                yield cur
+        finally:
+            try:
+                conn.rollback()
+            except Exception:
+                self.conn = None
+
     # ============================================================
     # QUERY: ENV BY DATE
     # ============================================================
-    def get_environment_by_date(self, date_str):
-        if not self.conn and not self.connect():
+    def get_environment_by_date(self, date_str, device_id=None):
+        if not self.conn:
             return []
 
         try:
-            with self.conn.cursor() as cur:
+            with self._reading() as cur:
+                # Range on timestamp (not DATE(timestamp)) so (device_id, timestamp) is used
+                # and the planner prunes every partition but that day's month
                 cur.execute("""
                     SELECT timestamp, temperature, humidity
                     FROM environment
-                    WHERE DATE(timestamp) = %s
+                    WHERE device_id = %s AND timestamp >= %s AND timestamp < %s
                     ORDER BY timestamp
-                """, (date_str,))
+                """, (device_id or self.device_id, *_day_range(date_str)))
 
                 return cur.fetchall()
 
@@ -143,18 +504,22 @@ class CloudDB:
     # ============================================================
     # QUERY: MOTION BY DATE
     # ============================================================
-    def get_motion_by_date(self, date_str):
-        if not self.conn and not self.connect():
+    def get_motion_by_date(self, date_str, device_id=None, motion=None):
+        """`motion` filters on the motion value in SQL (1 = intrusions only)."""
+        if not self.conn:
             return []
 
         try:
-            with self.conn.cursor() as cur:
-                cur.execute("""
+            with self._reading() as cur:
+                where, params = "", [device_id or self.device_id, *_day_range(date_str)]
+                if motion is not None:
+                    where, params = " AND motion = %s", params + [motion]
+                cur.execute(f"""
                     SELECT timestamp, motion, image_name
                     FROM motion_events
-                    WHERE DATE(timestamp) = %s
+                    WHERE device_id = %s AND timestamp >= %s AND timestamp < %s{where}
                     ORDER BY timestamp DESC
-                """, (date_str,))
+                """, params)
 
                 return cur.fetchall()
 
@@ -165,18 +530,19 @@ class CloudDB:
     # ============================================================
     # QUERY: LATEST ENV
     # ============================================================
-    def get_latest_environment(self, limit=10):
-        if not self.conn and not self.connect():
+    def get_latest_environment(self, limit=10, device_id=None):
+        if not self.conn:
             return []
 
         try:
-            with self.conn.cursor() as cur:
+            with self._reading() as cur:
                 cur.execute("""
                     SELECT timestamp, temperature, humidity
                     FROM environment
+                    WHERE device_id = %s
                     ORDER BY timestamp DESC
                     LIMIT %s
-                """, (limit,))
+                """, (device_id or self.device_id, limit))
 
                 return cur.fetchall()
 
@@ -187,18 +553,19 @@ class CloudDB:
     # ============================================================
     # QUERY: LATEST MOTION
     # ============================================================
-    def get_latest_motion(self, limit=10):
-        if not self.conn and not self.connect():
+    def get_latest_motion(self, limit=10, device_id=None):
+        if not self.conn:
             return []
 
         try:
-            with self.conn.cursor() as cur:
+            with self._reading() as cur:
                 cur.execute("""
                     SELECT timestamp, motion, image_name
                     FROM motion_events
+                    WHERE device_id = %s
                     ORDER BY timestamp DESC
                     LIMIT %s
-                """, (limit,))
+                """, (device_id or self.device_id, limit))
 
                 return cur.fetchall()
 
@@ -206,6 +573,174 @@ class CloudDB:
             log.error(f"Query failed: {e}")
             return []
 
+    # ============================================================
+    # QUERY: DAY STAMP (cache validator)
+    # ============================================================
+    def get_day_stamp(self, kind, date_str, device_id=None, motion=None):
+        """(row count, newest timestamp) for one day, or None if the query failed.
+
+        Answered from the (device_id, timestamp) index; any insert for that
+        day changes it, which is what page caches key their ETags on.
+        """
+        if not self.conn:
+            return None
+
+        _, table = PAGE_QUERIES[kind]
+        where, params = "", [device_id or self.device_id, *_day_range(date_str)]
+        if motion is not None and kind == "motion":
+            where, params = " AND motion = %s", params + [motion]
+        try:
+            with self._reading() as cur:
+                cur.execute(f"""
+                    SELECT COUNT(*), MAX(timestamp) FROM {table}
+                    WHERE device_id = %s AND timestamp >= %s AND timestamp < %s{where}
+                """, params)
+                return tuple(cur.fetchone())
+
+        except Exception as e:
+            log.error(f"Query failed: {e}")
+            return None
+
+    # ============================================================
+    # QUERY: KEYSET PAGES
+    # ============================================================
+    def get_page(self, kind, device_id=None, after=None, limit=PAGE_SIZE,
+                 start=None, end=None, motion=None, ascending=False):
+        """
+        One page of rows (id first) ordered by (timestamp, id), newest
+        first unless `ascending`. `after` is the previous page's key;
+        every filter is a SQL predicate, so each page is one index range
+        scan however deep into the history it is. Returns (rows, next_key),
+        next_key None on the last page; raises CloudUnavailable when the
+        page can't be read.
+        """
+        if not self.conn:
+            raise CloudUnavailable("not connected")
+
+        columns, table = PAGE_QUERIES[kind]
+        limit = max(1, min(int(limit), MAX_PAGE))
+        where, params = ["device_id = %s"], [device_id or self.device_id]
+        if start:
+            where.append("timestamp >= %s")
+            params.append(_day_range(start)[0])
+        if end:
+            where.append("timestamp < %s")
+            params.append(_day_range(end)[1])
+        if motion is not None and kind == "motion":
+            where.append("motion = %s")
+            params.append(motion)
+        if after:
+            where.append(f"(timestamp, id) {'>' if ascending else '<'} (%s, %s)")
+            params.extend(after)
+        order = "ASC" if ascending else "DESC"
+
+        try:
+            with self._reading() as cur:
+                # One extra row tells whether another page exists
+                cur.execute(f"""
+                    SELECT {columns} FROM {table}
+                    WHERE {" AND ".join(where)}
+                    ORDER BY timestamp {order}, id {order}
+                    LIMIT %s
+                """, (*params, limit + 1))
+                rows = cur.fetchall()
+
+        except Exception as e:
+            log.error(f"Query failed: {e}")
+            raise CloudUnavailable(str(e)) from e
+
+        if len(rows) > limit:
+            rows = rows[:limit]
+            return rows, (rows[-1][1], rows[-1][0])
+        return rows, None
+
+    # ============================================================
+    # EXPORT (server-side cursor)
+    # ============================================================
+    def _export_connection(self):
+        # Own connection: a long export neither holds up the page queries
+        # nor loses its cursor when someone else commits
+        return psycopg.connect(self.conn_string, connect_timeout=self.connect_timeout)
+
+    def stream_rows(self, kind, start, end, device_id=None, batch=EXPORT_BATCH):
+        """
+        Yield lists of up to `batch` rows for start <= day <= end
+        ('YYYY-MM-DD'), oldest first. A named (server-side) cursor
+        keeps at most one batch in this process at a time.
+        """
+        columns, table = EXPORT_QUERIES[kind]
+        lo, hi = _day_range(start)[0], _day_range(end)[1]
+        conn = self._export_connection()
+        try:
+            with conn.cursor(name=f"export_{kind}") as cur:
+                cur.itersize = batch
+                cur.execute(f"""
+                    SELECT {columns} FROM {table}
+                    WHERE device_id = %s AND timestamp >= %s AND timestamp < %s
+                    ORDER BY timestamp
+                """, (device_id or self.device_id, lo, hi))
+                while True:
+                    rows = cur.fetchmany(batch)
+                    if not rows:
+                        break
+                    yield rows
+        finally:
+            if conn is not self.conn:
+                conn.close()
+
+    # ============================================================
+    # QUERY: KNOWN DEVICES
+    # ============================================================
+    def get_devices(self):
+        if not self.conn:
+            return []
+
+        try:
+            with self._reading() as cur:
+                cur.execute("SELECT DISTINCT device_id FROM environment ORDER BY device_id")
+                return [r[0] for r in cur.fetchall()]
+
+        except Exception as e:
+            log.error(f"Query failed: {e}")
+            return []
+
+    # ============================================================
+    # SYNC NOTIFICATIONS
+    # ============================================================
+    def notify_synced(self, device_ids):
+        """Tell listeners (the web app's dashboard cache) which devices got new rows."""
+        if not self.conn or not device_ids:
+            return
+        try:
+            with self.conn.cursor() as cur:
+                for device in sorted(device_ids):
+                    cur.execute("SELECT pg_notify(%s, %s)", (SYNC_CHANNEL, device))
+            self.conn.commit()
+        except Exception as e:
+            log.warning(f"Sync notify failed: {e}")
+
+    def listen(self, callback, channel=SYNC_CHANNEL, stop=None):
+        """
+        Blocking: callback(payload) for every NOTIFY on `channel`, on a
+        dedicated autocommit connection. Reconnects with backoff; returns
+        once `stop` (threading.Event) is set.
+        """
+        delay = 2
+        while not (stop and stop.is_set()):
+            try:
+                with psycopg.connect(self.conn_string, autocommit=True,
+                                     connect_timeout=self.connect_timeout) as conn:
+                    conn.execute(f"LISTEN {channel}")
+                    log.info(f"👂 Listening for {channel}")
+                    delay = 2
+                    while not (stop and stop.is_set()):
+                        for note in conn.notifies(timeout=5):
+                            callback(note.payload)
+            except Exception as e:
+                log.warning(f"⚠️ LISTEN {channel} lost ({e}), retrying in {delay}s")
+                time.sleep(delay)
+                delay = min(delay * 2, LISTEN_RETRY_MAX)
+
     # ============================================================
     # CLOSE CONNECTION
     # ============================================================
@@ -213,3 +748,144 @@ class CloudDB:
         if self.conn:
             self.conn.close()
             log.info("Cloud DB closed")
+
+
+class AsyncCloudDB:
+    """psycopg async counterpart of CloudDB (write path used by the asyncio runtime)."""
+
+    def __init__(self, config_path: str = "config.json", db_url: Optional[str] = None):
+        cfg = load_config(config_path)
+        self.conn_string = db_url if db_url else cfg.get("NEON_DB_URL", "")
+        self.conn = None
+        self.enabled = cfg.get("cloud_sync_enabled", True)
+        self.device_id = cfg.get("device_id") or DEFAULT_DEVICE_ID
+        self.retention_months = cfg.get("cloud_retention_months", 0)
+        self.connect_timeout = cfg.get("cloud_connect_timeout", 10)
+        self._partitions = set()
+        self.maintenance_ok = True
+
+    async def connect(self):
+        try:
+            if not self.conn_string:
+                log.warning("⚠️ No NEON_DB_URL in config")
+                return False
+
+            self.conn = await psycopg.AsyncConnection.connect(self.conn_string,
+                                                              connect_timeout=self.connect_timeout)
+            log.info("✅ Connected to cloud database (async)")
+
+            async with self.conn.cursor() as cur:
+                if await _schema_version_async(cur) < SCHEMA_VERSION:
+                    await cur.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK,))
+                    if await _schema_version_async(cur) < SCHEMA_VERSION:
+                        for stmt in [MIGRATE_LEGACY_SQL, *SCHEMA_SQL, *PARTITION_SQL]:
+                            await cur.execute(stmt)
+                        await cur.execute("INSERT INTO domisafe_schema (version) VALUES (%s)",
+                                          (SCHEMA_VERSION,))
+                        log.info(f"✅ Cloud schema migrated to v{SCHEMA_VERSION}")
+            await self.conn.commit()
+            self._partitions.clear()
+            await self.maintain()
+            return True
+
+        except Exception as e:
+            log.error(f"❌ Cloud DB connection failed: {e}")
+            self.conn = None
+            return False
+
+    async def maintain(self):
+        """See CloudDB.maintain()."""
+        if not self.conn:
+            return 0
+
+        this_month = month_start(date.today())
+        months = (this_month, add_months(this_month, 1))
+        cutoff = retention_cutoff(self.retention_months) if self.retention_months else None
+        dropped = 0
+        try:
+            async with self.conn.cursor() as cur:
+                await cur.execute(f"SET LOCAL lock_timeout = '{DDL_LOCK_TIMEOUT}'")
+                for table in PARTITIONED_TABLES:
+                    for month in months:
+                        if (table, month) not in self._partitions:
+                            await cur.execute(ENSURE_PARTITION_SQL, (table, month))
+                    if cutoff:
+                        await cur.execute(DROP_PARTITIONS_SQL, (table, cutoff))
+                        dropped += (await cur.fetchone())[0]
+            await self.conn.commit()
+
+            self._partitions.update((t, m) for t in PARTITIONED_TABLES for m in months)
+            if cutoff:
+                self._partitions = {k for k in self._partitions if k[1] >= cutoff}
+            if dropped:
+                log.info(f"🗑️ Dropped {dropped} cloud partition(s) older than {cutoff}")
+            self.maintenance_ok = True
+            return dropped
+
+        except psycopg.errors.LockNotAvailable:
+            log.warning("⏳ Partition maintenance timed out on a table lock — retrying later")
+        except Exception as e:
+            log.error(f"Partition maintenance failed: {e}")
+        self.maintenance_ok = False
+        try:
+            await self.conn.rollback()
+        except Exception:
+            self.conn = None
+        return None
+
+    async def _insert_many(self, table, sql, rows):
+        if not self.conn:
+            return False
+        if not rows:
+            return True
+        try:
+            keys = {(table, month_start(row[0])) for row in rows} - self._partitions
+            async with self.conn.cursor() as cur:
+                if keys:
+                    await cur.execute(f"SET LOCAL lock_timeout = '{DDL_LOCK_TIMEOUT}'")
+                    for key in keys:
+                        await cur.execute(ENSURE_PARTITION_SQL, key)
+                await cur.executemany(sql, rows)
+            await self.conn.commit()
+            self._partitions.update(keys)
+            return True
+        except psycopg.errors.LockNotAvailable:
+            log.warning("⏳ Partition create timed out on a table lock — retrying later")
+            await self.conn.rollback()
+            return False
+        except Exception as e:
+            log.error(f"Insert into {table} failed: {e}")
+            self.conn = None
+            return False
+
+    async def insert_environment_many(self, rows):
+        return await self._insert_many("environment", INSERT_ENV_SQL,
+                                       [(as_timestamp(ts), t, h, device_id or self.device_id)
+                                        for ts, t, h, device_id in rows])
+
+    async def insert_motion_many(self, rows):
+        return await self._insert_many("motion_events", INSERT_MOTION_SQL,
+                                       [(as_timestamp(ts), motion, image, device_id or self.device_id)
+                                        for ts, motion, image, device_id in rows])
+
+    async def insert_environment(self, timestamp, temperature, humidity, device_id=None):
+        return await self.insert_environment_many([(timestamp, temperature, humidity, device_id)])
+
+    async def insert_motion(self, timestamp, motion, image_name=None, device_id=None):
+        return await self.insert_motion_many([(timestamp, motion, image_name, device_id)])
+
+    async def notify_synced(self, device_ids):
+        if not self.conn or not device_ids:
+            return
+        try:
+            async with self.conn.cursor() as cur:
+                for device in sorted(device_ids):
+                    await cur.execute("SELECT pg_notify(%s, %s)", (SYNC_CHANNEL, device))
+            await self.conn.commit()
+        except Exception as e:
+            log.warning(f"Sync notify failed: {e}")
+
+    async def close(self):
+        if self.conn:
+            await self.conn.close()
+            log.info("Cloud DB closed")
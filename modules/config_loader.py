@@ -1,4 +1,16 @@
-import json, os, logging
+"""
+============================================
+DomiSafe IoT System - Config Registry
+============================================
+config.json is parsed once per process and cached by mtime/size.
+- Values are validated against DEFAULTS' types + SCHEMA ranges
+- watch() polls the file; changed keys are pushed to subscribers
+  (intervals, thresholds, quotas) without a restart
+- Bound-method subscribers are held weakly, so subscribing never
+  keeps an object alive
+"""
+
+import json, os, logging, re, threading, time, weakref
 
 log = logging.getLogger(__name__)
 
@@ -7,31 +19,294 @@ DEFAULTS = {
     "ADAFRUIT_IO_KEY": "",
     "MQTT_BROKER": "io.adafruit.com",
     "MQTT_PORT": 8883,
+    "MQTT_TLS": True,
     "NEON_DB_URL": "",
     "DHT_PIN": 4,
     "PIR_PIN": 6,
     "LED_PIN": 16,
     "BUZZER_PIN": 26,
     "MOTOR_PIN": 21,
+    "runtime": "threaded",
     "security_check_interval": 5,
     "env_interval": 30,
+    "dht_sample_interval": 2.0,
+    "dht_filter_window": 5,
+    "dht_stale_after": 60,
+    "dht_max_backoff": 30,
+    "env_simulate": False,
     "sync_interval": 60,
+    "sync_debounce_ms": 500,
+    "sync_batch_min": 50,
+    "sync_batch_max": 1000,
+    "heartbeat_interval": 300,
+    "config_watch_interval": 2,
     "camera_enabled": True,
+    "hardware_sim": False,
+    "device_id": "pi_home_security",
+    "capture_dir": "captures",
+    "capture_quota_mb": 500,
+    "capture_retention_days": 30,
+    "thumbnail_size": [160, 120],
     "cloud_sync_enabled": True,
+    "cloud_retention_months": 0,
+    "local_retention_days": 30,
+    "local_archive_dir": "",
+    "local_maintenance_interval": 300,
+    "local_maintenance_budget_ms": 200,
+    "env_chunk_size": 240,
     "google_drive_enabled": False,
     "google_drive_log_folder_id": "",
-    "google_drive_image_folder_id": ""
+    "google_drive_image_folder_id": "",
+    "google_drive_upload_workers": 4,
+    "google_drive_chunk_kb": 1024,
+    "google_drive_max_retries": 5,
+    "log_compression": "gzip",
+    "upload_interval": 10,
+    "upload_active_log_interval": 300,
+    "upload_max_files_per_min": 60,
+    "upload_bandwidth_kbps": 0,
+    "upload_manifest_path": "upload_manifest.db",
+    "log_dir": "logs",
+    "log_level": "INFO",
+    "log_json": True,
+    "log_max_mb": 5,
+    "log_rotate_hours": 24,
+    "log_backup_count": 10,
+    "log_queue_size": 10000,
+    "log_rate_limit": 20,
+    "log_rate_window": 60,
+    "metrics_file": "metrics.prom",
+    "metrics_interval": 15,
+    "metrics_port": 0,
+    "web_cache_ttl": 30,
+    "web_cache_closed_ttl": 3600,
+    "cloud_connect_timeout": 10,
+    "web_host": "0.0.0.0",
+    "web_port": 5000,
+    "web_workers": 0,
+    "web_threads": 4,
+    "web_fragment_ttl": 30
 }
 
-def load_config(path="config.json"):
-    cfg = dict(DEFAULTS)
-    if os.path.exists(path):
+# Extra constraints beyond "same type as the default": (min, max), None = open
+SCHEMA = {
+    "MQTT_PORT": (1, 65535),
+    "DHT_PIN": (0, 27),
+    "PIR_PIN": (0, 27),
+    "LED_PIN": (0, 27),
+    "BUZZER_PIN": (0, 27),
+    "MOTOR_PIN": (0, 27),
+    "security_check_interval": (0.05, None),
+    "env_interval": (0.5, None),
+    "sync_interval": (1, None),
+    "sync_debounce_ms": (0, 60000),
+    "sync_batch_min": (1, None),
+    "sync_batch_max": (1, None),
+    "cloud_retention_months": (0, None),
+    "local_retention_days": (0, None),
+    "local_maintenance_interval": (1, None),
+    "local_maintenance_budget_ms": (10, None),
+    "env_chunk_size": (0, 4096),
+    "heartbeat_interval": (1, None),
+    "config_watch_interval": (0, None),
+    "dht_sample_interval": (1, None),
+    "dht_filter_window": (1, 50),
+    "dht_stale_after": (1, None),
+    "dht_max_backoff": (2, 300),
+    "capture_quota_mb": (0, None),
+    "capture_retention_days": (0, None),
+    "google_drive_upload_workers": (1, 32),
+    "google_drive_chunk_kb": (256, None),
+    "google_drive_max_retries": (0, None),
+    "upload_interval": (1, None),
+    "upload_active_log_interval": (0, None),
+    "upload_max_files_per_min": (0, None),
+    "upload_bandwidth_kbps": (0, None),
+    "log_max_mb": (0, None),
+    "log_rotate_hours": (0, None),
+    "log_backup_count": (0, None),
+    "log_queue_size": (100, None),
+    "log_rate_limit": (0, None),
+    "log_rate_window": (1, None),
+    "metrics_interval": (1, None),
+    "metrics_port": (0, 65535),
+    "web_cache_ttl": (0, None),
+    "web_cache_closed_ttl": (0, None),
+    "cloud_connect_timeout": (1, 120),
+    "web_port": (1, 65535),
+    "web_workers": (0, 64),
+    "web_threads": (1, 64),
+    "web_fragment_ttl": (0, None),
+}
+
+RUNTIMES = ("threaded", "asyncio")
+LOG_CODECS = ("gzip", "zstd", "none")
+LOG_LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR")
+DEVICE_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,50}$")
+
+
+def _validate(key, value):
+    """Return an error string, or None if `value` is acceptable for `key`."""
+    if key not in DEFAULTS:
+        return None
+    default = DEFAULTS[key]
+
+    if isinstance(default, bool):
+        if not isinstance(value, bool):
+            return f"expected true/false, got {value!r}"
+    elif isinstance(default, (int, float)):
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return f"expected a number, got {value!r}"
+        lo, hi = SCHEMA.get(key, (None, None))
+        if lo is not None and value < lo:
+            return f"must be >= {lo}"
+        if hi is not None and value > hi:
+            return f"must be <= {hi}"
+    elif isinstance(default, str):
+        if not isinstance(value, str):
+            return f"expected a string, got {value!r}"
+    elif isinstance(default, list):
+        if not isinstance(value, list) or len(value) != len(default):
+            return f"expected a list of {len(default)} values"
+
+    if key == "runtime" and value not in RUNTIMES:
+        return f"must be one of {RUNTIMES}"
+    if key == "log_compression" and value not in LOG_CODECS:
+        return f"must be one of {LOG_CODECS}"
+    if key == "device_id" and not DEVICE_ID_RE.match(value):
+        return "must be 1-50 chars of letters, digits, '_' or '-'"
+    if key == "log_level" and value.upper() not in LOG_LEVELS:
+        return f"must be one of {LOG_LEVELS}"
+    return None
+
+
+class ConfigRegistry:
+    def __init__(self):
+        self._entries = {}          # abspath -> (stamp, cfg)
+        self._subscribers = []      # (path, keys, ref() → callback or None)
+        self._lock = threading.RLock()
+        self._watcher = None
+        self._watching = False
+
+    # -------------------------------------------------------
+    # LOAD (cached)
+    # -------------------------------------------------------
+    def _stamp(self, path):
+        try:
+            st = os.stat(path)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def get(self, path="config.json"):
+        """Cached, validated config for `path`; re-parsed only when the file changed."""
+        key = os.path.abspath(path)
+        stamp = self._stamp(key)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == stamp:
+                return entry[1]
+
+            previous = entry[1] if entry else None
+            cfg = self._parse(path, stamp, previous)
+            self._entries[key] = (stamp, cfg)
+
+        if previous is not None:
+            changed = {k: v for k, v in cfg.items() if previous.get(k) != v}
+            if changed:
+                self._notify(key, changed, cfg)
+        return cfg
+
+    def _parse(self, path, stamp, previous):
+        cfg = dict(previous or DEFAULTS)
+        if stamp is None:
+            if previous is None:
+                log.warning(f"⚠️ Using default configuration")
+            return cfg
+
         try:
             with open(path) as f:
-                cfg.update(json.load(f))
-                log.info(f"✅ Loaded config from {path}")
+                data = json.load(f)
         except Exception as e:
             log.warning(f"⚠️ Failed reading {path}: {e}")
-    else:
-        log.warning(f"⚠️ Using default configuration")
-    return cfg
\ No newline at end of file
+            return cfg
+
+        # Start from defaults so removed keys fall back; keep the last good
+        # value for keys that fail validation
+        cfg = dict(DEFAULTS)
+        for k, v in data.items():
+            error = _validate(k, v)
+            if error:
+                fallback = (previous or DEFAULTS).get(k)
+                log.warning(f"⚠️ Config {k}: {error} — using {fallback!r}")
+                v = fallback
+            cfg[k] = v
+
+        log.info(f"✅ Loaded config from {path}")
+        return cfg
+
+    # -------------------------------------------------------
+    # HOT RELOAD
+    # -------------------------------------------------------
+    def subscribe(self, callback, keys=None, path="config.json"):
+        """Call `callback(changed, cfg)` when any of `keys` (or any key) changes."""
+        ref = weakref.WeakMethod(callback) if hasattr(callback, "__self__") else (lambda: callback)
+        with self._lock:
+            self._subscribers = [s for s in self._subscribers if s[2]() is not None]
+            self._subscribers.append((os.path.abspath(path), set(keys) if keys else None, ref))
+        return callback
+
+    def unsubscribe(self, callback):
+        # == not `is`: every attribute access makes a new bound-method object
+        with self._lock:
+            self._subscribers = [s for s in self._subscribers
+                                 if s[2]() is not None and s[2]() != callback]
+
+    def _notify(self, path, changed, cfg):
+        log.info(f"🔁 Config changed: {', '.join(sorted(changed))}")
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for sub_path, keys, ref in subscribers:
+            callback = ref()
+            if callback is None or sub_path != path:
+                continue
+            relevant = changed if keys is None else {k: v for k, v in changed.items() if k in keys}
+            if not relevant:
+                continue
+            try:
+                callback(relevant, cfg)
+            except Exception as e:
+                log.error(f"Config subscriber failed: {e}")
+
+    def watch(self, interval=2.0):
+        """Poll watched files' mtime in a daemon thread (cheap: one stat per file)."""
+        if self._watching:
+            return
+        self._watching = True
+
+        def loop():
+            while self._watching:
+                time.sleep(interval)
+                with self._lock:
+                    paths = list(self._entries)
+                for path in paths:
+                    self.get(path)
+
+        self._watcher = threading.Thread(target=loop, daemon=True, name="config-watch")
+        self._watcher.start()
+
+    def stop(self):
+        self._watching = False
+
+
+registry = ConfigRegistry()
+
+
+def load_config(path="config.json"):
+    """Process-wide cached config; returns a copy callers may modify."""
+    return dict(registry.get(path))
+
+
+def subscribe(callback, keys=None, path="config.json"):
+    return registry.subscribe(callback, keys, path)
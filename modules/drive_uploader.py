@@ -0,0 +1,427 @@
+"""
+==================================================
+DomiSafe IoT System - Google Drive Uploader (OAuth)
+==================================================
+Works with personal Gmail.
+No service account. No Workspace. 100% free.
+
+First run → Shows a link → Login once → Paste code.
+After that → credentials.json makes everything automatic.
+
+Incremental + parallel:
+- UploadManifest skips files already uploaded (path/size/mtime/hash)
+- Changed files replace their Drive copy instead of duplicating it
+- A bounded thread pool uploads several files at once
+
+Resumable + compressed:
+- Files larger than one chunk use chunked resumable uploads; the
+  session URI is persisted, so a dropped link resumes next time
+- Rotated logs are gzip/zstd-compressed into logs/archive/ first
+"""
+
+import gzip
+import os
+import logging
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+try:
+    from google.auth.transport.requests import Request
+    from google.oauth2.credentials import Credentials
+    from google_auth_oauthlib.flow import InstalledAppFlow
+    from googleapiclient.discovery import build
+    from googleapiclient.http import MediaFileUpload
+    HAS_GOOGLE = True
+except Exception:
+    HAS_GOOGLE = False
+
+try:
+    import zstandard
+    HAS_ZSTD = True
+except Exception:
+    HAS_ZSTD = False
+
+from modules.config_loader import load_config
+from modules.capture_store import CaptureStore
+from modules.local_db import mark_captures_uploaded
+from modules.upload_manifest import UploadManifest
+
+log = logging.getLogger(__name__)
+
+SCOPES = ["https://www.googleapis.com/auth/drive.file"]
+TOKEN_FILE = "credentials.json"
+
+LOG_DIR = "logs"
+ARCHIVE_DIR = os.path.join(LOG_DIR, "archive")
+CHUNK_UNIT = 256 * 1024          # Drive requires chunk sizes in multiples of 256 KiB
+ARCHIVE_SUFFIXES = {".gz": "application/gzip", ".zst": "application/zstd"}
+
+
+class LocalMedia:
+    """Minimal MediaUpload look-alike for when googleapiclient isn't installed
+    (injected services such as FakeDriveService)."""
+
+    def __init__(self, filename, mimetype="application/octet-stream",
+                 chunksize=100 * 1024 * 1024, resumable=False):
+        self._filename = filename
+        self._mimetype = mimetype
+        self._chunksize = chunksize
+        self._resumable = resumable
+        self._size = os.path.getsize(filename)
+
+    def size(self):
+        return self._size
+
+    def mimetype(self):
+        return self._mimetype
+
+    def chunksize(self):
+        return self._chunksize
+
+    def resumable(self):
+        return self._resumable
+
+    def getbytes(self, begin, length):
+        with open(self._filename, "rb") as f:
+            f.seek(begin)
+            return f.read(length)
+
+
+def compress_file(src, dest_dir=ARCHIVE_DIR, codec="gzip"):
+    """Compress `src` into `dest_dir` (atomic rename); returns the archive path."""
+    if codec == "zstd" and not HAS_ZSTD:
+        codec = "gzip"
+    suffix = ".zst" if codec == "zstd" else ".gz"
+    os.makedirs(dest_dir, exist_ok=True)
+    dest = os.path.join(dest_dir, os.path.basename(src) + suffix)
+    tmp = dest + ".tmp"
+
+    with open(src, "rb") as fin:
+        if codec == "zstd":
+            with open(tmp, "wb") as fout:
+                zstandard.ZstdCompressor(level=10).copy_stream(fin, fout)
+        else:
+            with gzip.open(tmp, "wb", compresslevel=6) as fout:
+                shutil.copyfileobj(fin, fout, 1 << 20)
+
+    os.replace(tmp, dest)
+    return dest
+
+
+class GoogleDriveUploader:
+
+    def __init__(self, config_path="config.json", service_factory=None, capture_store=None):
+        """
+        `service_factory` (optional) returns a Drive-like service, e.g.
+        lambda: FakeDriveService(...) for tests and benchmarks; it skips OAuth.
+        `capture_store` (optional) shares an existing CaptureStore.
+        """
+        self.config_path = config_path
+        self.config = load_config(config_path)
+        self.enabled = self.config.get("google_drive_enabled", False)
+        self.log_folder_id = self.config.get("google_drive_log_folder_id", "")
+        self.image_folder_id = self.config.get("google_drive_image_folder_id", "")
+        self.workers = max(1, int(self.config.get("google_drive_upload_workers", 4)))
+        chunk_kb = int(self.config.get("google_drive_chunk_kb", 1024))
+        self.chunk_size = max(CHUNK_UNIT, (chunk_kb * 1024) // CHUNK_UNIT * CHUNK_UNIT)
+        self.max_retries = int(self.config.get("google_drive_max_retries", 5))
+        self.compression = self.config.get("log_compression", "gzip")
+        self.manifest = UploadManifest(self.config.get("upload_manifest_path", "upload_manifest.db"))
+        self.service_factory = service_factory
+        self._store = capture_store
+        self.creds = None
+        self._local = threading.local()
+        # Set by UploadService: throttle(nbytes, files) blocks for rate caps and
+        # returns False once cancelled; `cancelled` stops work between chunks/files
+        self.throttle = None
+        self.cancelled = threading.Event()
+
+        if service_factory is None:
+            if not HAS_GOOGLE:
+                log.error("❌ Google API client libraries not installed.")
+                self.enabled = False
+            elif not os.path.exists("client_secrets.json"):
+                log.error("❌ Missing client_secrets.json (OAuth).")
+                self.enabled = False
+
+    # ----------------------------------------------------
+    # AUTH — OAuth Desktop (Works with personal Gmail)
+    # ----------------------------------------------------
+    def authenticate(self):
+        if self.service_factory is not None:
+            return True
+
+        creds = None
+
+        # Load existing token
+        if os.path.exists(TOKEN_FILE):
+            creds = Credentials.from_authorized_user_file(TOKEN_FILE, SCOPES)
+
+        # If no token OR invalid token → login flow
+        if not creds or not creds.valid:
+            if creds and creds.expired and creds.refresh_token:
+                creds.refresh(Request())
+                log.info("🔄 Token refreshed")
+            else:
+                # OAuth Desktop mode (console)
+                flow = InstalledAppFlow.from_client_secrets_file(
+                    "client_secrets.json", SCOPES
+                )
+
+                print("\n🔐 LOGIN REQUIRED:")
+                print("1. Copy the link below")
+                print("2. Open in ANY browser")
+                print("3. Login to Google")
+                print("4. Paste the code back here\n")
+
+                creds = flow.run_local_server(port=0)
+
+            # Save new token
+            with open(TOKEN_FILE, "w") as f:
+                f.write(creds.to_json())
+                log.info("💾 Credentials saved")
+
+        self.creds = creds
+        log.info("✅ Google Drive API ready")
+        return True
+
+    @property
+    def service(self):
+        # googleapiclient services (httplib2) are not thread-safe: one per thread
+        svc = getattr(self._local, "service", None)
+        if svc is None:
+            if self.service_factory is not None:
+                svc = self.service_factory()
+            else:
+                svc = build("drive", "v3", credentials=self.creds, cache_discovery=False)
+            self._local.service = svc
+        return svc
+
+    def _media(self, file_path, mime, resumable=False):
+        if HAS_GOOGLE:
+            return MediaFileUpload(file_path, mimetype=mime,
+                                   chunksize=self.chunk_size, resumable=resumable)
+        return LocalMedia(file_path, mimetype=mime,
+                          chunksize=self.chunk_size, resumable=resumable)
+
+    def _request(self, file_path, folder_id, mime, drive_id, resumable):
+        media = self._media(file_path, mime, resumable)
+        if drive_id:
+            return self.service.files().update(
+                fileId=drive_id,
+                media_body=media,
+                fields="id"
+            )
+        metadata = {"name": os.path.basename(file_path), "parents": [folder_id]}
+        return self.service.files().create(
+            body=metadata,
+            media_body=media,
+            fields="id"
+        )
+
+    def _throttle(self, nbytes, files=0):
+        if self.throttle is not None and not self.throttle(nbytes, files):
+            raise InterruptedError("upload cancelled")
+        if self.cancelled.is_set():
+            raise InterruptedError("upload cancelled")
+
+    # ----------------------------------------------------
+    def upload_file(self, file_path, folder_id, mime, drive_id=None):
+        """Upload (or replace, if `drive_id` is known); returns the Drive file id or None."""
+        file_name = os.path.basename(file_path)
+
+        try:
+            size = os.path.getsize(file_path)
+            if size > self.chunk_size:
+                result = self._upload_resumable(file_path, folder_id, mime, drive_id)
+            else:
+                self._throttle(size, files=1)
+                result = self._request(file_path, folder_id, mime, drive_id, False).execute()
+
+            log.info(f"📤 Uploaded: {file_name}")
+            return result.get("id")
+
+        except InterruptedError:
+            log.info(f"⏸️ Upload paused: {file_name}")
+            return None
+        except Exception as e:
+            log.error(f"❌ Failed to upload {file_name}: {e}")
+            return None
+
+    def _upload_resumable(self, file_path, folder_id, mime, drive_id):
+        request = self._request(file_path, folder_id, mime, drive_id, True)
+        response = None
+        session = self.manifest.get_session(file_path)
+        if session is not None:
+            offset, response = self._session_status(request, session, os.path.getsize(file_path))
+            if offset is None and response is None:
+                log.info(f"Upload session expired, restarting: {os.path.basename(file_path)}")
+                self.manifest.clear_session(file_path)
+                session = None
+            elif response is None:
+                request.resumable_uri = session
+                request.resumable_progress = offset
+                log.info(f"⏯️ Resuming upload at {offset} bytes: {os.path.basename(file_path)}")
+
+        failures = 0
+        files = 1
+        while response is None:
+            self._throttle(self.chunk_size, files)
+            files = 0
+            try:
+                status, response = request.next_chunk(num_retries=2)
+            except Exception:
+                failures += 1
+                if failures > self.max_retries:
+                    raise          # session stays saved for the next run
+                if self.cancelled.wait(min(2 ** failures, 30)):
+                    raise InterruptedError("upload cancelled")
+                continue
+
+            if request.resumable_uri and request.resumable_uri != session:
+                session = request.resumable_uri
+                self.manifest.save_session(file_path, session)
+            if status:
+                log.debug(f"{os.path.basename(file_path)}: {status.progress():.0%}")
+
+        self.manifest.clear_session(file_path)
+        return response
+
+    def _session_status(self, request, session, size):
+        """
+        Ask Drive how much of a saved session it holds (an empty PUT with
+        `Content-Range: bytes */size`). Returns (offset, None) to carry on,
+        (None, response) if the upload already finished, or (None, None)
+        when the session has expired or is unknown.
+        """
+        resp, content = request.http.request(
+            session, "PUT", headers={"Content-Range": f"bytes */{size}", "Content-Length": "0"})
+        if resp.status in (200, 201):
+            return None, request.postproc(resp, content)
+        if resp.status != 308:
+            return None, None
+        # "bytes=0-N" is the last byte stored; no Range header means none yet
+        received = resp.get("range")
+        return (int(received.rsplit("-", 1)[1]) + 1 if received else 0), None
+
+    def _upload_many(self, jobs):
+        """jobs: [(path, folder_id, mime, drive_id, on_done)] → number uploaded."""
+        if not jobs:
+            return 0
+
+        def run(job):
+            if self.cancelled.is_set():
+                return False
+            path, folder_id, mime, drive_id, on_done = job
+            file_id = self.upload_file(path, folder_id, mime, drive_id)
+            if file_id:
+                on_done(file_id)
+                return True
+            return False
+
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(jobs)),
+                                thread_name_prefix="drive-upload") as pool:
+            return sum(pool.map(run, jobs))
+
+    # ----------------------------------------------------
+    def _log_files(self):
+        """(active, rotated): the newest *.log is the one being written to."""
+        log_dir = Path(LOG_DIR)
+        if not log_dir.is_dir():
+            return None, []
+        candidates = [p for p in log_dir.iterdir()
+                      if p.is_file() and (p.suffix == ".log" or ".log." in p.name)
+                      and p.suffix not in ARCHIVE_SUFFIXES and not p.name.endswith(".tmp")]
+        active = max((p for p in candidates if p.suffix == ".log"),
+                     key=lambda p: p.stat().st_mtime, default=None)
+        return active, [p for p in candidates if p != active]
+
+    def archive_rotated_logs(self):
+        """Compress every log except the active (newest *.log) one into logs/archive/."""
+        archived = []
+        if self.compression in ("none", None, False):
+            return archived
+        for p in self._log_files()[1]:
+            try:
+                archived.append(compress_file(str(p), ARCHIVE_DIR, self.compression))
+                os.remove(p)
+            except Exception as e:
+                log.warning(f"Could not compress {p}: {e}")
+        if archived:
+            log.info(f"🗜️ Compressed {len(archived)} rotated log(s)")
+        return archived
+
+    def upload_logs(self, include_active=True):
+        """`include_active=False` skips the log still being written (it changes every cycle)."""
+        self.archive_rotated_logs()
+
+        # Rotated logs left uncompressed (codec "none", or compression failed)
+        # go up as plain text: domisafe.log.<timestamp> has no .log suffix
+        active, rotated = self._log_files()
+        logs = sorted(rotated)
+        if include_active and active is not None:
+            logs.append(active)
+        logs += sorted(p for p in Path(ARCHIVE_DIR).glob("*") if p.suffix in ARCHIVE_SUFFIXES)
+        if not logs:
+            log.debug("📭 No logs found")
+            return 0
+
+        pending = self.manifest.pending(str(f) for f in logs)
+        if not pending:
+            log.debug("📭 Logs already up to date")
+            return 0
+
+        def done(path, sha):
+            st = os.stat(path)
+            return lambda file_id: self.manifest.record(path, file_id, sha, st)
+
+        jobs = [(path, self.log_folder_id,
+                 ARCHIVE_SUFFIXES.get(os.path.splitext(path)[1], "text/plain"),
+                 drive_id, done(path, sha))
+                for path, drive_id, sha in pending]
+        return self._upload_many(jobs)
+
+    # ----------------------------------------------------
+    @property
+    def store(self):
+        """CaptureStore, built on first use and kept (it scans captures/ and
+        subscribes to config when created)."""
+        if self._store is None:
+            self._store = CaptureStore(config_path=self.config_path)
+        return self._store
+
+    def upload_images(self):
+        # Pending captures come from the CaptureStore index, not a directory scan
+        store = self.store
+        images = store.list(uploaded=False)
+
+        if not images:
+            log.debug("📭 No images found")
+            return 0
+
+        jobs = []
+        for row in images:
+            path = store.abspath(row[3])
+            if not os.path.exists(path):
+                continue
+            mime = "image/png" if path.lower().endswith(".png") else "image/jpeg"
+            jobs.append((path, self.image_folder_id, mime, None,
+                         lambda file_id, cid=row[0]: mark_captures_uploaded([cid])))
+
+        return self._upload_many(jobs)
+
+    # ----------------------------------------------------
+    def upload_all(self):
+        if not self.enabled:
+            print("⚠️ Upload disabled in config.json")
+            return False
+
+        if not self.authenticate():
+            return False
+
+        total = self.upload_logs() + self.upload_images()
+        print(f"\n🎉 Upload complete: {total} file(s)")
+        return True
@@ -1,6 +1,22 @@
-import logging, random
+"""
+============================================
+DomiSafe IoT System - Environment Monitor
+============================================
+A background sampler owns the DHT11:
+- Reads at the sensor's safe rate (>= 2s between reads)
+- Retries failed reads with exponential backoff
+- Median filter + outlier rejection over a small window
+- read() returns the latest validated reading instantly (never blocks)
+
+No synthetic values unless "env_simulate" is set, and then every
+reading is flagged "simulated": True.
+"""
+
+import logging, random, statistics, threading, time
+from collections import deque
 from datetime import datetime
-from modules.config_loader import load_config
+from modules.config_loader import load_config, subscribe
+from modules import metrics
 
 try:
     import adafruit_dht, board
@@ -10,32 +26,175 @@ except Exception:
 
 log = logging.getLogger(__name__)
 
+MIN_SAMPLE_INTERVAL = 2.0      # DHT11 needs ~1-2s between conversions
+TEMP_RANGE = (-20.0, 60.0)
+HUM_RANGE = (0.0, 100.0)
+MAX_JUMP = {"temperature": 5.0, "humidity": 15.0}
+
 class EnvironmentMonitor:
-    def __init__(self, cfg_path="config.json"):
+    def __init__(self, cfg_path="config.json", sensor=None):
         cfg = load_config(cfg_path)
         self.pin = int(cfg["DHT_PIN"])
-        self.sensor = None
-        if HAS_DHT:
+        self.sample_interval = max(float(cfg.get("dht_sample_interval", 2.0)), MIN_SAMPLE_INTERVAL)
+        self.max_backoff = float(cfg["dht_max_backoff"])
+        self.stale_after = float(cfg.get("dht_stale_after", 60))
+        self.simulate = cfg.get("env_simulate", False)
+
+        self.window = deque(maxlen=int(cfg.get("dht_filter_window", 5)))
+        self.latest = None
+        self.lock = threading.Lock()
+        self.ready = threading.Event()
+        self.running = False
+        self.thread = None
+
+        # Stats
+        self.read_errors = 0
+        self.outliers = 0
+        self._rejected_in_row = 0
+        metrics.registry.gauge("dht_read_errors", "Failed DHT reads since start", func=lambda: self.read_errors)
+        metrics.registry.gauge("dht_outliers", "Rejected DHT samples since start", func=lambda: self.outliers)
+
+        self.sensor = sensor
+        if self.sensor is None and cfg.get("hardware_sim"):
+            from modules.fake_hardware import FakeDHT
+            self.sensor = FakeDHT()
+            log.info("🧪 Using SIMULATED DHT sensor")
+        if self.sensor is None and HAS_DHT:
             try:
                 self.sensor = adafruit_dht.DHT11(getattr(board, f"D{self.pin}"))
             except Exception as e:
                 log.warning(f"DHT init failed: {e}")
 
-    def read(self):
-        temp, hum = None, None
-        if self.sensor:
+        if self.sensor is None:
+            if self.simulate:
+                log.warning("🧪 No DHT sensor — SIMULATED environment readings enabled")
+            else:
+                log.warning("⚠️ No DHT sensor — environment readings unavailable")
+
+        subscribe(self._on_config, ["dht_sample_interval", "dht_stale_after", "dht_max_backoff"], cfg_path)
+        self.start()
+
+    def _on_config(self, changed, cfg):
+        if "dht_sample_interval" in changed:
+            self.sample_interval = max(float(changed["dht_sample_interval"]), MIN_SAMPLE_INTERVAL)
+        if "dht_stale_after" in changed:
+            self.stale_after = float(changed["dht_stale_after"])
+        if "dht_max_backoff" in changed:
+            self.max_backoff = float(changed["dht_max_backoff"])
+
+    # -------------------------------------------------------
+    # LIFECYCLE
+    # -------------------------------------------------------
+    def start(self):
+        if self.running:
+            return
+        if self.sensor is None and not self.simulate:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._sample_loop, daemon=True)
+        self.thread.start()
+        log.info(f"🌡️ DHT sampler started (every {self.sample_interval}s)")
+
+    def stop(self):
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=self.max_backoff + 1)
+        if self.sensor is not None and hasattr(self.sensor, "exit"):
             try:
-                temp = float(self.sensor.temperature or 0)
-                hum = float(self.sensor.humidity or 0)
-            except Exception as e:
-                log.warning(f"DHT read error: {e}")
+                self.sensor.exit()
+            except Exception:
+                pass
 
+    # -------------------------------------------------------
+    # CONSUMER API (non-blocking)
+    # -------------------------------------------------------
+    @metrics.timed("environment_read_seconds", "EnvironmentMonitor.read() latency")
+    def read(self, wait=0):
+        """Latest validated reading with its age, or None if none/stale.
+
+        `wait` optionally waits (seconds) for the very first reading; the
+        main loops leave it at 0 so they never block on the sensor.
+        """
+        if wait and not self.ready.is_set():
+            self.ready.wait(wait)
+
+        with self.lock:
+            latest = dict(self.latest) if self.latest else None
+
+        if not latest:
+            return None
+
+        latest["age"] = round(time.monotonic() - latest.pop("_sampled_at"), 2)
+        if latest["age"] > self.stale_after:
+            return None
+        return latest
+
+    # -------------------------------------------------------
+    # SAMPLER THREAD
+    # -------------------------------------------------------
+    def _sample_loop(self):
+        delay = self.sample_interval
+        while self.running:
+            sample = self._read_sensor()
+            if sample is not None:
+                self._accept(*sample)
+                delay = self.sample_interval
+            else:
+                # Back off on read failures, never faster than the sensor allows
+                delay = min(delay * 2, self.max_backoff)
+            self._sleep(delay)
+
+    def _sleep(self, seconds):
+        end = time.monotonic() + seconds
+        while self.running and time.monotonic() < end:
+            time.sleep(min(0.5, end - time.monotonic()))
+
+    def _read_sensor(self):
+        if self.sensor is None:
+            return (round(22 + random.uniform(-2, 2), 1),
+                    round(55 + random.uniform(-10, 10), 1))
+        try:
+            temp = self.sensor.temperature
+            hum = self.sensor.humidity
+        except Exception as e:
+            # DHT11 checksum/timing errors are routine; just retry
+            self.read_errors += 1
+            log.debug(f"DHT read error: {e}")
+            return None
         if temp is None or hum is None:
-            temp = round(22 + random.uniform(-2, 2), 1)
-            hum = round(55 + random.uniform(-10, 10), 1)
-
-        return {
-            "temperature": temp,
-            "humidity": hum,
-            "timestamp": datetime.now().isoformat()
-        }
\ No newline at end of file
+            self.read_errors += 1
+            return None
+        return float(temp), float(hum)
+
+    def _accept(self, temp, hum):
+        if not (TEMP_RANGE[0] <= temp <= TEMP_RANGE[1] and HUM_RANGE[0] <= hum <= HUM_RANGE[1]):
+            self.outliers += 1
+            return False
+
+        if len(self.window) >= 3:
+            med_t = statistics.median(s[0] for s in self.window)
+            med_h = statistics.median(s[1] for s in self.window)
+            if (abs(temp - med_t) > MAX_JUMP["temperature"] or
+                    abs(hum - med_h) > MAX_JUMP["humidity"]):
+                self.outliers += 1
+                self._rejected_in_row += 1
+                # A sustained shift is real (window/heater on, sensor moved) — re-seed
+                if self._rejected_in_row < self.window.maxlen:
+                    return False
+                log.info("🌡️ Sustained change in readings, resetting filter window")
+                self.window.clear()
+
+        self._rejected_in_row = 0
+        self.window.append((temp, hum))
+
+        reading = {
+            "temperature": round(statistics.median(s[0] for s in self.window), 1),
+            "humidity": round(statistics.median(s[1] for s in self.window), 1),
+            "timestamp": datetime.now().isoformat(),
+            "simulated": self.sensor is None,
+            "_sampled_at": time.monotonic()
+        }
+        with self.lock:
+            self.latest = reading
+        self.ready.set()
+        return True
@@ -0,0 +1,106 @@
+"""
+============================================
+DomiSafe IoT System - History Export
+============================================
+Turns batches of rows (as yielded by CloudDB.stream_rows) into
+chunked CSV or Parquet bytes, one batch in memory at a time:
+
+- CSV: header, then one chunk of lines per batch
+- Parquet: one row group per batch, written to a sink that is
+  drained after every group (needs pyarrow; HAS_PARQUET)
+
+    for chunk in csv_stream(columns, cloud_db.stream_rows(...)): ...
+"""
+
+import csv
+import io
+import logging
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAS_PARQUET = True
+except Exception:
+    HAS_PARQUET = False
+
+log = logging.getLogger(__name__)
+
+FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+# (column, arrow type) per export kind; timestamp first
+EXPORT_COLUMNS = {
+    "environment": [("timestamp", "timestamp"), ("temperature", "float"), ("humidity", "float")],
+    "motion": [("timestamp", "timestamp"), ("motion", "int"), ("image_name", "string")],
+}
+
+
+def csv_stream(columns, batches):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(columns)
+    for batch in batches:
+        writer.writerows(batch)
+        yield buf.getvalue().encode()
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode()
+
+
+class _DrainSink(io.RawIOBase):
+    """Write-only file object whose buffered bytes are handed out by drain()."""
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self.parts.append(bytes(b))
+        self.position += len(b)
+        return len(b)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b"".join(self.parts)
+        self.parts = []
+        return data
+
+
+def _arrow_schema(spec):
+    types = {"timestamp": pa.timestamp("ms"), "float": pa.float64(),
+             "int": pa.int32(), "string": pa.string()}
+    return pa.schema([(name, types[kind]) for name, kind in spec])
+
+
+def parquet_stream(spec, batches):
+    if not HAS_PARQUET:
+        raise RuntimeError("pyarrow is required for Parquet export")
+    schema = _arrow_schema(spec)
+    sink = _DrainSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        for batch in batches:
+            columns = list(zip(*batch)) if batch else [[] for _ in spec]
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(col, type=field.type) for col, field in zip(columns, schema)],
+                schema=schema,
+            ))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def export_stream(kind, fmt, batches):
+    spec = EXPORT_COLUMNS[kind]
+    if fmt == "parquet":
+        return parquet_stream(spec, batches)
+    return csv_stream([name for name, _ in spec], batches)
@@ -0,0 +1,198 @@
+"""
+============================================
+DomiSafe IoT System - Local MQTT Broker
+============================================
+Minimal in-process MQTT 3.1.1 broker for tests, benchmarks and
+the fleet load generator, so nothing talks to Adafruit IO:
+
+- CONNECT / SUBSCRIBE / UNSUBSCRIBE / PUBLISH (QoS 0-2 in,
+  delivered at QoS 0) / PINGREQ / DISCONNECT
+- `+` and `#` wildcards, retained messages
+- Any username/password is accepted, no TLS
+
+    broker = LocalBroker().start()       # port 0 → random free port
+    ... MQTT_BROKER=127.0.0.1, MQTT_PORT=broker.port, MQTT_TLS=false
+    broker.stop()
+"""
+
+import asyncio
+import logging
+import struct
+import threading
+
+log = logging.getLogger(__name__)
+
+CONNECT, CONNACK, PUBLISH, PUBACK, PUBREC, PUBREL, PUBCOMP = 1, 2, 3, 4, 5, 6, 7
+SUBSCRIBE, SUBACK, UNSUBSCRIBE, UNSUBACK, PINGREQ, PINGRESP, DISCONNECT = 8, 9, 10, 11, 12, 13, 14
+
+
+def topic_matches(pattern, topic):
+    p_parts, t_parts = pattern.split("/"), topic.split("/")
+    for i, p in enumerate(p_parts):
+        if p == "#":
+            return True
+        if i >= len(t_parts) or (p != "+" and p != t_parts[i]):
+            return False
+    return len(p_parts) == len(t_parts)
+
+
+def _packet(ptype, body=b"", flags=0):
+    out = bytearray([(ptype << 4) | flags])
+    n = len(body)
+    while True:
+        byte, n = n % 128, n // 128
+        out.append(byte | (0x80 if n else 0))
+        if not n:
+            break
+    return bytes(out) + body
+
+
+def _string(data, pos):
+    (n,) = struct.unpack_from("!H", data, pos)
+    return data[pos + 2:pos + 2 + n].decode(), pos + 2 + n
+
+
+class _Session:
+    def __init__(self, writer):
+        self.writer = writer
+        self.client_id = None
+        self.subscriptions = set()
+
+
+class LocalBroker:
+    def __init__(self, host="127.0.0.1", port=0):
+        self.host = host
+        self.port = port
+        self.sessions = set()
+        self.retained = {}
+        self.messages_in = 0
+        self.messages_out = 0
+        self.loop = None
+        self.server = None
+        self.thread = None
+        self._ready = threading.Event()
+
+    # -------------------------------------------------------
+    # LIFECYCLE
+    # -------------------------------------------------------
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="mqtt-broker", daemon=True)
+        self.thread.start()
+        if not self._ready.wait(5):
+            raise RuntimeError("Local MQTT broker failed to start")
+        return self
+
+    def stop(self):
+        if self.loop and self.server:
+            self.loop.call_soon_threadsafe(self.server.close)
+            self.loop.call_soon_threadsafe(self.loop.stop)
+        if self.thread:
+            self.thread.join(timeout=5)
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.server = self.loop.run_until_complete(
+            asyncio.start_server(self._client, self.host, self.port)
+        )
+        self.port = self.server.sockets[0].getsockname()[1]
+        log.info(f"🧪 Local MQTT broker on {self.host}:{self.port}")
+        self._ready.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            for s in list(self.sessions):
+                s.writer.close()
+            self.loop.close()
+
+    # -------------------------------------------------------
+    # CLIENT HANDLING
+    # -------------------------------------------------------
+    async def _read_packet(self, reader):
+        header = await reader.readexactly(1)
+        length, mult = 0, 1
+        while True:
+            byte = (await reader.readexactly(1))[0]
+            length += (byte & 0x7F) * mult
+            if not byte & 0x80:
+                break
+            mult *= 128
+        body = await reader.readexactly(length) if length else b""
+        return header[0] >> 4, header[0] & 0x0F, body
+
+    async def _client(self, reader, writer):
+        session = _Session(writer)
+        self.sessions.add(session)
+        try:
+            while True:
+                ptype, flags, body = await self._read_packet(reader)
+                if ptype == DISCONNECT:
+                    break
+                self._handle(session, ptype, flags, body)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.sessions.discard(session)
+            writer.close()
+
+    def _handle(self, session, ptype, flags, body):
+        w = session.writer
+        if ptype == CONNECT:
+            _, pos = _string(body, 0)               # protocol name
+            pos += 4                                # level, flags, keepalive
+            session.client_id, _ = _string(body, pos)
+            w.write(_packet(CONNACK, b"\x00\x00"))
+
+        elif ptype == PUBLISH:
+            qos, retain = (flags >> 1) & 3, flags & 1
+            topic, pos = _string(body, 0)
+            if qos:
+                pid = body[pos:pos + 2]
+                pos += 2
+                w.write(_packet(PUBACK if qos == 1 else PUBREC, pid))
+            payload = body[pos:]
+            self.messages_in += 1
+            if retain:
+                if payload:
+                    self.retained[topic] = payload
+                else:
+                    self.retained.pop(topic, None)
+            self._route(topic, payload)
+
+        elif ptype == PUBREL:
+            w.write(_packet(PUBCOMP, body[:2]))
+
+        elif ptype == SUBSCRIBE:
+            pid, pos, granted, new = body[:2], 2, bytearray(), []
+            while pos < len(body):
+                pattern, pos = _string(body, pos)
+                pos += 1                            # requested QoS
+                session.subscriptions.add(pattern)
+                granted.append(0)
+                new.append(pattern)
+            w.write(_packet(SUBACK, pid + bytes(granted)))
+            for topic, payload in self.retained.items():
+                if any(topic_matches(p, topic) for p in new):
+                    self._send(session, topic, payload, retain=True)
+
+        elif ptype == UNSUBSCRIBE:
+            pid, pos = body[:2], 2
+            while pos < len(body):
+                pattern, pos = _string(body, pos)
+                session.subscriptions.discard(pattern)
+            w.write(_packet(UNSUBACK, pid))
+
+        elif ptype == PINGREQ:
+            w.write(_packet(PINGRESP))
+
+    def _route(self, topic, payload):
+        for s in list(self.sessions):
+            if any(topic_matches(p, topic) for p in s.subscriptions):
+                self._send(s, topic, payload)
+
+    def _send(self, session, topic, payload, retain=False):
+        t = topic.encode()
+        session.writer.write(_packet(PUBLISH, struct.pack("!H", len(t)) + t + payload,
+                                     flags=1 if retain else 0))
+        self.messages_out += 1
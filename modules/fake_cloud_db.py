@@ -0,0 +1,146 @@
+"""
+============================================
+DomiSafe IoT System - Local Cloud DB Stand-in
+============================================
+CloudDB backed by SQLite instead of Neon, for tests, benchmarks
+and the fleet load generator. The same SQL runs through a thin
+psycopg-style shim (%s placeholders, `with conn.cursor()`), so
+SyncService and the web queries exercise their real code paths.
+
+    cloud = LocalCloudDB(":memory:")     # or a file path
+    SyncService(cloud_db=cloud)
+
+For a real local Postgres, use CloudDB(db_url="postgresql://...").
+"""
+
+import re
+import sqlite3
+import threading
+from datetime import datetime
+
+from modules.cloud_db import CloudDB
+
+_REWRITES = [
+    (re.compile(r"\bSERIAL( PRIMARY KEY)?\b", re.I), "INTEGER PRIMARY KEY AUTOINCREMENT"),
+    (re.compile(r"\s*PARTITION BY RANGE \(\w+\)", re.I), ""),
+    (re.compile(r"%s"), "?"),
+]
+
+sqlite3.register_converter("TIMESTAMP", lambda b: datetime.fromisoformat(b.decode()))
+
+
+def translate(sql):
+    for pattern, repl in _REWRITES:
+        sql = pattern.sub(repl, sql)
+    return sql
+
+
+class _Cursor:
+    def __init__(self, conn, lock):
+        self._cur = conn.cursor()
+        self._lock = lock
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._cur.close()
+        return False
+
+    def execute(self, sql, params=()):
+        with self._lock:
+            self._cur.execute(translate(sql), params)
+        return self
+
+    def executemany(self, sql, seq):
+        with self._lock:
+            self._cur.executemany(translate(sql), seq)
+        return self
+
+    def fetchone(self):
+        return self._cur.fetchone()
+
+    def fetchall(self):
+        return self._cur.fetchall()
+
+    def fetchmany(self, size=None):
+        return self._cur.fetchmany(size or self._cur.arraysize)
+
+    @property
+    def rowcount(self):
+        return self._cur.rowcount
+
+
+class _Connection:
+    """Just enough of psycopg.Connection for CloudDB."""
+
+    def __init__(self, path):
+        self._conn = sqlite3.connect(path, check_same_thread=False,
+                                     detect_types=sqlite3.PARSE_DECLTYPES)
+        self._lock = threading.RLock()
+        self.closed = False
+
+    def cursor(self, *args, **kwargs):
+        return _Cursor(self._conn, self._lock)
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def commit(self):
+        with self._lock:
+            self._conn.commit()
+
+    def rollback(self):
+        with self._lock:
+            self._conn.rollback()
+
+    def close(self):
+        self.closed = True
+        self._conn.close()
+
+
+class LocalCloudDB(CloudDB):
+    # SQLite has no declarative partitioning: plain tables, retention is a no-op
+    partitioned = False
+
+    def __init__(self, path=":memory:", config_path="config.json"):
+        super().__init__(config_path, db_url=path)
+        self._shared = None
+        self._listeners = []
+
+    def connect(self):
+        # One connection for the object's lifetime (":memory:" must not be reopened)
+        if self._shared is None:
+            self._shared = _Connection(self.conn_string)
+        self.conn = self._shared
+        self._init_tables()
+        return True
+
+    def after_fork(self):
+        # sqlite3 handles must not cross fork(); file databases reopen on next use
+        super().after_fork()
+        self._shared = None
+
+    # No LISTEN/NOTIFY in SQLite: listeners on this object are called directly
+    def notify_synced(self, device_ids):
+        for callback in list(self._listeners):
+            for device in sorted(device_ids):
+                callback(device)
+
+    def listen(self, callback, channel=None, stop=None):
+        """Registers and returns immediately (unlike CloudDB.listen)."""
+        self._listeners.append(callback)
+
+    def _export_connection(self):
+        if self._shared is None:
+            self.connect()
+        return self._shared
+
+    def close(self):
+        if self._shared is not None:
+            self._shared.close()
+        self._shared = self.conn = None
+
+    def count(self, table):
+        with self._shared.cursor() as cur:
+            return cur.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
@@ -0,0 +1,173 @@
+"""
+============================================
+DomiSafe IoT System - Local Fake Drive
+============================================
+Stand-in for the Drive v3 `files()` resource used by
+GoogleDriveUploader, storing uploads in a local directory.
+Optional per-request latency and bandwidth limit make it
+useful for throughput benchmarks without a Google account.
+"""
+
+import os
+import threading
+import time
+import uuid
+
+from modules.drive_uploader import LocalMedia    # noqa: F401 (still importable from here)
+
+
+class _Progress:
+    def __init__(self, done, total):
+        self.resumable_progress = done
+        self.total_size = total
+
+    def progress(self):
+        return self.resumable_progress / self.total_size if self.total_size else 1.0
+
+
+class _Response(dict):
+    """httplib2.Response look-alike: lower-case headers plus `status`."""
+
+    def __init__(self, status, headers=()):
+        super().__init__(headers)
+        self.status = status
+
+
+class _Http:
+    """Answers the empty-PUT status query for a resumable session."""
+
+    def __init__(self, service):
+        self.service = service
+
+    def request(self, uri, method="GET", body=None, headers=None):
+        try:
+            size = self.service._session_size(uri)
+        except ConnectionError:
+            return _Response(404), b""
+        return _Response(308, {"range": f"bytes=0-{size - 1}"} if size else {}), b""
+
+
+class _Request:
+    def __init__(self, service, file_id, body, media):
+        self.service = service
+        self.file_id = file_id
+        self.body = body or {}
+        self.media = media
+        self.http = _Http(service)
+        # Same attribute names as googleapiclient's HttpRequest
+        self.resumable_uri = None
+        self.resumable_progress = 0
+        self._in_error_state = False
+
+    def execute(self):
+        return self.service._store(self.file_id, self.body, self.media.getbytes(0, self.media.size())
+                                   if self.media else b"")
+
+    def next_chunk(self, num_retries=0):
+        svc = self.service
+        if self.resumable_uri is None:
+            self.resumable_uri = svc._open_session()
+        elif self._in_error_state:
+            # After a failed chunk, ask the "server" how much it already has
+            self.resumable_progress = svc._session_size(self.resumable_uri)
+            self._in_error_state = False
+
+        chunk = self.media.getbytes(self.resumable_progress, self.media.chunksize())
+        try:
+            svc._append(self.resumable_uri, chunk)
+        except ConnectionError:
+            self._in_error_state = True
+            raise
+        self.resumable_progress += len(chunk)
+
+        if self.resumable_progress >= self.media.size():
+            data = svc._close_session(self.resumable_uri)
+            return None, svc._store(self.file_id, self.body, data, streamed=True)
+        return _Progress(self.resumable_progress, self.media.size()), None
+
+
+class _Files:
+    def __init__(self, service):
+        self.service = service
+
+    def create(self, body=None, media_body=None, fields=None):
+        return _Request(self.service, None, body, media_body)
+
+    def update(self, fileId=None, body=None, media_body=None, fields=None):
+        return _Request(self.service, fileId, body, media_body)
+
+
+class FakeDriveService:
+    def __init__(self, root="fake_drive", latency=0.0, bandwidth=None):
+        """`latency` seconds per request; `bandwidth` bytes/s per request (None = unlimited)."""
+        self.root = root
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.lock = threading.Lock()
+        self.files_by_id = {}
+        self.requests = 0
+        self.bytes_received = 0
+        self.sessions = {}
+        self.fail_after_chunks = None   # simulate a dropped link after N chunks
+        os.makedirs(self.root, exist_ok=True)
+
+    def files(self):
+        return _Files(self)
+
+    def _delay(self, nbytes):
+        delay = self.latency
+        if self.bandwidth:
+            delay += nbytes / self.bandwidth
+        if delay:
+            time.sleep(delay)
+
+    # -------------------------------------------------------
+    # RESUMABLE SESSIONS
+    # -------------------------------------------------------
+    def _open_session(self):
+        self._delay(0)
+        with self.lock:
+            uri = f"fake://upload/{uuid.uuid4().hex}"
+            self.sessions[uri] = bytearray()
+            return uri
+
+    def _session_size(self, uri):
+        with self.lock:
+            if uri not in self.sessions:
+                raise ConnectionError(f"Unknown upload session {uri}")
+            return len(self.sessions[uri])
+
+    def _append(self, uri, chunk):
+        if self.fail_after_chunks is not None:
+            if self.fail_after_chunks <= 0:
+                raise ConnectionError("Simulated connection drop")
+            self.fail_after_chunks -= 1
+        self._delay(len(chunk))
+        with self.lock:
+            self.sessions[uri].extend(chunk)
+            self.bytes_received += len(chunk)
+
+    def _close_session(self, uri):
+        with self.lock:
+            return bytes(self.sessions.pop(uri))
+
+    # -------------------------------------------------------
+    def _store(self, file_id, body, data, streamed=False):
+        # Streamed (resumable) uploads were already delayed/counted per chunk
+        if not streamed:
+            self._delay(len(data))
+
+        with self.lock:
+            if file_id is None:
+                file_id = uuid.uuid4().hex
+            meta = self.files_by_id.get(file_id, {})
+            meta.update(body)
+            meta["size"] = len(data)
+            self.files_by_id[file_id] = meta
+            self.requests += 1
+            if not streamed:
+                self.bytes_received += len(data)
+
+        with open(os.path.join(self.root, file_id), "wb") as f:
+            f.write(data)
+        return {"id": file_id}
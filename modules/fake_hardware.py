@@ -0,0 +1,154 @@
+"""
+============================================
+DomiSafe IoT System - Simulated Hardware
+============================================
+Stand-ins for the gpiozero devices, the DHT11 and the Pi camera,
+with the same attributes the real drivers expose:
+
+- FakeOutput       → LED / Buzzer / OutputDevice (on, off, value)
+- FakeMotionSensor → MotionSensor (motion_detected), scriptable
+- FakeDHT          → adafruit_dht.DHT11 (temperature, humidity, exit)
+- FakeCamera       → Picamera2 (start, capture_array)
+
+Enabled with "hardware_sim": true in config.json, or passed in
+directly (SecuritySystem(hardware=...), EnvironmentMonitor(sensor=...),
+CameraHandler(camera=...)) by tests, benchmarks and the load generator.
+"""
+
+import random
+import threading
+import time
+from collections import deque
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except Exception:
+    HAS_NUMPY = False
+
+
+class FakeOutput:
+    def __init__(self, name="output"):
+        self.name = name
+        self.value = 0
+        self.history = deque(maxlen=1000)    # (monotonic time, value)
+
+    def on(self):
+        self._set(1)
+
+    def off(self):
+        self._set(0)
+
+    def _set(self, value):
+        if value != self.value:
+            self.history.append((time.monotonic(), value))
+        self.value = value
+
+    @property
+    def is_active(self):
+        return bool(self.value)
+
+
+class FakeMotionSensor:
+    """
+    Motion is True while a trigger() is active, or randomly with
+    probability `rate` per read (for free-running simulations).
+    """
+
+    def __init__(self, rate=0.0, seed=None):
+        self.rate = rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self._until = 0.0
+        self._pending = 0
+        self.triggered_at = None
+
+    def trigger(self, duration=0.0):
+        """Report motion on the next read (and for `duration` seconds)."""
+        with self.lock:
+            self._pending += 1
+            self._until = max(self._until, time.monotonic() + duration)
+            self.triggered_at = time.perf_counter()
+
+    def clear(self):
+        with self.lock:
+            self._pending = 0
+            self._until = 0.0
+
+    @property
+    def motion_detected(self):
+        with self.lock:
+            if self._pending:
+                self._pending -= 1
+                return True
+            if time.monotonic() < self._until:
+                return True
+        return self.rate > 0 and self.rng.random() < self.rate
+
+
+class FakeDHT:
+    """Slowly drifting readings; `fail_rate` of reads raise like a real DHT11."""
+
+    def __init__(self, temperature=22.0, humidity=55.0, fail_rate=0.0, seed=None):
+        self.rng = random.Random(seed)
+        self._temperature = temperature
+        self._humidity = humidity
+        self.fail_rate = fail_rate
+        self.reads = 0
+
+    def _maybe_fail(self):
+        self.reads += 1
+        if self.fail_rate and self.rng.random() < self.fail_rate:
+            raise RuntimeError("Checksum did not validate. Try again.")
+
+    @property
+    def temperature(self):
+        self._maybe_fail()
+        self._temperature += self.rng.uniform(-0.2, 0.2)
+        return round(self._temperature, 1)
+
+    @property
+    def humidity(self):
+        self._humidity = min(100.0, max(0.0, self._humidity + self.rng.uniform(-0.5, 0.5)))
+        return round(self._humidity, 1)
+
+    def exit(self):
+        pass
+
+
+class FakeCamera:
+    """Returns synthetic BGR frames (noise + a moving block) of `size`."""
+
+    def __init__(self, size=(640, 480), seed=None):
+        if not HAS_NUMPY:
+            raise RuntimeError("numpy is required for FakeCamera")
+        self.size = size
+        self.rng = np.random.default_rng(seed)
+        self.frames = 0
+        self.started = False
+
+    def start(self):
+        self.started = True
+
+    def stop(self):
+        self.started = False
+
+    def capture_array(self):
+        w, h = self.size
+        frame = self.rng.integers(0, 40, (h, w, 3), dtype=np.uint8)
+        x = (self.frames * 16) % max(1, w - 64)
+        frame[h // 3:h // 3 + 64, x:x + 64] = 200
+        self.frames += 1
+        return frame
+
+
+class FakeHardware:
+    """One simulated node: the four GPIO devices, DHT and camera."""
+
+    def __init__(self, motion_rate=0.0, dht_fail_rate=0.0, camera=True, seed=None):
+        self.led = FakeOutput("led")
+        self.buzzer = FakeOutput("buzzer")
+        self.motor = FakeOutput("motor")
+        self.motion = FakeMotionSensor(motion_rate, seed)
+        self.dht = FakeDHT(fail_rate=dht_fail_rate, seed=seed)
+        self.camera = FakeCamera(seed=seed) if camera and HAS_NUMPY else None
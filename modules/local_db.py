@@ -1,59 +1,454 @@
-import sqlite3, os
-from datetime import datetime
+import sqlite3, os, csv, gzip, time
+from datetime import datetime, timedelta
+from modules import metrics
+from modules.tsdb import ChunkStore, CHUNK_SIZE, decode_chunk
 
 DB_PATH = os.path.join(os.path.dirname(__file__), "../iot_data.db")
 
-def init_db():
+# Matches the cloud schema's default; init_db(device_id) sets this node's id
+DEFAULT_DEVICE_ID = "pi_home_security"
+DEVICE_ID = DEFAULT_DEVICE_ID
+
+# maintain(): rows per DELETE transaction, pages per incremental_vacuum step
+MAINTENANCE_BATCH = 500
+VACUUM_STEP_PAGES = 64
+ANALYZE_INTERVAL = 6 * 3600
+ANALYSIS_LIMIT = 1000
+_last_analyze = None
+
+# Synced environment history is moved into Gorilla-compressed chunks (modules/tsdb.py)
+ENV_CHUNKS = "env_chunks"
+ENV_CHUNK_SIZE = CHUNK_SIZE
+
+# callback(table, device_id) after every save_env/save_motion commit, on the
+# writer's thread; SyncService uses it to wake up instead of polling
+_write_listeners = []
+
+# Column order returned by fetch_unsynced (device_id always last)
+SYNC_COLUMNS = {
+    "environment": "id, timestamp, temperature, humidity, device_id",
+    "motion": "id, timestamp, motion, image_name, device_id",
+}
+
+# Timestamps are epoch milliseconds (INTEGER); to_ms()/from_ms() convert at the edges
+TABLE_SQL = {
+    "environment": """
+        CREATE TABLE IF NOT EXISTS {table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp INTEGER,
+            temperature REAL,
+            humidity REAL,
+            synced INTEGER DEFAULT 0,
+            device_id TEXT
+        )
+    """,
+    "motion": """
+        CREATE TABLE IF NOT EXISTS {table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp INTEGER,
+            motion INTEGER,
+            image_name TEXT,
+            synced INTEGER DEFAULT 0,
+            device_id TEXT
+        )
+    """,
+}
+
+def now_ms():
+    return int(time.time() * 1000)
+
+def to_ms(ts):
+    """datetime or ISO string (local time) → epoch ms."""
+    if isinstance(ts, str):
+        ts = datetime.fromisoformat(ts)
+    return int(ts.timestamp() * 1000)
+
+def from_ms(ms):
+    """epoch ms → naive local datetime (what the cloud TIMESTAMP columns hold)."""
+    return datetime.fromtimestamp(ms / 1000)
+
+def _migrate_epoch_ms(c, table):
+    """Rebuild a table that still stores ISO-8601 text timestamps.
+
+    A TEXT column would coerce integers back to text, so the table is copied
+    rather than updated in place (SQLite can't change a column's type).
+    """
+    types = {r[1]: r[2].upper() for r in c.execute(f"PRAGMA table_info({table})")}
+    if types.get("timestamp") == "INTEGER":
+        return
+    cols = [name for name in types if name != "timestamp"]
+    c.execute(f"ALTER TABLE {table} RENAME TO {table}_iso")
+    c.execute(f"DROP INDEX IF EXISTS idx_{table}_timestamp")
+    c.execute(TABLE_SQL[table].format(table=table))
+    # julianday(..., 'utc'): the stored text is local time
+    c.execute(f"""
+        INSERT INTO {table} ({', '.join(cols)}, timestamp)
+        SELECT {', '.join(cols)},
+               CAST(round((julianday(timestamp, 'utc') - 2440587.5) * 86400000) AS INTEGER)
+        FROM {table}_iso
+    """)
+    c.execute(f"DROP TABLE {table}_iso")
+
+def init_db(device_id=None):
+    global DEVICE_ID
+    if device_id:
+        DEVICE_ID = device_id
     with sqlite3.connect(DB_PATH) as conn:
+        # Freed pages are handed back in small steps by compact(); switching
+        # an existing file over takes one full VACUUM, done before any loop runs
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("VACUUM")
         c = conn.cursor()
+        for table in ("environment", "motion"):
+            c.execute(TABLE_SQL[table].format(table=table))
+        # Databases created before device ids existed
+        for table in ("environment", "motion"):
+            cols = [r[1] for r in c.execute(f"PRAGMA table_info({table})")]
+            if "device_id" not in cols:
+                c.execute(f"ALTER TABLE {table} ADD COLUMN device_id TEXT")
+            _migrate_epoch_ms(c, table)
+            c.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_timestamp ON {table} (timestamp)")
         c.execute("""
-            CREATE TABLE IF NOT EXISTS environment (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TEXT,
-                temperature REAL,
-                humidity REAL,
-                synced INTEGER DEFAULT 0
-            )
-        """)
-        c.execute("""
-            CREATE TABLE IF NOT EXISTS motion (
+            CREATE TABLE IF NOT EXISTS captures (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
+                motion_id INTEGER,
                 timestamp TEXT,
-                motion INTEGER,
-                image_name TEXT,
-                synced INTEGER DEFAULT 0
+                path TEXT UNIQUE,
+                thumb_path TEXT,
+                size_bytes INTEGER,
+                uploaded INTEGER DEFAULT 0
             )
         """)
+        c.execute("CREATE INDEX IF NOT EXISTS idx_captures_motion ON captures (motion_id)")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_captures_timestamp ON captures (timestamp)")
+        ChunkStore(conn, ENV_CHUNKS)
         conn.commit()
 
-def save_env(temperature, humidity):
+def add_write_listener(callback):
+    _write_listeners.append(callback)
+
+def remove_write_listener(callback):
+    if callback in _write_listeners:
+        _write_listeners.remove(callback)
+
+def _notify_write(table, device_id):
+    for callback in list(_write_listeners):
+        try:
+            callback(table, device_id)
+        except Exception:
+            pass    # a listener must never fail the write itself
+
+@metrics.timed("local_db_save_env_seconds", "SQLite environment insert")
+def save_env(temperature, humidity, device_id=None):
     with sqlite3.connect(DB_PATH) as conn:
         c = conn.cursor()
         c.execute("""
-            INSERT INTO environment (timestamp, temperature, humidity)
-            VALUES (?, ?, ?)
-        """, (datetime.now().isoformat(), temperature, humidity))
+            INSERT INTO environment (timestamp, temperature, humidity, device_id)
+            VALUES (?, ?, ?, ?)
+        """, (now_ms(), temperature, humidity, device_id or DEVICE_ID))
         conn.commit()
+    _notify_write("environment", device_id or DEVICE_ID)
 
-def save_motion(motion, image_name=None):
+def save_motion(motion, image_name=None, device_id=None):
     with sqlite3.connect(DB_PATH) as conn:
         c = conn.cursor()
         c.execute("""
-            INSERT INTO motion (timestamp, motion, image_name)
-            VALUES (?, ?, ?)
-        """, (datetime.now().isoformat(), motion, image_name))
+            INSERT INTO motion (timestamp, motion, image_name, device_id)
+            VALUES (?, ?, ?, ?)
+        """, (now_ms(), motion, image_name, device_id or DEVICE_ID))
         conn.commit()
+        row_id = c.lastrowid
+    _notify_write("motion", device_id or DEVICE_ID)
+    return row_id
+
+def fetch_unsynced(table, device_id=None, limit=None):
+    """Rows in SYNC_COLUMNS order (timestamp in epoch ms), oldest first; legacy
+    rows without a device id get this node's.
 
-def fetch_unsynced(table):
+    `device_id` limits the result to one device (several nodes sharing a DB file),
+    `limit` to the first that many rows.
+    """
     with sqlite3.connect(DB_PATH) as conn:
         c = conn.cursor()
-        c.execute(f"SELECT * FROM {table} WHERE synced=0")
+        cols = SYNC_COLUMNS[table].replace("device_id", "COALESCE(device_id, ?)")
+        q, params = f"SELECT {cols} FROM {table} WHERE synced=0", [DEVICE_ID]
+        if device_id:
+            q += " AND device_id=?"
+            params.append(device_id)
+        q += " ORDER BY id"
+        if limit:
+            q += f" LIMIT {int(limit)}"
+        c.execute(q, params)
         return c.fetchall()
 
+def count_unsynced(table, device_id=None):
+    q, params = f"SELECT COUNT(*) FROM {table} WHERE synced=0", []
+    if device_id:
+        q += " AND device_id=?"
+        params.append(device_id)
+    with sqlite3.connect(DB_PATH) as conn:
+        return conn.execute(q, params).fetchone()[0]
+
 def mark_synced(table, row_ids):
     if not row_ids: return
     with sqlite3.connect(DB_PATH) as conn:
         c = conn.cursor()
         q = f"UPDATE {table} SET synced=1 WHERE id IN ({','.join('?'*len(row_ids))})"
         c.execute(q, row_ids)
-        conn.commit()
\ No newline at end of file
+        conn.commit()
+
+# ============================================================
+# ENVIRONMENT HISTORY (compressed chunks)
+# ============================================================
+def compress_environment(deadline=None, chunk_size=ENV_CHUNK_SIZE, synced_only=True):
+    """Move synced environment rows into compressed chunks, one whole chunk per transaction.
+
+    A device's last partial chunk stays in the row table until it fills up,
+    so nothing lives only in memory. `synced_only=False` (cloud sync turned
+    off) compresses every full chunk of rows; rows compressed that way are
+    never synced if sync is turned back on later. Returns the number of rows moved.
+    """
+    moved = 0
+    synced = "synced=1" if synced_only else "1=1"
+    with sqlite3.connect(DB_PATH) as conn:
+        store = ChunkStore(conn, ENV_CHUNKS, chunk_size)
+        devices = [r[0] for r in conn.execute(
+            f"SELECT DISTINCT COALESCE(device_id, ?) FROM environment WHERE {synced}", (DEVICE_ID,))]
+        for device in devices:
+            while deadline is None or time.monotonic() < deadline:
+                rows = conn.execute(f"""
+                    SELECT id, timestamp, temperature, humidity FROM environment
+                    WHERE {synced} AND timestamp IS NOT NULL AND COALESCE(device_id, ?)=?
+                    ORDER BY id LIMIT ?
+                """, (DEVICE_ID, device, chunk_size)).fetchall()
+                if len(rows) < chunk_size:
+                    break
+                store.write_chunk(device, [r[1] for r in rows],
+                                  [r[2] for r in rows], [r[3] for r in rows])
+                ids = [r[0] for r in rows]
+                conn.execute(f"DELETE FROM environment WHERE id IN ({','.join('?'*len(ids))})", ids)
+                conn.commit()
+                moved += len(ids)
+    return moved
+
+def read_env(start_ms=None, end_ms=None, device_id=None):
+    """(timestamp_ms, temperature, humidity) with start_ms <= timestamp < end_ms,
+    oldest first, from compressed history and the row table alike."""
+    device = device_id or DEVICE_ID
+    with sqlite3.connect(DB_PATH) as conn:
+        store = ChunkStore(conn, ENV_CHUNKS)
+        out = list(store.scan(device, start_ms, end_ms))
+        q, params = ("SELECT timestamp, temperature, humidity FROM environment "
+                     "WHERE COALESCE(device_id, ?)=?"), [DEVICE_ID, device]
+        if start_ms is not None:
+            q += " AND timestamp >= ?"
+            params.append(start_ms)
+        if end_ms is not None:
+            q += " AND timestamp < ?"
+            params.append(end_ms)
+        out.extend(conn.execute(q + " ORDER BY timestamp", params).fetchall())
+    out.sort(key=lambda r: r[0])
+    return out
+
+def prune_env_chunks(older_than, archive_dir=None, deadline=None):
+    """Drop compressed chunks that end before `older_than` (epoch ms); returns samples removed."""
+    removed = 0
+    with sqlite3.connect(DB_PATH) as conn:
+        store = ChunkStore(conn, ENV_CHUNKS)
+        for chunk_id, device, blob in store.expired(older_than):
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            ts, temps, hums = decode_chunk(blob)
+            if archive_dir:
+                _archive_rows(archive_dir, "environment",
+                              [(None, t, temps[i], hums[i], device) for i, t in enumerate(ts)])
+            store.delete([chunk_id])
+            conn.commit()
+            removed += len(ts)
+    return removed
+
+# ============================================================
+# RETENTION / COMPACTION
+# ============================================================
+def _archive_rows(archive_dir, table, rows):
+    """Append rows to <archive_dir>/<table>-YYYY-MM.csv.gz (one gzip member per batch),
+    timestamps written back out as ISO-8601 local time."""
+    os.makedirs(archive_dir, exist_ok=True)
+    by_month = {}
+    for row in rows:
+        ts = from_ms(row[1]).isoformat(timespec="milliseconds")
+        by_month.setdefault(ts[:7], []).append((row[0], ts, *row[2:]))
+    for month, chunk in by_month.items():
+        path = os.path.join(archive_dir, f"{table}-{month}.csv.gz")
+        header = not os.path.exists(path)
+        with gzip.open(path, "at", newline="") as f:
+            writer = csv.writer(f)
+            if header:
+                writer.writerow(SYNC_COLUMNS[table].split(", "))
+            writer.writerows(chunk)
+
+def prune_synced(table, older_than, archive_dir=None, deadline=None, batch=MAINTENANCE_BATCH):
+    """Delete synced rows older than `older_than` (epoch ms), `batch` rows per transaction.
+
+    Stops at `deadline` (time.monotonic()) so a writer waits at most one batch.
+    Rows are archived before they are deleted: a crash in between repeats them
+    in the archive rather than losing them.
+    """
+    removed = 0
+    with sqlite3.connect(DB_PATH) as conn:
+        while deadline is None or time.monotonic() < deadline:
+            rows = conn.execute(f"""
+                SELECT {SYNC_COLUMNS[table]} FROM {table}
+                WHERE synced=1 AND timestamp < ? ORDER BY id LIMIT ?
+            """, (older_than, batch)).fetchall()
+            if not rows:
+                break
+            if archive_dir:
+                _archive_rows(archive_dir, table, rows)
+            ids = [r[0] for r in rows]
+            conn.execute(f"DELETE FROM {table} WHERE id IN ({','.join('?'*len(ids))})", ids)
+            conn.commit()
+            removed += len(ids)
+            if len(rows) < batch:
+                break
+    return removed
+
+def compact(deadline, step_pages=VACUUM_STEP_PAGES):
+    """Return free pages to the filesystem in incremental_vacuum steps until `deadline`."""
+    freed = 0
+    with sqlite3.connect(DB_PATH) as conn:
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            return 0
+        while time.monotonic() < deadline:
+            free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if not free:
+                break
+            step = min(free, step_pages)
+            conn.execute(f"PRAGMA incremental_vacuum({step})").fetchall()
+            freed += step
+    return freed
+
+def analyze():
+    """Refresh planner statistics, sampling at most ANALYSIS_LIMIT rows per index."""
+    global _last_analyze
+    with sqlite3.connect(DB_PATH) as conn:
+        conn.execute(f"PRAGMA analysis_limit={ANALYSIS_LIMIT}")
+        conn.execute("ANALYZE")
+    _last_analyze = time.monotonic()
+
+@metrics.timed("local_db_maintenance_seconds", "Local retention/compaction pass")
+def maintain(retention_days, archive_dir=None, budget=0.2, chunk_size=ENV_CHUNK_SIZE,
+             sync_enabled=True):
+    """
+    One time-boxed maintenance pass (`budget` seconds, checked between
+    steps): compress synced environment rows into chunks (chunk_size
+    0 = keep them as rows), delete/archive synced rows and chunks older
+    than `retention_days` (0 = keep forever), hand free pages back, and
+    ANALYZE every ANALYZE_INTERVAL or after a prune. Unsynced rows are
+    never deleted; with `sync_enabled=False` nothing will ever sync them,
+    so full chunks of them are compressed too.
+    """
+    deadline = time.monotonic() + budget
+    compressed = 0
+    if chunk_size:
+        compressed = compress_environment(deadline, chunk_size, synced_only=sync_enabled)
+    pruned = 0
+    if retention_days:
+        cutoff = to_ms(datetime.now() - timedelta(days=retention_days))
+        for table in SYNC_COLUMNS:
+            pruned += prune_synced(table, cutoff, archive_dir, deadline)
+        pruned += prune_env_chunks(cutoff, archive_dir, deadline)
+    if pruned:
+        metrics.registry.counter("local_rows_pruned_total",
+                                 "Synced rows removed by local retention").inc(pruned)
+
+    freed = compact(deadline)
+    analyzed = False
+    due = _last_analyze is None or time.monotonic() - _last_analyze >= ANALYZE_INTERVAL
+    if time.monotonic() < deadline and (pruned or compressed or due):
+        analyze()
+        analyzed = True
+    return {"compressed": compressed, "pruned": pruned, "freed_pages": freed, "analyzed": analyzed}
+
+# ============================================================
+# CAPTURE INDEX
+# ============================================================
+def save_capture(path, thumb_path, size_bytes, timestamp=None, motion_id=None):
+    with sqlite3.connect(DB_PATH) as conn:
+        c = conn.cursor()
+        c.execute("""
+            INSERT INTO captures (motion_id, timestamp, path, thumb_path, size_bytes)
+            VALUES (?, ?, ?, ?, ?)
+        """, (motion_id, timestamp or datetime.now().isoformat(), path, thumb_path, size_bytes))
+        conn.commit()
+        return c.lastrowid
+
+def link_capture(capture_id, motion_id):
+    with sqlite3.connect(DB_PATH) as conn:
+        c = conn.cursor()
+        c.execute("UPDATE captures SET motion_id=? WHERE id=?", (motion_id, capture_id))
+        conn.commit()
+
+def fetch_captures(motion_id=None, uploaded=None, before=None, limit=None):
+    """Rows are (id, motion_id, timestamp, path, thumb_path, size_bytes, uploaded), oldest first."""
+    where, params = [], []
+    if motion_id is not None:
+        where.append("motion_id=?")
+        params.append(motion_id)
+    if uploaded is not None:
+        where.append("uploaded=?")
+        params.append(int(uploaded))
+    if before is not None:
+        where.append("timestamp < ?")
+        params.append(before)
+    q = "SELECT * FROM captures"
+    if where:
+        q += " WHERE " + " AND ".join(where)
+    q += " ORDER BY id"
+    if limit:
+        q += f" LIMIT {int(limit)}"
+    with sqlite3.connect(DB_PATH) as conn:
+        c = conn.cursor()
+        c.execute(q, params)
+        return c.fetchall()
+
+def fetch_eviction_candidates(limit=50):
+    """Oldest captures first, already-uploaded ones before pending ones."""
+    with sqlite3.connect(DB_PATH) as conn:
+        c = conn.cursor()
+        c.execute("SELECT * FROM captures ORDER BY uploaded DESC, id LIMIT ?", (limit,))
+        return c.fetchall()
+
+def capture_usage(uploaded=None, before=None):
+    """(count, total bytes), optionally only (not) uploaded / older than `before`."""
+    where, params = [], []
+    if uploaded is not None:
+        where.append("uploaded=?")
+        params.append(int(uploaded))
+    if before is not None:
+        where.append("timestamp < ?")
+        params.append(before)
+    q = "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM captures"
+    if where:
+        q += " WHERE " + " AND ".join(where)
+    with sqlite3.connect(DB_PATH) as conn:
+        c = conn.cursor()
+        c.execute(q, params)
+        return c.fetchone()
+
+def mark_captures_uploaded(capture_ids):
+    if not capture_ids: return
+    with sqlite3.connect(DB_PATH) as conn:
+        c = conn.cursor()
+        q = f"UPDATE captures SET uploaded=1 WHERE id IN ({','.join('?'*len(capture_ids))})"
+        c.execute(q, capture_ids)
+        conn.commit()
+
+def delete_captures(capture_ids):
+    if not capture_ids: return
+    with sqlite3.connect(DB_PATH) as conn:
+        c = conn.cursor()
+        q = f"DELETE FROM captures WHERE id IN ({','.join('?'*len(capture_ids))})"
+        c.execute(q, capture_ids)
+        conn.commit()
@@ -0,0 +1,263 @@
+"""
+============================================
+DomiSafe IoT System - Logging Pipeline
+============================================
+Keeps disk and console I/O off the sensor loops:
+
+- Callers only enqueue (DropQueueHandler, never blocks — when
+  the queue is full the record is dropped and counted)
+- One QueueListener thread writes JSON lines to logs/domisafe.log
+  and human-readable lines to the console
+- The file rotates by size *or* age; rotated files get a
+  timestamp suffix and are compressed/uploaded by the Drive uploader
+- RateLimitFilter caps chatty INFO/DEBUG call sites
+  (e.g. "📤 Sent →") and reports how many were suppressed
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from modules.config_loader import load_config
+
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+# Attributes every LogRecord has; anything else came in via `extra=`
+_STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+_listener = None
+_queue_handler = None
+
+
+# =======================================================
+# FORMATTING
+# =======================================================
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg, thread (+ extras, exc)."""
+
+    def format(self, record):
+        out = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "thread": record.threadName,
+        }
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_ATTRS and not key.startswith("_"):
+                out[key] = value
+        if record.exc_text:
+            out["exc"] = record.exc_text
+        return json.dumps(out, ensure_ascii=False, default=str)
+
+
+# =======================================================
+# FILTERS / HANDLERS
+# =======================================================
+class RateLimitFilter(logging.Filter):
+    """
+    At most `limit` records per call site per `window` seconds, for
+    levels below WARNING. The first record after a window with
+    suppressions carries `suppressed=N` (and a note in the message).
+    """
+
+    def __init__(self, limit=20, window=60.0):
+        super().__init__()
+        self.limit = limit
+        self.window = window
+        self.lock = threading.Lock()
+        self.sites = {}     # (pathname, lineno) -> [window_start, count, suppressed]
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or not self.limit:
+            return True
+
+        key = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self.lock:
+            site = self.sites.get(key)
+            if site is None or now - site[0] >= self.window:
+                suppressed = site[2] if site else 0
+                self.sites[key] = [now, 1, 0]
+            elif site[1] < self.limit:
+                site[1] += 1
+                suppressed = 0
+            else:
+                site[2] += 1
+                return False
+
+        if suppressed:
+            record.suppressed = suppressed
+            record.msg = f"{record.msg} (+{suppressed} similar suppressed)"
+        return True
+
+
+class DropQueueHandler(QueueHandler):
+    """QueueHandler that never blocks the caller: drops when the queue is full."""
+
+    def __init__(self, q):
+        super().__init__(q)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Merge args and render the traceback here, so the listener thread
+        # never touches caller objects; keep exc text separate for JSON
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class DrainingQueueListener(QueueListener):
+    """QueueListener whose stop() waits for room instead of raising queue.Full.
+
+    The stock sentinel uses put_nowait, which fails on a full bounded queue;
+    the listener thread keeps draining, so a blocking put always gets in.
+    """
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
+class SizeTimeRotatingFileHandler(logging.FileHandler):
+    """Rotate at `max_bytes` or every `interval` seconds, whichever comes first.
+
+    Rotated files are renamed to <name>.<YYYY-mm-dd_HH-MM-SS>, so names never
+    repeat (the Drive manifest keys on path); only `backup_count` uncompressed
+    rotations are kept around.
+    """
+
+    def __init__(self, filename, max_bytes=5 * 1024 * 1024, interval=86400, backup_count=10,
+                 encoding="utf-8"):
+        os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+        super().__init__(filename, mode="a", encoding=encoding)
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self.backup_count = backup_count
+        self.opened_at = time.time()
+        if os.path.exists(filename) and os.path.getsize(filename):
+            self.opened_at = os.path.getmtime(filename)
+
+    def should_rollover(self):
+        if self.max_bytes and self.stream and self.stream.tell() >= self.max_bytes:
+            return True
+        return bool(self.interval) and time.time() - self.opened_at >= self.interval
+
+    def do_rollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+
+        stamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        target = f"{self.baseFilename}.{stamp}"
+        n = 1
+        while os.path.exists(target):
+            target = f"{self.baseFilename}.{stamp}-{n}"
+            n += 1
+        if os.path.exists(self.baseFilename):
+            os.replace(self.baseFilename, target)
+        self._prune()
+
+        self.stream = self._open()
+        self.opened_at = time.time()
+
+    def _prune(self):
+        if not self.backup_count:
+            return
+        folder, base = os.path.split(self.baseFilename)
+        rotated = sorted(f for f in os.listdir(folder or ".")
+                         if f.startswith(base + ".") and not f.endswith((".gz", ".zst", ".tmp")))
+        for name in rotated[:-self.backup_count]:
+            try:
+                os.remove(os.path.join(folder, name))
+            except OSError:
+                pass
+
+    def emit(self, record):
+        try:
+            if self.should_rollover():
+                self.do_rollover()
+        except Exception:
+            self.handleError(record)
+        super().emit(record)
+
+
+# =======================================================
+# SETUP
+# =======================================================
+def setup_logging(config_path="config.json", console=True):
+    """Install the queue-based pipeline on the root logger (idempotent)."""
+    global _listener, _queue_handler
+    if _listener is not None:
+        return _listener
+
+    cfg = load_config(config_path)
+    log_file = os.path.join(cfg["log_dir"], "domisafe.log")
+
+    file_handler = SizeTimeRotatingFileHandler(
+        log_file,
+        max_bytes=int(cfg["log_max_mb"] * 1024 * 1024),
+        interval=cfg["log_rotate_hours"] * 3600,
+        backup_count=cfg["log_backup_count"],
+    )
+    file_handler.setFormatter(JsonFormatter() if cfg["log_json"] else logging.Formatter(LOG_FORMAT))
+    handlers = [file_handler]
+    if console:
+        stream = logging.StreamHandler()
+        stream.setFormatter(logging.Formatter(LOG_FORMAT))
+        handlers.append(stream)
+
+    q = queue.Queue(maxsize=cfg["log_queue_size"])
+    queue_handler = DropQueueHandler(q)
+    queue_handler.addFilter(RateLimitFilter(cfg["log_rate_limit"], cfg["log_rate_window"]))
+
+    root = logging.getLogger()
+    for h in list(root.handlers):
+        root.removeHandler(h)
+    root.addHandler(queue_handler)
+    root.setLevel(cfg["log_level"].upper())
+    _queue_handler = queue_handler
+
+    _listener = DrainingQueueListener(q, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+    return _listener
+
+
+def queue_stats():
+    """(queued, dropped) for the metrics registry."""
+    if _queue_handler is None:
+        return 0, 0
+    return _queue_handler.queue.qsize(), _queue_handler.dropped
+
+
+def stop_logging():
+    """Flush everything still queued and close the files."""
+    global _listener, _queue_handler
+    if _listener is None:
+        return
+    listener, _listener = _listener, None
+    logging.getLogger().removeHandler(_queue_handler)
+    listener.stop()
+    if _queue_handler.dropped:
+        # Straight to the file/console handlers: the queue is gone by now
+        listener.handle(logging.LogRecord(
+            __name__, logging.WARNING, __file__, 0,
+            f"⚠️ {_queue_handler.dropped} log record(s) dropped (queue full)", None, None))
+    for h in listener.handlers:
+        h.close()
+    _queue_handler = None
@@ -0,0 +1,280 @@
+"""
+============================================
+DomiSafe IoT System - Metrics Registry
+============================================
+Lightweight in-process metrics for the hot paths:
+
+- Counter / Gauge (value or callback evaluated at scrape time)
+- Histogram: HDR-style log-linear buckets (16 per power of two,
+  ~6% worst-case error), fixed memory, any percentile on demand
+- `timed(name)` decorator / context manager for latencies
+- Prometheus text format via render(); the daemon writes it to a
+  file (node_exporter textfile style) and can serve it on a local
+  port, the Flask app exposes it at /metrics
+"""
+
+import functools
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+log = logging.getLogger(__name__)
+
+SUB_BITS = 4
+SUB_COUNT = 1 << SUB_BITS
+
+# `le` bounds (seconds) exported to Prometheus; percentiles use the full resolution
+EXPORT_BOUNDS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value, quote=True):
+    # Text exposition format: backslash and newline are escaped everywhere,
+    # double quotes only inside label values
+    text = str(value).replace("\\", "\\\\").replace("\n", "\\n")
+    return text.replace('"', '\\"') if quote else text
+
+
+def _labels_text(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+# =======================================================
+# METRIC TYPES
+# =======================================================
+class Counter:
+    kind = "counter"
+
+    def __init__(self):
+        self.value = 0
+        self.lock = threading.Lock()
+
+    def inc(self, n=1):
+        with self.lock:
+            self.value += n
+
+    def samples(self, name, labels):
+        return [(name + "_total" if not name.endswith("_total") else name, labels, self.value)]
+
+
+class Gauge:
+    kind = "gauge"
+
+    def __init__(self, func=None):
+        self.value = 0
+        self.func = func
+
+    def set(self, value):
+        self.value = value
+
+    def samples(self, name, labels):
+        value = self.value
+        if self.func is not None:
+            try:
+                value = self.func()
+            except Exception as e:
+                log.debug(f"Gauge {name} failed: {e}")
+                return []
+        return [(name, labels, value)]
+
+
+class Histogram:
+    """Latencies in seconds, stored as integer microseconds in log-linear buckets."""
+    kind = "histogram"
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _index(us):
+        if us < SUB_COUNT:
+            return us
+        shift = us.bit_length() - SUB_BITS - 1
+        return (shift + 1) * SUB_COUNT + (us >> shift) - SUB_COUNT
+
+    @staticmethod
+    def _upper(index):
+        """Largest value (seconds) that lands in bucket `index`."""
+        if index < SUB_COUNT:
+            return (index + 1) / 1e6
+        shift = index // SUB_COUNT - 1
+        sub = index % SUB_COUNT + SUB_COUNT
+        return ((sub + 1) << shift) / 1e6
+
+    def observe(self, seconds):
+        idx = self._index(max(0, int(seconds * 1e6)))
+        with self.lock:
+            self.counts[idx] = self.counts.get(idx, 0) + 1
+            self.count += 1
+            self.sum += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def percentile(self, q):
+        with self.lock:
+            if not self.count:
+                return 0.0
+            target = q / 100.0 * self.count
+            seen = 0
+            for idx in sorted(self.counts):
+                seen += self.counts[idx]
+                if seen >= target:
+                    return min(self._upper(idx), self.max)
+            return self.max
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "avg": self.sum / self.count if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+    def samples(self, name, labels):
+        with self.lock:
+            buckets = sorted(self.counts.items())
+            total, total_sum = self.count, self.sum
+
+        out, seen, i = [], 0, 0
+        for bound in EXPORT_BOUNDS:
+            while i < len(buckets) and self._upper(buckets[i][0]) <= bound:
+                seen += buckets[i][1]
+                i += 1
+            out.append((name + "_bucket", labels + (("le", bound),), seen))
+        out.append((name + "_bucket", labels + (("le", "+Inf"),), total))
+        out.append((name + "_sum", labels, round(total_sum, 6)))
+        out.append((name + "_count", labels, total))
+        return out
+
+
+# =======================================================
+# REGISTRY
+# =======================================================
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics = {}     # (name, labels) -> metric
+        self.help = {}
+
+    def _get(self, cls, name, help, labels, **kwargs):
+        key = (name, tuple(sorted((labels or {}).items())))
+        metric = self.metrics.get(key)
+        if metric is None:
+            with self.lock:
+                metric = self.metrics.get(key)
+                if metric is None:
+                    metric = cls(**kwargs)
+                    self.metrics[key] = metric
+                    self.help.setdefault(name, (help, cls.kind))
+        return metric
+
+    def counter(self, name, help="", labels=None):
+        return self._get(Counter, name, help, labels)
+
+    def gauge(self, name, help="", labels=None, func=None):
+        gauge = self._get(Gauge, name, help, labels, func=func)
+        if func is not None:
+            # Re-registering rebinds the callback to the newest owner
+            gauge.func = func
+        return gauge
+
+    def histogram(self, name, help="", labels=None):
+        return self._get(Histogram, name, help, labels)
+
+    def render(self, prefix=""):
+        """Prometheus text exposition format; `prefix` namespaces every family."""
+        lines = []
+        done = set()
+        with self.lock:
+            items = sorted(self.metrics.items(), key=lambda kv: kv[0])
+        for (name, labels), metric in items:
+            if name not in done:
+                help, kind = self.help[name]
+                exported = prefix + (name + "_total" if kind == "counter" and not name.endswith("_total") else name)
+                if help:
+                    lines.append(f"# HELP {exported} {_escape(help, quote=False)}")
+                lines.append(f"# TYPE {exported} {kind}")
+                done.add(name)
+            for sample, sample_labels, value in metric.samples(name, labels):
+                lines.append(f"{prefix}{sample}{_labels_text(sample_labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        """{name: snapshot} for every histogram — for heartbeat logs."""
+        return {name + _labels_text(labels): m.snapshot()
+                for (name, labels), m in list(self.metrics.items()) if isinstance(m, Histogram)}
+
+
+registry = Registry()
+
+
+class timed:
+    """Record the duration into histogram `name` (decorator or `with`)."""
+
+    def __init__(self, name, help="", labels=None):
+        self.histogram = registry.histogram(name, help, labels)
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self._start)
+        return False
+
+    def __call__(self, func):
+        hist = self.histogram
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                hist.observe(time.perf_counter() - start)
+        return wrapper
+
+
+# =======================================================
+# EXPORT (edge daemon)
+# =======================================================
+def write_file(path="metrics.prom"):
+    """Atomically write the current exposition to `path`."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        f.write(registry.render())
+    os.replace(tmp, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = registry.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(port, host="127.0.0.1"):
+    """Serve /metrics on a local port from a daemon thread; returns the server."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    log.info(f"📈 Metrics at http://{host}:{port}/metrics")
+    return server
@@ -5,20 +5,36 @@ DomiSafe IoT System - MQTT Client (FIXED)
 Fixes:
 - Added security_enabled subscription
 - Auto-convert underscore feed names → dash feed keys (MQTT requirement)
+- Per-device feeds: any device_id other than the legacy default
+  publishes/subscribes under the Adafruit group "<device-id>.<feed>"
 """
 
+import asyncio
 import logging
 import threading
 import uuid
 import paho.mqtt.client as mqtt
 from modules.config_loader import load_config
+from modules import metrics
 
 log = logging.getLogger(__name__)
 
+LEGACY_DEVICE_ID = "pi_home_security"
+
+
+def feed_key(feed, device_id=None):
+    """Adafruit IO feed key for `feed` on `device_id` (group-qualified unless legacy)."""
+    key = feed.replace("_", "-")
+    if device_id and device_id != LEGACY_DEVICE_ID:
+        key = f"{device_id.replace('_', '-').lower()}.{key}"
+    return key
+
+
 class MqttClient:
-    def __init__(self, config_file="config.json", subscribe=True, security=None):
+    def __init__(self, config_file="config.json", subscribe=True, security=None, start=True):
         self.cfg = load_config(config_file)
         self.subscribe = subscribe
+        self.device_id = self.cfg.get("device_id") or LEGACY_DEVICE_ID
 
         # Real hardware
         self.security = security
@@ -34,17 +50,25 @@ class MqttClient:
             self.cfg["ADAFRUIT_IO_USERNAME"],
             self.cfg["ADAFRUIT_IO_KEY"]
         )
-        self.client.tls_set()
+        if self.cfg.get("MQTT_TLS", True):
+            self.client.tls_set()
 
         # Flags
         self.connected = threading.Event()
 
+        # Topic → (feed, device_id, callback) from watch(); works in publish-only mode
+        self.watchers = {}
+
         # Callbacks
         self.client.on_connect = self._on_connect
         self.client.on_disconnect = self._on_disconnect
         self.client.on_message = self._on_message
 
-        # Connect
+        if start:
+            self.start()
+
+    def start(self, wait=10):
+        """Connect via paho's own network thread (threaded runtime)."""
         self.client.connect_async(
             self.cfg["MQTT_BROKER"],
             self.cfg["MQTT_PORT"],
@@ -52,20 +76,23 @@ class MqttClient:
         )
         self.client.loop_start()
 
-        if not self.connected.wait(10):
+        if wait and not self.connected.wait(wait):
             log.error("❌ MQTT connection timeout")
 
     # -------------------------------------------------------
     # MQTT CALLBACKS
     # -------------------------------------------------------
     def _to_feed_key(self, feed: str) -> str:
-        """Convert Python-style feed names to Adafruit IO feed keys."""
-        return feed.replace("_", "-")
+        """Convert Python-style feed names to this device's Adafruit IO feed keys."""
+        return feed_key(feed, self.device_id)
 
     def _on_connect(self, client, userdata, flags, rc):
         log.info("✅ MQTT connected")
         self.connected.set()
 
+        for topic in list(self.watchers):
+            self.client.subscribe(topic)
+
         if not self.subscribe:
             log.info("ℹ️ Publish-only mode active — no subscriptions")
             return
@@ -80,8 +107,7 @@ class MqttClient:
         ]
 
         for feed in control_feeds:
-            feed_key = self._to_feed_key(feed)
-            topic = f"{username}/feeds/{feed_key}"
+            topic = f"{username}/feeds/{self._to_feed_key(feed)}"
             self.client.subscribe(topic)
             log.info(f"📡 Subscribed → {topic}")
 
@@ -93,6 +119,15 @@ class MqttClient:
     # INCOMING COMMAND HANDLER
     # -------------------------------------------------------
     def _on_message(self, client, userdata, msg):
+        watcher = self.watchers.get(msg.topic)
+        if watcher:
+            feed, device_id, callback = watcher
+            try:
+                callback(feed, msg.payload.decode().strip(), device_id)
+            except Exception as e:
+                log.error(f"MQTT watcher error ({feed}): {e}")
+            return
+
         if not self.subscribe:
             return
         
@@ -100,8 +135,8 @@ class MqttClient:
             topic = msg.topic
             value = msg.payload.decode().strip()
 
-            feed_key = topic.split("/")[-1]           # ex: "motor-status"
-            feed = feed_key.replace("-", "_")         # ex: "motor_status"
+            key = topic.split("/")[-1]                # ex: "kitchen.motor-status"
+            feed = key.split(".")[-1].replace("-", "_")   # ex: "motor_status"
 
             log.info(f"📥 Received → {feed} = {value}")
 
@@ -135,6 +170,21 @@ class MqttClient:
         except Exception as e:
             log.error(f"MQTT on_message error: {e}")
 
+    # -------------------------------------------------------
+    # WATCH (feed updates → callback, e.g. web cache invalidation)
+    # -------------------------------------------------------
+    def watch(self, feeds, device_id, callback):
+        """callback(feed, value, device_id) whenever one of `feeds` of `device_id` updates."""
+        username = self.cfg["ADAFRUIT_IO_USERNAME"]
+        for feed in feeds:
+            topic = f"{username}/feeds/{feed_key(feed, device_id)}"
+            if topic in self.watchers:
+                continue
+            self.watchers[topic] = (feed, device_id, callback)
+            if self.connected.is_set():
+                self.client.subscribe(topic)
+                log.info(f"👀 Watching → {topic}")
+
     # -------------------------------------------------------
     def is_security_enabled(self):
         return self.security_enabled
@@ -142,12 +192,115 @@ class MqttClient:
     # -------------------------------------------------------
     # SAFE PUBLISH
     # -------------------------------------------------------
-    def publish(self, feed, value):
+    @metrics.timed("mqtt_publish_seconds", "MqttClient.publish() latency")
+    def publish(self, feed, value, device_id=None):
+        """`device_id` targets another node's feed (web app control); default = this node."""
         try:
-            feed_key = self._to_feed_key(feed)
-            topic = f"{self.cfg['ADAFRUIT_IO_USERNAME']}/feeds/{feed_key}"
+            key = feed_key(feed, device_id) if device_id else self._to_feed_key(feed)
+            topic = f"{self.cfg['ADAFRUIT_IO_USERNAME']}/feeds/{key}"
 
             self.client.publish(topic, str(value))
-            log.info(f"📤 Sent → {feed_key}: {value}")
+            log.info(f"📤 Sent → {key}: {value}")
         except Exception as e:
+            metrics.registry.counter("mqtt_publish_errors_total", "Failed publishes").inc()
             log.error(f"Publish failed: {e}")
+
+
+class AsyncMqttClient(MqttClient):
+    """
+    MqttClient driven by an asyncio event loop instead of paho's thread.
+    paho's socket callbacks hook the broker socket into the loop's
+    reader/writer; hardware commands are handed off to an executor.
+    """
+
+    def __init__(self, loop, executor=None, **kwargs):
+        super().__init__(start=False, **kwargs)
+        self.loop = loop
+        self.executor = executor
+        self._closed = asyncio.Event()
+        self._misc = None
+        self._loop_thread = None
+
+        self.client.on_socket_open = self._on_socket_open
+        self.client.on_socket_close = self._on_socket_close
+        self.client.on_socket_register_write = self._on_socket_register_write
+        self.client.on_socket_unregister_write = self._on_socket_unregister_write
+
+    # -------------------------------------------------------
+    # SOCKET ↔ EVENT LOOP
+    # -------------------------------------------------------
+    def _in_loop(self, func, *args):
+        # paho calls these from the loop thread (loop_read/write) or from the
+        # executor (connect); only the former may touch the selector directly
+        if threading.get_ident() == self._loop_thread:
+            func(*args)
+        else:
+            self.loop.call_soon_threadsafe(func, *args)
+
+    def _on_socket_open(self, client, userdata, sock):
+        fd = sock.fileno()
+        def attach():
+            self.loop.add_reader(fd, client.loop_read)
+            self._misc = self.loop.create_task(self._misc_loop())
+        self._in_loop(attach)
+
+    def _on_socket_close(self, client, userdata, sock):
+        fd = sock.fileno()
+        def detach():
+            self.loop.remove_reader(fd)
+            if self._misc:
+                self._misc.cancel()
+            self._closed.set()
+        self._in_loop(detach)
+
+    def _on_socket_register_write(self, client, userdata, sock):
+        self._in_loop(self.loop.add_writer, sock.fileno(), client.loop_write)
+
+    def _on_socket_unregister_write(self, client, userdata, sock):
+        self._in_loop(self.loop.remove_writer, sock.fileno())
+
+    async def _misc_loop(self):
+        # Keepalive pings / retries — what loop_start's thread would do
+        while self.client.loop_misc() == mqtt.MQTT_ERR_SUCCESS:
+            await asyncio.sleep(1)
+
+    def _on_message(self, client, userdata, msg):
+        # GPIO writes must not run on the event loop
+        fut = self.loop.run_in_executor(self.executor, super()._on_message, client, userdata, msg)
+        fut.add_done_callback(lambda f, topic=msg.topic: self._handled(f, topic))
+
+    @staticmethod
+    def _handled(fut, topic):
+        if not fut.cancelled() and fut.exception():
+            log.error(f"❌ MQTT handler failed for {topic}: {fut.exception()}")
+
+    # -------------------------------------------------------
+    # CONNECTION SUPERVISOR (run as a task)
+    # -------------------------------------------------------
+    async def run(self):
+        self._loop_thread = threading.get_ident()
+        delay = 1
+        while True:
+            self._closed.clear()
+            try:
+                await self.loop.run_in_executor(
+                    self.executor, self.client.connect,
+                    self.cfg["MQTT_BROKER"], self.cfg["MQTT_PORT"], 60
+                )
+                delay = 1
+                await self._closed.wait()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.error(f"❌ MQTT connect failed: {e}")
+
+            log.info(f"MQTT reconnecting in {delay}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 60)
+
+    async def close(self):
+        try:
+            self.client.disconnect()
+            await asyncio.wait_for(self._closed.wait(), 2)
+        except Exception:
+            pass
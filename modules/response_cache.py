@@ -0,0 +1,140 @@
+"""
+============================================
+DomiSafe IoT System - Response Cache
+============================================
+In-process cache of rendered history pages, keyed by route +
+device + day (+ anything else the page depends on):
+
+- a fresh entry is served without touching the database
+- once stale, a cheap (row count, newest timestamp) probe decides
+  whether the cached body is still valid; only a changed stamp
+  re-renders
+- ETag / Last-Modified on every response, so browsers revalidate
+  with If-None-Match / If-Modified-Since and get a 304
+- closed days (before today) keep a much longer TTL than today
+
+FragmentCache does the same for pieces of a page (dashboard
+blocks): entries live until invalidate() for their name/scope
+(MQTT update, sync notification) or a fallback TTL.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+
+OPEN_DAY_TTL = 30
+CLOSED_DAY_TTL = 3600
+MAX_ENTRIES = 256
+FRAGMENT_TTL = 30
+
+
+def make_etag(*parts):
+    return hashlib.sha1("|".join(map(str, parts)).encode()).hexdigest()[:20]
+
+
+def ttl_for(day, open_ttl=OPEN_DAY_TTL, closed_ttl=CLOSED_DAY_TTL):
+    return closed_ttl if day < date.today() else open_ttl
+
+
+class CacheEntry:
+    __slots__ = ("etag", "last_modified", "body", "mimetype", "expires")
+
+    def __init__(self, etag, last_modified, body, mimetype):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.body = body
+        self.mimetype = mimetype
+        self.expires = 0.0
+
+    def fresh(self):
+        return time.monotonic() < self.expires
+
+
+class ResponseCache:
+    """LRU of CacheEntry; safe to share between request threads."""
+
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry, ttl):
+        entry.expires = time.monotonic() + ttl
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class FragmentCache:
+    """
+    Rendered fragments keyed by (name, scope). invalidate() bumps the
+    key's generation, so a render that raced with it is not kept.
+    One thread re-renders a key at a time; the rest keep serving the
+    previous copy meanwhile (or wait for it, if there is none yet).
+    """
+
+    def __init__(self, ttl=FRAGMENT_TTL):
+        self.ttl = ttl
+        self.entries = {}       # key → (html, generation, expires)
+        self.generations = {}
+        self.renders = {}       # key → Lock held while rendering
+        self.lock = threading.Lock()
+
+    def _current(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            generation = self.generations.get(key, 0)
+        fresh = entry is not None and entry[1] == generation and time.monotonic() < entry[2]
+        return entry, generation, fresh
+
+    def get(self, name, scope, render):
+        """(html, "hit" | "stale" | "miss"); render() is only called on a miss."""
+        key = (name, scope)
+        entry, _, fresh = self._current(key)
+        if fresh:
+            return entry[0], "hit"
+
+        with self.lock:
+            rendering = self.renders.setdefault(key, threading.Lock())
+        if not rendering.acquire(blocking=entry is None):
+            return entry[0], "stale"
+        try:
+            entry, generation, fresh = self._current(key)
+            if fresh:
+                return entry[0], "hit"
+            html = render()
+            with self.lock:
+                self.entries[key] = (html, generation, time.monotonic() + self.ttl)
+            return html, "miss"
+        finally:
+            rendering.release()
+
+    def invalidate(self, name=None, scope=None):
+        with self.lock:
+            keys = {k for k in self.entries
+                    if (name is None or k[0] == name) and (scope is None or k[1] == scope)}
+            if name is not None and scope is not None:
+                keys.add((name, scope))     # may be mid-first-render
+            for key in keys:
+                self.generations[key] = self.generations.get(key, 0) + 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.generations.clear()
+            self.renders.clear()
@@ -0,0 +1,248 @@
+"""
+============================================
+DomiSafe IoT System - Deadline Scheduler
+============================================
+One monotonic, deadline-based scheduler for every periodic job.
+- Deadlines advance by a fixed interval (no drift from job run time)
+- Missed slots are skipped, not replayed in a burst
+- Blocking jobs (network I/O) run off the scheduler thread
+- Per-job lateness + run-time stats for heartbeats
+"""
+
+import asyncio
+import heapq
+import logging
+import threading
+import time
+
+from modules.config_loader import subscribe
+
+log = logging.getLogger(__name__)
+
+# Daemon job → config key holding its interval (hot-reloaded)
+JOB_INTERVALS = {
+    "security": "security_check_interval",
+    "environment": "env_interval",
+    "heartbeat": "heartbeat_interval",
+    "metrics": "metrics_interval",
+    "maintenance": "local_maintenance_interval"
+}
+
+
+class Job:
+    def __init__(self, name, interval, func, blocking=False):
+        self.name = name
+        self.interval = float(interval)
+        self.func = func
+        self.blocking = blocking
+        self.next_run = 0.0
+        self.active = False
+
+        # Stats
+        self.runs = 0
+        self.dispatches = 0
+        self.failures = 0
+        self.skipped = 0
+        self.last_lateness = 0.0
+        self.max_lateness = 0.0
+        self.total_lateness = 0.0
+        self.last_runtime = 0.0
+        self.max_runtime = 0.0
+        self.total_runtime = 0.0
+
+    def record_dispatch(self, lateness):
+        self.dispatches += 1
+        self.last_lateness = lateness
+        self.total_lateness += lateness
+        self.max_lateness = max(self.max_lateness, lateness)
+
+    def record_run(self, runtime, failed=False):
+        self.runs += 1
+        self.failures += int(failed)
+        self.last_runtime = runtime
+        self.total_runtime += runtime
+        self.max_runtime = max(self.max_runtime, runtime)
+
+    def skip_missed(self, next_run, now):
+        """Advance past deadlines already in the past; returns the next future one."""
+        if next_run <= now:
+            missed = int((now - next_run) // self.interval) + 1
+            self.skipped += missed
+            next_run += missed * self.interval
+        return next_run
+
+    def stats(self):
+        runs = self.runs or 1
+        return {
+            "interval": self.interval,
+            "runs": self.runs,
+            "failures": self.failures,
+            "skipped": self.skipped,
+            "lateness_last": round(self.last_lateness, 4),
+            "lateness_avg": round(self.total_lateness / (self.dispatches or 1), 4),
+            "lateness_max": round(self.max_lateness, 4),
+            "runtime_last": round(self.last_runtime, 4),
+            "runtime_avg": round(self.total_runtime / runs, 4),
+            "runtime_max": round(self.max_runtime, 4)
+        }
+
+
+class Scheduler:
+    def __init__(self):
+        self.jobs = {}
+        self._heap = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self.running = False
+        self.followed = {}
+
+    # -------------------------------------------------------
+    # JOB REGISTRATION
+    # -------------------------------------------------------
+    def add_job(self, name, interval, func, first_delay=0.0, blocking=False):
+        job = Job(name, interval, func, blocking)
+        job.next_run = time.monotonic() + first_delay
+        with self._lock:
+            self.jobs[name] = job
+            heapq.heappush(self._heap, (job.next_run, name))
+        self._wake.set()
+        return job
+
+    def follow_config(self, jobs, path="config.json"):
+        """Keep job intervals in sync with config keys: {"job name": "config key"}."""
+        self.followed = dict(jobs)
+        subscribe(self._on_config, list(jobs.values()), path)
+
+    def _on_config(self, changed, cfg):
+        for name, key in self.followed.items():
+            if key in changed:
+                self.set_interval(name, changed[key])
+
+    def set_interval(self, name, interval):
+        job = self.jobs.get(name)
+        if job and float(interval) != job.interval:
+            log.info(f"⏱️ {name} interval {job.interval}s → {interval}s")
+            job.interval = float(interval)
+
+    # -------------------------------------------------------
+    # RUN LOOP
+    # -------------------------------------------------------
+    def run(self):
+        """Run jobs until stop(); call from the thread that should own the loop."""
+        self.running = True
+        while self.running:
+            # Clear before reading the heap: a wake() from here on (add_job,
+            # stop) interrupts the wait below instead of being lost
+            self._wake.clear()
+            with self._lock:
+                if not self._heap:
+                    due, name = None, None
+                else:
+                    due, name = self._heap[0]
+
+            now = time.monotonic()
+            if due is None or due > now:
+                self._wake.wait(None if due is None else due - now)
+                continue
+
+            with self._lock:
+                heapq.heappop(self._heap)
+            job = self.jobs.get(name)
+            if job is None:
+                continue
+
+            self._dispatch(job, due, now)
+
+            # Next deadline is anchored to the schedule, not to when we finished
+            next_run = job.skip_missed(due + job.interval, time.monotonic())
+            job.next_run = next_run
+            with self._lock:
+                heapq.heappush(self._heap, (next_run, name))
+
+    def stop(self):
+        self.running = False
+        self._wake.set()
+
+    # -------------------------------------------------------
+    def _dispatch(self, job, due, now):
+        if job.active:
+            # Previous blocking run still going — count the slot as skipped
+            job.skipped += 1
+            return
+
+        job.record_dispatch(now - due)
+
+        if job.blocking:
+            job.active = True
+            threading.Thread(target=self._execute, args=(job,), daemon=True,
+                             name=f"job-{job.name}").start()
+        else:
+            self._execute(job)
+
+    def _execute(self, job):
+        start = time.monotonic()
+        failed = False
+        try:
+            job.func()
+        except Exception as e:
+            failed = True
+            log.error(f"{job.name} job error: {e}")
+        finally:
+            job.record_run(time.monotonic() - start, failed)
+            job.active = False
+
+    # -------------------------------------------------------
+    # METRICS
+    # -------------------------------------------------------
+    def stats(self):
+        return {name: job.stats() for name, job in self.jobs.items()}
+
+    def log_stats(self):
+        for name, s in self.stats().items():
+            log.info(
+                f"⏱️ {name}: runs={s['runs']} fail={s['failures']} skip={s['skipped']} "
+                f"late avg/max={s['lateness_avg']*1000:.1f}/{s['lateness_max']*1000:.1f}ms "
+                f"run avg/max={s['runtime_avg']*1000:.1f}/{s['runtime_max']*1000:.1f}ms"
+            )
+
+
+class AsyncScheduler(Scheduler):
+    """Same deadlines and stats as Scheduler, one asyncio task per job.
+
+    Job functions are coroutine functions; run() returns when cancelled.
+    """
+
+    async def run(self):
+        self.running = True
+        tasks = [asyncio.create_task(self._run_job(job), name=f"job-{name}")
+                 for name, job in self.jobs.items()]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            self.running = False
+            for t in tasks:
+                t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run_job(self, job):
+        loop = asyncio.get_running_loop()
+        # add_job() stamped next_run with time.monotonic(); the loop clock is the same one
+        due = job.next_run
+        while True:
+            delay = due - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            now = loop.time()
+            job.record_dispatch(now - due)
+            failed = False
+            try:
+                await job.func()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                failed = True
+                log.error(f"{job.name} job error: {e}")
+            job.record_run(loop.time() - now, failed)
+
+            due = job.skip_missed(due + job.interval, loop.time())
@@ -1,10 +1,13 @@
+import base64
 import logging
 import threading
 import time
 from datetime import datetime
 
 from modules.camera_handler import CameraHandler
+from modules.capture_store import CaptureStore
 from modules.config_loader import load_config
+from modules import metrics
 
 try:
     from gpiozero import LED, Buzzer, MotionSensor, OutputDevice
@@ -21,15 +24,27 @@ class SecuritySystem:
     - NO more singleton
     - NO duplicated MqttClient
     - Supports both Flask (safe mode) and main.py (GPIO mode)
+    - `hardware` (or "hardware_sim" in config) plugs in simulated devices
     """
 
-    def __init__(self, use_gpio=False):
-        self.use_gpio = use_gpio and GPIO_AVAILABLE
+    def __init__(self, use_gpio=False, hardware=None, config_path="config.json"):
+        cfg = load_config(config_path)
 
-        cfg = load_config()
+        if hardware is None and use_gpio and cfg.get("hardware_sim"):
+            from modules.fake_hardware import FakeHardware
+            hardware = FakeHardware()
+        self.use_gpio = use_gpio and GPIO_AVAILABLE and hardware is None
+
+        # SIMULATED hardware (tests, benchmarks, load generator)
+        if hardware is not None:
+            self.led = hardware.led
+            self.buzzer = hardware.buzzer
+            self.motion = hardware.motion
+            self.motor = hardware.motor
+            log.info("🧪 SecuritySystem initialized with SIMULATED hardware")
 
         # REAL hardware mode (main.py)
-        if self.use_gpio:
+        elif self.use_gpio:
             self.led = LED(cfg.get("LED_PIN", 16))
             self.buzzer = Buzzer(cfg.get("BUZZER_PIN", 26))
             self.motion = MotionSensor(cfg.get("PIR_PIN", 6))
@@ -44,7 +59,8 @@ class SecuritySystem:
             self.motor = None
             log.info("🟦 SecuritySystem initialized in SAFE MODE (no GPIO)")
 
-        self.cam = CameraHandler()
+        self.cam = CameraHandler(store=CaptureStore(config_path=config_path),
+                                 camera=getattr(hardware, "camera", None))
 
     # -----------------------------------------------------------
     # DIRECT CONTROL METHODS (called by MQTT or Flask)
@@ -87,7 +103,12 @@ class SecuritySystem:
     # -----------------------------------------------------------
     # MOTION DETECTION LOOP LOGIC
     # -----------------------------------------------------------
-    def check(self):
+    @metrics.timed("security_check_seconds", "One motion detection pass, incl. alert + capture")
+    def check(self, pulse_motor=True):
+        """
+        One detection pass. `pulse_motor=False` leaves the motor pulse to the
+        caller (the asyncio runtime schedules it instead of spawning a thread).
+        """
         # In Flask safe mode → motion always off
         motion = self.motion.motion_detected if self.motion else False
 
@@ -96,9 +117,11 @@ class SecuritySystem:
         buzzer_pulsed = False
         motor_pulsed = False
         image = None
+        capture = None
 
         if motion:
             log.info("🚨 MOTION DETECTED!")
+            metrics.registry.counter("motion_detected_total", "Motion detections").inc()
 
             if self.led:
                 self.led.on()
@@ -110,7 +133,8 @@ class SecuritySystem:
                 buzzer_pulsed = True
 
             # Pulse motor async
-            threading.Thread(target=self._spin_motor, daemon=True).start()
+            if pulse_motor:
+                threading.Thread(target=self._spin_motor, daemon=True).start()
             motor_pulsed = True
 
             time.sleep(0.8)
@@ -119,8 +143,10 @@ class SecuritySystem:
                 self.buzzer.off()
                 buzzer_status = 0
 
-            # Capture image
-            image = self.cam.capture_b64()
+            # Capture image (stored + indexed by CaptureStore)
+            capture = self.cam.capture()
+            if capture:
+                image = base64.b64encode(capture["jpeg"]).decode()
 
         else:
             if self.led:
@@ -135,5 +161,7 @@ class SecuritySystem:
             "buzzer_status": buzzer_status,
             "buzzer_pulsed": buzzer_pulsed,
             "motor_pulsed": motor_pulsed,
-            "image_b64": image
+            "image_b64": image,
+            "capture_id": capture["id"] if capture else None,
+            "image_name": capture["path"] if capture else None
         }
@@ -0,0 +1,138 @@
+"""
+============================================
+DomiSafe IoT System - Background Service Startup
+============================================
+Brings up slow external clients (cloud DB, MQTT, Adafruit IO)
+off the request path:
+
+- each service connects on its own daemon thread, started on
+  first use; nothing blocks import or the first request
+- failed attempts retry with exponential backoff
+- a service whose config is missing is marked disabled (no retries)
+- an optional check() re-tests a ready service whenever its state is
+  asked for; a lost service goes back to connecting in the background
+- status() feeds the web app's readiness endpoint
+
+    services = ServiceStarter()
+    services.add("cloud_db", cloud_db.connect, check=lambda: cloud_db.conn is not None)
+    services.start()
+    services.ready()  # all required services up?
+"""
+
+import logging
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+RETRY_DELAY = 2.0
+MAX_RETRY_DELAY = 60.0
+
+
+class ServiceDisabled(Exception):
+    """Raised by an init function when the service can't be configured."""
+
+
+class _Service:
+    def __init__(self, name, init, required, check):
+        self.name = name
+        self.init = init
+        self.required = required
+        self.check = check
+        self.state = "pending"          # pending → starting → ready (→ starting) | disabled
+        self.error = None
+        self.attempts = 0
+        self.since = None
+
+
+class ServiceStarter:
+    def __init__(self, retry_delay=RETRY_DELAY, max_retry_delay=MAX_RETRY_DELAY):
+        self.services = {}
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.started_at = None
+        self.lock = threading.Lock()
+
+    def add(self, name, init, required=True, check=None):
+        """`init()` returns truthy when up, falsy to retry, or raises ServiceDisabled.
+        `check()` (cheap, optional) returns falsy once a ready service is gone."""
+        self.services[name] = _Service(name, init, required, check)
+
+    def start(self):
+        """Idempotent; cheap enough to call on every request."""
+        if self.started_at is not None:
+            return
+        with self.lock:
+            if self.started_at is not None:
+                return
+            self.started_at = time.monotonic()
+            for svc in self.services.values():
+                self._spawn(svc)
+
+    def _spawn(self, svc):
+        threading.Thread(target=self._run, args=(svc,), name=f"init-{svc.name}", daemon=True).start()
+
+    def reset(self):
+        """Back to "not started" (threads don't survive fork(); a child starts its own)."""
+        self.lock = threading.Lock()    # may have been held mid-fork
+        self.started_at = None
+        for svc in self.services.values():
+            svc.state, svc.error, svc.attempts, svc.since = "pending", None, 0, None
+
+    def _run(self, svc):
+        delay = self.retry_delay
+        svc.state = "starting"
+        while True:
+            svc.attempts += 1
+            try:
+                if svc.init():
+                    svc.state, svc.error = "ready", None
+                    svc.since = time.monotonic()
+                    log.info(f"✅ {svc.name} ready after {svc.since - self.started_at:.2f}s")
+                    return
+                svc.error = "not connected"
+            except ServiceDisabled as e:
+                svc.state, svc.error = "disabled", str(e)
+                log.warning(f"⚠️ {svc.name} disabled: {e}")
+                return
+            except Exception as e:
+                svc.error = str(e)
+            log.warning(f"⚠️ {svc.name} not up ({svc.error}), retrying in {delay:.0f}s")
+            time.sleep(delay)
+            delay = min(delay * 2, self.max_retry_delay)
+
+    def _up(self, svc):
+        if svc.state != "ready":
+            return False
+        if svc.check is None:
+            return True
+        try:
+            if svc.check():
+                return True
+        except Exception:
+            pass
+        with self.lock:
+            if svc.state == "ready":
+                svc.state, svc.error, svc.attempts = "starting", "connection lost", 0
+                log.warning(f"⚠️ {svc.name} lost, reconnecting in the background")
+                self._spawn(svc)
+        return False
+
+    def is_ready(self, name):
+        svc = self.services.get(name)
+        return svc is not None and self._up(svc)
+
+    def ready(self):
+        # A list, not a generator: every required service gets checked
+        return self.started_at is not None and all(
+            [self._up(svc) for svc in self.services.values() if svc.required]
+        )
+
+    def status(self):
+        for svc in self.services.values():
+            self._up(svc)
+        return {
+            name: {"state": svc.state, "required": svc.required,
+                   "attempts": svc.attempts, "error": svc.error}
+            for name, svc in self.services.items()
+        }
@@ -0,0 +1,126 @@
+"""
+============================================
+DomiSafe IoT System - Static Assets
+============================================
+Fingerprinted, pre-compressed static files for the web app:
+
+- every file under static/ gets a content-hash URL
+  (styles.css → /assets/styles.1a2b3c4d5e.css), served with a
+  one-year immutable Cache-Control; editing the file changes the URL
+- .gz (and .br with the brotli package; HAS_BROTLI) variants are
+  built once into static/dist/ and reused across restarts
+- each request gets the smallest variant its Accept-Encoding allows
+
+    assets = AssetManifest(app.static_folder)
+    assets.url("styles.css")
+    path, encoding = assets.pick(assets.lookup(name), request.accept_encodings)
+"""
+
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+
+try:
+    import brotli
+    HAS_BROTLI = True
+except Exception:
+    HAS_BROTLI = False
+
+log = logging.getLogger(__name__)
+
+HASH_LEN = 10
+MAX_AGE = 365 * 86400
+COMPRESSIBLE = {".css", ".js", ".svg", ".json", ".txt", ".map"}
+MIN_COMPRESS = 512              # bytes; below this the headers cost more
+
+
+class Asset:
+    def __init__(self, name, fingerprinted, path, mimetype):
+        self.name = name
+        self.fingerprinted = fingerprinted
+        self.path = path
+        self.mimetype = mimetype
+        self.variants = {}      # encoding → path, smallest first
+
+
+class AssetManifest:
+    def __init__(self, root, dist="dist", url_prefix="/assets"):
+        self.root = root
+        self.dist = os.path.join(root, dist)
+        self.url_prefix = url_prefix
+        self.assets = {}        # logical name → Asset
+        self.by_fingerprint = {}
+        self.build()
+
+    # -------------------------------------------------------
+    # BUILD
+    # -------------------------------------------------------
+    def build(self):
+        os.makedirs(self.dist, exist_ok=True)
+        dist_name = os.path.basename(self.dist)
+        wanted = set()
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            if os.path.abspath(dirpath) == os.path.abspath(self.root) and dist_name in dirnames:
+                dirnames.remove(dist_name)
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                name = os.path.relpath(path, self.root).replace(os.sep, "/")
+                asset = self._add(name, path)
+                wanted.update(os.path.basename(p) for p in asset.variants.values())
+
+        # Variants of files that changed or went away
+        for stale in set(os.listdir(self.dist)) - wanted:
+            if stale.endswith((".gz", ".br")):
+                os.remove(os.path.join(self.dist, stale))
+        # Changes whenever any asset URL does (pages embedding them go stale)
+        self.version = hashlib.sha256(
+            "".join(sorted(self.by_fingerprint)).encode()
+        ).hexdigest()[:HASH_LEN]
+        log.info(f"📦 {len(self.assets)} static assets fingerprinted (version {self.version})")
+
+    def _add(self, name, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()[:HASH_LEN]
+        stem, ext = os.path.splitext(name)
+        mimetype = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        asset = Asset(name, f"{stem}.{digest}{ext}", path, mimetype)
+
+        if ext in COMPRESSIBLE and len(data) >= MIN_COMPRESS:
+            flat = asset.fingerprinted.replace("/", "_")
+            compressors = [("br", lambda d: brotli.compress(d, quality=11))] if HAS_BROTLI else []
+            compressors.append(("gzip", lambda d: gzip.compress(d, 9, mtime=0)))
+            for encoding, compress in compressors:
+                out = os.path.join(self.dist, f"{flat}.{'br' if encoding == 'br' else 'gz'}")
+                if not os.path.exists(out):
+                    tmp = f"{out}.tmp{os.getpid()}"
+                    with open(tmp, "wb") as f:
+                        f.write(compress(data))
+                    os.replace(tmp, out)
+                asset.variants[encoding] = out
+
+        self.assets[name] = asset
+        self.by_fingerprint[asset.fingerprinted] = asset
+        return asset
+
+    # -------------------------------------------------------
+    # LOOKUP
+    # -------------------------------------------------------
+    def url(self, name):
+        asset = self.assets.get(name)
+        if asset is None:
+            log.warning(f"Unknown static asset {name}")
+            return f"/static/{name}"
+        return f"{self.url_prefix}/{asset.fingerprinted}"
+
+    def lookup(self, fingerprinted):
+        return self.by_fingerprint.get(fingerprinted)
+
+    def pick(self, asset, accept_encodings):
+        """(path, Content-Encoding or None); `accept_encodings` is werkzeug's Accept header."""
+        for encoding, path in asset.variants.items():
+            if accept_encodings[encoding]:
+                return path, encoding
+        return asset.path, None
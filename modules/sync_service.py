@@ -1,22 +1,101 @@
+import asyncio
 import logging
 import time
 import threading
-from modules.local_db import fetch_unsynced, mark_synced
-from modules.cloud_db import CloudDB
-from modules.config_loader import load_config
+from modules.local_db import (fetch_unsynced, count_unsynced, mark_synced,
+                              add_write_listener, remove_write_listener)
+from modules.cloud_db import CloudDB, AsyncCloudDB
+from modules.config_loader import load_config, subscribe
+from modules import metrics
 
 log = logging.getLogger(__name__)
 
+# Cloud partition upkeep (next month's partition, retention drops);
+# a pass that timed out on a table lock is retried sooner
+MAINTENANCE_INTERVAL = 3600
+MAINTENANCE_RETRY = 300
+
+# Each drain round sends a motion batch before an environment batch,
+# so a fresh alert never queues behind a long environment backlog
+SYNC_ORDER = ("motion", "environment")
+
+# Seconds one batch should take; BatchSizer grows/shrinks toward it
+BATCH_TARGET = 1.0
+
+def next_maintenance(ok):
+    return time.monotonic() + (MAINTENANCE_INTERVAL if ok else MAINTENANCE_RETRY)
+
+class BatchSizer:
+    """
+    Rows per fetch/insert round — each round is one executemany and one
+    commit: doubles while full batches finish well under `target`
+    seconds, halves when one runs long, and drops back to the minimum
+    after a failure. Small batches keep motion rows from waiting behind
+    a backlog; big ones drain it in fewer round trips.
+    """
+
+    def __init__(self, minimum, maximum, target=BATCH_TARGET):
+        self.minimum = minimum
+        self.maximum = max(minimum, maximum)
+        self.target = target
+        self.size = minimum
+
+    def configure(self, minimum, maximum):
+        self.minimum, self.maximum = minimum, max(minimum, maximum)
+        self.size = min(max(self.size, self.minimum), self.maximum)
+
+    def update(self, full, elapsed, ok):
+        if not ok:
+            self.size = self.minimum
+        elif elapsed > self.target:
+            self.size = max(self.minimum, self.size // 2)
+        elif full and elapsed < self.target / 2:
+            self.size = min(self.maximum, self.size * 2)
+
+
 class SyncService:
-    def __init__(self, config_path="config.json"):
+    """
+    Pushes local rows to the cloud DB from a background thread. The
+    thread sleeps until a local write (save_env/save_motion) or
+    `sync_interval`, whichever comes first: motion wakes it at once,
+    environment writes after `sync_debounce_ms` so a burst goes out
+    in one pass. A pass keeps going while a backlog remains.
+    """
+
+    def __init__(self, config_path="config.json", cloud_db=None, device_id=None):
+        """`device_id` syncs only that device's rows (nodes sharing one local DB)."""
         cfg = load_config(config_path)
         self.interval = cfg.get('sync_interval', 60)
+        self.debounce = cfg.get('sync_debounce_ms', 500) / 1000
+        self.batch = BatchSizer(cfg.get('sync_batch_min', 50), cfg.get('sync_batch_max', 1000))
         self.enabled = cfg.get('cloud_sync_enabled', True)
-        self.cloud_db = CloudDB(config_path)
+        self.cloud_db = cloud_db or CloudDB(config_path)
+        self.device_id = device_id
         self.running = False
+        self.stopping = False
         self.thread = None
+        self.wake = threading.Condition()
+        self.pending = set()        # tables written since the last pass
         self.last_sync_time = None
-        
+        self.next_maintenance = next_maintenance(True)
+        subscribe(self._on_config, ["sync_interval", "sync_debounce_ms",
+                                    "sync_batch_min", "sync_batch_max"], config_path)
+
+    def _on_config(self, changed, cfg):
+        self.interval = cfg["sync_interval"]
+        self.debounce = cfg["sync_debounce_ms"] / 1000
+        self.batch.configure(cfg["sync_batch_min"], cfg["sync_batch_max"])
+        with self.wake:
+            self.wake.notify()
+
+    def notify(self, table, device_id=None):
+        """A row was written locally (called from local_db on the writer's thread)."""
+        if self.device_id and device_id and device_id != self.device_id:
+            return
+        with self.wake:
+            self.pending.add(table)
+            self.wake.notify()
+
     def start(self):
         if not self.enabled:
             log.info("⚠️ Cloud sync disabled in config")
@@ -24,83 +103,261 @@ class SyncService:
         if self.running:
             log.warning("Sync already running")
             return
-        
+
         self.running = True
-        self.thread = threading.Thread(target=self._sync_loop, daemon=True)
+        self.stopping = False
+        add_write_listener(self.notify)
+        self.thread = threading.Thread(target=self._sync_loop, name="cloud-sync", daemon=True)
         self.thread.start()
-        log.info(f"🔄 Sync started (interval: {self.interval}s)")
-    
+        log.info(f"🔄 Sync started (on write, at least every {self.interval}s)")
+
     def stop(self):
+        remove_write_listener(self.notify)
         self.running = False
+        self.stopping = True
+        with self.wake:
+            self.wake.notify()
         if self.thread:
+            # The sync thread closes the connection on its way out
             self.thread.join(timeout=5)
-        self.cloud_db.close()
+            if self.thread.is_alive():
+                log.warning("Sync still finishing a write; the cloud DB closes when it's done")
+                return
+        else:
+            self.cloud_db.close()
         log.info("Sync stopped")
-    
+
     def _sync_loop(self):
         while self.running:
             try:
-                self.sync_all()
+                ok = self.sync_all()
             except Exception as e:
                 log.error(f"Sync error: {e}")
-            time.sleep(self.interval)
-    
+                ok = False
+            self._wait(ok)
+        self.cloud_db.close()
+
+    def _wait(self, ok):
+        """Block until the next pass is due. After a failed pass only the
+        interval counts — writes can't reach an unreachable cloud DB sooner."""
+        with self.wake:
+            if not ok:
+                self.wake.wait_for(lambda: not self.running, self.interval)
+            else:
+                self.wake.wait_for(lambda: self.pending or not self.running, self.interval)
+                if self.pending and "motion" not in self.pending:
+                    # Let a burst of environment writes settle into one pass
+                    self.wake.wait_for(lambda: "motion" in self.pending or not self.running,
+                                       self.debounce)
+            self.pending.clear()
+
+    @metrics.timed("sync_all_seconds", "SyncService.sync_all() duration")
     def sync_all(self):
+        """Push every unsynced row (motion first, in adaptive batches).
+        Returns False when the cloud DB was unavailable or a write failed."""
         if not self.cloud_db.conn:
             if not self.cloud_db.connect():
                 log.debug("Cloud DB unavailable")
-                return
-        
-        env_synced = self._sync_table('environment')
-        motion_synced = self._sync_table('motion')
-        
-        if env_synced > 0 or motion_synced > 0:
+                return False
+            # connect() already ran maintenance
+            self.next_maintenance = next_maintenance(self.cloud_db.maintenance_ok)
+        elif time.monotonic() >= self.next_maintenance:
+            self.next_maintenance = next_maintenance(self.cloud_db.maintain() is not None)
+
+        devices = set()
+        synced = dict.fromkeys(SYNC_ORDER, 0)
+        ok = more = True
+        while ok and more and not self.stopping:
+            more = False
+            for table in SYNC_ORDER:
+                count, full, ok = self._sync_table(table, devices)
+                synced[table] += count
+                more = more or full
+                if not ok:
+                    break
+
+        if devices:
             self.last_sync_time = time.time()
-            log.info(f"✅ Synced {env_synced} env + {motion_synced} motion")
-    
-    def _sync_table(self, table_name):
-        rows = fetch_unsynced(table_name)
+            self.cloud_db.notify_synced(devices)
+            log.info(f"✅ Synced {synced['environment']} env + {synced['motion']} motion")
+        return ok
+
+    def _sync_table(self, table_name, devices):
+        """One batch: (rows synced, batch was full so more may wait, no failure)."""
+        limit = self.batch.size
+        started = time.monotonic()
+        rows = fetch_unsynced(table_name, self.device_id, limit)
         if not rows:
-            return 0
-        
+            return 0, False, True
+
+        # One executemany + one commit per batch: all rows or none
+        insert_many = (self.cloud_db.insert_motion_many if table_name == "motion"
+                       else self.cloud_db.insert_environment_many)
+        try:
+            success = insert_many([row[1:5] for row in rows])
+        except Exception as e:
+            log.error(f"Sync batch failed: {e}")
+            success = False
+
         synced_ids = []
-        for row in rows:
-            row_id = row[0]
-            timestamp = row[1]
-            
-            try:
-                if table_name == 'environment':
-                    success = self.cloud_db.insert_environment(
-                        timestamp, row[2], row[3]
-                    )
-                elif table_name == 'motion':
-                    success = self.cloud_db.insert_motion(
-                        timestamp, row[2], row[3] if len(row) > 3 else None
-                    )
-                else:
-                    success = False
-                
-                if success:
-                    synced_ids.append(row_id)
-                else:
-                    break
-            except Exception as e:
-                log.error(f"Sync row failed: {e}")
-                break
-        
+        if success:
+            synced_ids = [row[0] for row in rows]
+            devices.update(row[4] or self.cloud_db.device_id for row in rows)
+
         if synced_ids:
             mark_synced(table_name, synced_ids)
-        
-        return len(synced_ids)
-    
+            metrics.registry.counter("sync_rows_total", "Rows pushed to the cloud DB",
+                                     {"table": table_name}).inc(len(synced_ids))
+
+        ok = len(synced_ids) == len(rows)
+        full = len(rows) == limit
+        self.batch.update(full, time.monotonic() - started, ok)
+        return len(synced_ids), ok and full, ok
+
     def get_sync_status(self):
-        env_unsynced = len(fetch_unsynced('environment'))
-        motion_unsynced = len(fetch_unsynced('motion'))
-        
         return {
             'running': self.running,
             'connected': self.cloud_db.conn is not None,
             'last_sync': self.last_sync_time,
-            'pending_env': env_unsynced,
-            'pending_motion': motion_unsynced
-        }
\ No newline at end of file
+            'pending_env': count_unsynced('environment', self.device_id),
+            'pending_motion': count_unsynced('motion', self.device_id),
+            'batch_size': self.batch.size
+        }
+
+
+class AsyncSyncService:
+    """SyncService for the asyncio runtime: async psycopg for the cloud side,
+    SQLite reads/writes pushed to an executor. run() is the event-driven
+    loop (same wake-up rules as SyncService)."""
+
+    def __init__(self, config_path="config.json", executor=None):
+        cfg = load_config(config_path)
+        self.interval = cfg.get('sync_interval', 60)
+        self.debounce = cfg.get('sync_debounce_ms', 500) / 1000
+        self.batch = BatchSizer(cfg.get('sync_batch_min', 50), cfg.get('sync_batch_max', 1000))
+        self.enabled = cfg.get('cloud_sync_enabled', True)
+        self.cloud_db = AsyncCloudDB(config_path)
+        self.executor = executor
+        self.pending = set()
+        self.woken = None
+        self.last_sync_time = None
+        self.next_maintenance = next_maintenance(True)
+        self.loop = None
+        subscribe(self._on_config, ["sync_interval", "sync_debounce_ms",
+                                    "sync_batch_min", "sync_batch_max"], config_path)
+
+    def _on_config(self, changed, cfg):
+        self.interval = cfg["sync_interval"]
+        self.debounce = cfg["sync_debounce_ms"] / 1000
+        self.batch.configure(cfg["sync_batch_min"], cfg["sync_batch_max"])
+        if self.loop is not None:
+            # Called from the config watcher thread
+            self.loop.call_soon_threadsafe(self.woken.set)
+
+    def _wake(self, table):
+        self.pending.add(table)
+        self.woken.set()
+
+    async def run(self):
+        loop = self.loop = asyncio.get_running_loop()
+        self.woken = asyncio.Event()
+
+        def on_write(table, device_id):
+            # Writers run in the executor; hop onto the loop
+            loop.call_soon_threadsafe(self._wake, table)
+
+        add_write_listener(on_write)
+        log.info(f"🔄 Sync started (on write, at least every {self.interval}s)")
+        try:
+            while True:
+                try:
+                    ok = await self.sync_all()
+                except Exception as e:
+                    log.error(f"Sync error: {e}")
+                    ok = False
+                await self._wait(ok)
+        finally:
+            remove_write_listener(on_write)
+            self.loop = None
+
+    async def _wait(self, ok):
+        loop = asyncio.get_running_loop()
+        if not ok:
+            await asyncio.sleep(self.interval)
+        elif not self.pending:
+            self.woken.clear()
+            try:
+                await asyncio.wait_for(self.woken.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+        deadline = loop.time() + self.debounce
+        while ok and self.pending and "motion" not in self.pending:
+            left = deadline - loop.time()
+            if left <= 0:
+                break
+            self.woken.clear()
+            try:
+                await asyncio.wait_for(self.woken.wait(), left)
+            except asyncio.TimeoutError:
+                break
+        self.pending.clear()
+
+    async def sync_all(self):
+        with metrics.timed("sync_all_seconds"):
+            return await self._sync_all()
+
+    async def _sync_all(self):
+        if not self.cloud_db.conn:
+            if not await self.cloud_db.connect():
+                log.debug("Cloud DB unavailable")
+                return False
+            self.next_maintenance = next_maintenance(self.cloud_db.maintenance_ok)
+        elif time.monotonic() >= self.next_maintenance:
+            self.next_maintenance = next_maintenance(await self.cloud_db.maintain() is not None)
+
+        devices = set()
+        synced = dict.fromkeys(SYNC_ORDER, 0)
+        ok = more = True
+        while ok and more:
+            more = False
+            for table in SYNC_ORDER:
+                count, full, ok = await self._sync_table(table, devices)
+                synced[table] += count
+                more = more or full
+                if not ok:
+                    break
+
+        if devices:
+            self.last_sync_time = time.time()
+            await self.cloud_db.notify_synced(devices)
+            log.info(f"✅ Synced {synced['environment']} env + {synced['motion']} motion")
+        return ok
+
+    async def _sync_table(self, table_name, devices):
+        loop = asyncio.get_running_loop()
+        limit = self.batch.size
+        started = time.monotonic()
+        rows = await loop.run_in_executor(self.executor, fetch_unsynced, table_name, None, limit)
+        if not rows:
+            return 0, False, True
+
+        insert_many = (self.cloud_db.insert_motion_many if table_name == "motion"
+                       else self.cloud_db.insert_environment_many)
+        synced_ids = []
+        if await insert_many([row[1:5] for row in rows]):
+            synced_ids = [row[0] for row in rows]
+            devices.update(row[4] or self.cloud_db.device_id for row in rows)
+
+        if synced_ids:
+            await loop.run_in_executor(self.executor, mark_synced, table_name, synced_ids)
+            metrics.registry.counter("sync_rows_total", "Rows pushed to the cloud DB",
+                                     {"table": table_name}).inc(len(synced_ids))
+
+        ok = len(synced_ids) == len(rows)
+        full = len(rows) == limit
+        self.batch.update(full, time.monotonic() - started, ok)
+        return len(synced_ids), ok and full, ok
+
+    async def stop(self):
+        await self.cloud_db.close()
+        log.info("Sync stopped")
@@ -0,0 +1,302 @@
+"""
+============================================
+DomiSafe IoT System - Time-Series Store
+============================================
+Compressed columnar chunks for (timestamp, value, value) series,
+Gorilla-style (Pelkonen et al., VLDB 2015):
+
+- timestamps (epoch ms): delta-of-delta, 1 bit when the sample
+  interval is steady
+- floats: XOR with the previous value, 1 bit when unchanged,
+  otherwise only the meaningful bits
+- CHUNK_SIZE samples per chunk, one BLOB row per chunk in SQLite,
+  each column its own bit stream
+- new samples go to an array-backed in-memory tail per series
+  and are sealed into a chunk when it fills (or on flush()); the
+  daemon doesn't use the tail — local_db.compress_environment seals
+  whole chunks from the row table with write_chunk(), so no sample
+  lives only in memory
+
+    store = ChunkStore(conn, "env_chunks")
+    store.append("pi_home_security", ts_ms, 21.5, 40.0)
+    store.flush()
+    for ts_ms, temp, hum in store.scan("pi_home_security", start_ms, end_ms): ...
+"""
+
+import math
+import struct
+from array import array
+
+CHUNK_SIZE = 240                # 2 h of 30 s samples
+HEADER = struct.Struct("<HHHH")  # count, then byte length of each column stream
+COLUMNS = 2
+
+# Delta-of-delta buckets: (prefix, value bits)
+DOD_BUCKETS = (("10", 7), ("110", 9), ("1110", 12), ("1111", 64))
+
+
+# =======================================================
+# BIT STREAMS
+# =======================================================
+class BitWriter:
+    def __init__(self):
+        self.parts = []
+        self.length = 0
+
+    def write(self, value, nbits):
+        if nbits:
+            self.parts.append(format(value & ((1 << nbits) - 1), f"0{nbits}b"))
+            self.length += nbits
+
+    def flag(self, bits):
+        self.parts.append(bits)
+        self.length += len(bits)
+
+    def getvalue(self):
+        bits = "".join(self.parts)
+        nbytes = (self.length + 7) // 8
+        return int(bits.ljust(nbytes * 8, "0") or "0", 2).to_bytes(nbytes, "big")
+
+
+def bit_string(data):
+    """Bytes → '0101...' (slicing + int(x, 2) beats bit twiddling in pure Python)."""
+    return format(int.from_bytes(data, "big"), f"0{len(data) * 8}b") if data else ""
+
+
+# =======================================================
+# COLUMN CODECS
+# =======================================================
+def encode_timestamps(ts):
+    w = BitWriter()
+    prev, prev_delta = ts[0], 0
+    w.write(prev, 64)
+    for t in ts[1:]:
+        delta = t - prev
+        dod = delta - prev_delta
+        if dod == 0:
+            w.flag("0")
+        else:
+            for prefix, nbits in DOD_BUCKETS:
+                if -(1 << (nbits - 1)) <= dod < (1 << (nbits - 1)):
+                    w.flag(prefix)
+                    w.write(dod, nbits)
+                    break
+        prev, prev_delta = t, delta
+    return w.getvalue()
+
+
+def decode_timestamps(data, count):
+    # Bit reads are inlined: decoding is the range-scan hot path
+    bits = bit_string(data)
+    prev = int(bits[:64], 2)
+    if prev >> 63:
+        prev -= 1 << 64
+    out = array("q", [prev])
+    pos, delta = 64, 0
+    for _ in range(count - 1):
+        if bits[pos] == "1":
+            pos += 1
+            for _prefix, nbits in DOD_BUCKETS:
+                if nbits == 64 or bits[pos] == "0":
+                    if nbits != 64:
+                        pos += 1
+                    dod = int(bits[pos:pos + nbits], 2)
+                    if dod >> (nbits - 1):
+                        dod -= 1 << nbits
+                    delta += dod
+                    pos += nbits
+                    break
+                pos += 1
+        else:
+            pos += 1
+        prev += delta
+        out.append(prev)
+    return out
+
+
+def _bits(x):
+    return struct.unpack("<Q", struct.pack("<d", x))[0]
+
+
+def encode_floats(values):
+    w = BitWriter()
+    prev = _bits(values[0])
+    w.write(prev, 64)
+    lead, tail = 65, 0                  # no window yet
+    for v in values[1:]:
+        cur = _bits(v)
+        xor = cur ^ prev
+        prev = cur
+        if not xor:
+            w.flag("0")
+            continue
+        lz = min(64 - xor.bit_length(), 31)
+        tz = (xor & -xor).bit_length() - 1
+        if lz >= lead and tz >= tail:
+            # Fits the previous meaningful-bit window
+            w.flag("10")
+            w.write(xor >> tail, 64 - lead - tail)
+        else:
+            lead, tail = lz, tz
+            size = 64 - lz - tz
+            w.flag("11")
+            w.write(lz, 5)
+            w.write(size & 63, 6)       # 64 → 0
+            w.write(xor >> tz, size)
+    return w.getvalue()
+
+
+def decode_floats(data, count):
+    bits = bit_string(data)
+    prev = int(bits[:64], 2)
+    raw = array("Q", [prev])
+    pos, lead, size = 64, 0, 0
+    for _ in range(count - 1):
+        if bits[pos] == "1":
+            if bits[pos + 1] == "1":
+                lead = int(bits[pos + 2:pos + 7], 2)
+                size = int(bits[pos + 7:pos + 13], 2) or 64
+                pos += 13
+            else:
+                pos += 2
+            prev ^= int(bits[pos:pos + size], 2) << (64 - lead - size)
+            pos += size
+        else:
+            pos += 1
+        raw.append(prev)
+    # Reinterpret the 64-bit patterns as doubles in one go
+    return array("d", raw.tobytes())
+
+
+def encode_chunk(ts, *columns):
+    streams = [encode_timestamps(ts)] + [encode_floats(c) for c in columns]
+    return HEADER.pack(len(ts), *(len(s) for s in streams)) + b"".join(streams)
+
+
+def decode_chunk(blob):
+    count, *lengths = HEADER.unpack_from(blob)
+    pos, streams = HEADER.size, []
+    for n in lengths:
+        streams.append(blob[pos:pos + n])
+        pos += n
+    return (decode_timestamps(streams[0], count),
+            *(decode_floats(s, count) for s in streams[1:]))
+
+
+# =======================================================
+# STORE
+# =======================================================
+class _Tail:
+    """Unsealed samples of one series, one typed array per column."""
+
+    def __init__(self):
+        self.ts = array("q")
+        self.columns = [array("d") for _ in range(COLUMNS)]
+
+    def __len__(self):
+        return len(self.ts)
+
+
+class ChunkStore:
+    """
+    Chunks live in `table` on the caller's sqlite3 connection; writes
+    join the caller's transaction (commit is up to the caller).
+    """
+
+    def __init__(self, conn, table="env_chunks", chunk_size=CHUNK_SIZE):
+        self.conn = conn
+        self.table = table
+        self.chunk_size = chunk_size
+        self.tails = {}
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                series TEXT,
+                start_ms INTEGER,
+                end_ms INTEGER,
+                count INTEGER,
+                data BLOB
+            )
+        """)
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_series_start "
+                     f"ON {table} (series, start_ms)")
+
+    # -------------------------------------------------------
+    # WRITE
+    # -------------------------------------------------------
+    def append(self, series, ts_ms, *values):
+        tail = self.tails.setdefault(series, _Tail())
+        tail.ts.append(int(ts_ms))
+        for col, v in zip(tail.columns, values):
+            col.append(math.nan if v is None else v)
+        if len(tail) >= self.chunk_size:
+            self._seal(series)
+
+    def write_chunk(self, series, ts, *columns):
+        """Seal a whole chunk directly (bypasses the tail)."""
+        columns = [[math.nan if v is None else v for v in c] for c in columns]
+        self.conn.execute(
+            f"INSERT INTO {self.table} (series, start_ms, end_ms, count, data) VALUES (?, ?, ?, ?, ?)",
+            (series, min(ts), max(ts), len(ts), encode_chunk(list(ts), *columns)),
+        )
+
+    def _seal(self, series):
+        tail = self.tails.pop(series, None)
+        if tail and len(tail):
+            self.write_chunk(series, tail.ts, *tail.columns)
+
+    def flush(self):
+        for series in list(self.tails):
+            self._seal(series)
+
+    # -------------------------------------------------------
+    # READ
+    # -------------------------------------------------------
+    def scan(self, series, start_ms=None, end_ms=None):
+        """(ts_ms, v1, v2) with start_ms <= ts < end_ms, chunk order then tail."""
+        lo = start_ms if start_ms is not None else -(1 << 63)
+        hi = end_ms if end_ms is not None else (1 << 63) - 1
+        rows = self.conn.execute(f"""
+            SELECT data FROM {self.table}
+            WHERE series = ? AND start_ms < ? AND end_ms >= ?
+            ORDER BY start_ms
+        """, (series, hi, lo))
+        for (blob,) in rows:
+            yield from _rows(decode_chunk(blob), lo, hi)
+        tail = self.tails.get(series)
+        if tail:
+            yield from _rows((tail.ts, *tail.columns), lo, hi)
+
+    def series(self):
+        return [r[0] for r in self.conn.execute(f"SELECT DISTINCT series FROM {self.table}")]
+
+    def stats(self):
+        chunks, samples, size = self.conn.execute(
+            f"SELECT COUNT(*), COALESCE(SUM(count), 0), COALESCE(SUM(LENGTH(data)), 0) FROM {self.table}"
+        ).fetchone()
+        return {"chunks": chunks, "samples": samples, "bytes": size,
+                "tail": sum(len(t) for t in self.tails.values())}
+
+    # -------------------------------------------------------
+    # RETENTION
+    # -------------------------------------------------------
+    def expired(self, before_ms):
+        """(id, series, blob) of chunks entirely older than before_ms."""
+        return self.conn.execute(
+            f"SELECT id, series, data FROM {self.table} WHERE end_ms < ? ORDER BY id", (before_ms,)
+        ).fetchall()
+
+    def delete(self, chunk_ids):
+        if chunk_ids:
+            self.conn.execute(f"DELETE FROM {self.table} WHERE id IN ({','.join('?' * len(chunk_ids))})",
+                              list(chunk_ids))
+
+
+def _rows(columns, lo, hi):
+    ts = columns[0]
+    if any(any(map(math.isnan, c)) for c in columns[1:]):
+        # NaN marks a missing reading
+        columns = [ts] + [[None if v != v else v for v in c] for c in columns[1:]]
+    if ts and lo <= min(ts) and max(ts) < hi:
+        return zip(*columns)
+    return (row for row in zip(*columns) if lo <= row[0] < hi)
@@ -0,0 +1,146 @@
+"""
+============================================
+DomiSafe IoT System - Upload Manifest
+============================================
+Remembers what already went to Google Drive, keyed by
+path + size + mtime (+ sha256 when the stat changed),
+so each run only uploads new or modified files.
+Also persists resumable-upload session URIs so an interrupted
+transfer continues where it stopped.
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import time
+
+log = logging.getLogger(__name__)
+
+
+def file_sha256(path, block=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(block)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class UploadManifest:
+    def __init__(self, path="upload_manifest.db"):
+        self.path = path
+        with sqlite3.connect(self.path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS uploads (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER,
+                    mtime_ns INTEGER,
+                    sha256 TEXT,
+                    drive_id TEXT,
+                    uploaded_at REAL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER,
+                    mtime_ns INTEGER,
+                    session_uri TEXT,
+                    started_at REAL
+                )
+            """)
+            conn.commit()
+
+    def _key(self, path):
+        return os.path.abspath(path)
+
+    def get(self, path):
+        """Row for `path` as (size, mtime_ns, sha256, drive_id, uploaded_at), or None."""
+        with sqlite3.connect(self.path) as conn:
+            return conn.execute(
+                "SELECT size, mtime_ns, sha256, drive_id, uploaded_at FROM uploads WHERE path=?",
+                (self._key(path),)
+            ).fetchone()
+
+    def check(self, path):
+        """Return (needs_upload, drive_id, sha256).
+
+        Same size+mtime → skip without hashing. Stat changed but content
+        hash identical (touched/copied) → refresh the stat and skip.
+        """
+        st = os.stat(path)
+        row = self.get(path)
+        if row is None:
+            return True, None, None
+
+        size, mtime_ns, sha, drive_id, _ = row
+        if size == st.st_size and mtime_ns == st.st_mtime_ns:
+            return False, drive_id, sha
+
+        digest = file_sha256(path)
+        if digest == sha:
+            self.record(path, drive_id, digest)
+            return False, drive_id, digest
+        return True, drive_id, digest
+
+    def record(self, path, drive_id, sha256=None, st=None):
+        """`st` = os.stat taken *before* uploading, so appends during upload aren't lost."""
+        st = st or os.stat(path)
+        if sha256 is None:
+            sha256 = file_sha256(path)
+        with sqlite3.connect(self.path) as conn:
+            conn.execute("""
+                INSERT INTO uploads (path, size, mtime_ns, sha256, drive_id, uploaded_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(path) DO UPDATE SET
+                    size=excluded.size, mtime_ns=excluded.mtime_ns, sha256=excluded.sha256,
+                    drive_id=excluded.drive_id, uploaded_at=excluded.uploaded_at
+            """, (self._key(path), st.st_size, st.st_mtime_ns, sha256, drive_id, time.time()))
+            conn.commit()
+
+    def pending(self, paths):
+        """Filter `paths` down to [(path, drive_id, sha256)] that need uploading."""
+        out = []
+        for p in paths:
+            try:
+                needed, drive_id, sha = self.check(p)
+            except OSError as e:
+                log.warning(f"Skipping {p}: {e}")
+                continue
+            if needed:
+                out.append((p, drive_id, sha))
+        return out
+
+    # -------------------------------------------------------
+    # RESUMABLE SESSIONS
+    # -------------------------------------------------------
+    def get_session(self, path):
+        """Saved resumable session URI for `path`, if the file hasn't changed since."""
+        st = os.stat(path)
+        with sqlite3.connect(self.path) as conn:
+            row = conn.execute(
+                "SELECT size, mtime_ns, session_uri FROM sessions WHERE path=?",
+                (self._key(path),)
+            ).fetchone()
+        if row and row[0] == st.st_size and row[1] == st.st_mtime_ns:
+            return row[2]
+        if row:
+            self.clear_session(path)
+        return None
+
+    def save_session(self, path, session_uri):
+        st = os.stat(path)
+        with sqlite3.connect(self.path) as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO sessions (path, size, mtime_ns, session_uri, started_at)
+                VALUES (?, ?, ?, ?, ?)
+            """, (self._key(path), st.st_size, st.st_mtime_ns, session_uri, time.time()))
+            conn.commit()
+
+    def clear_session(self, path):
+        with sqlite3.connect(self.path) as conn:
+            conn.execute("DELETE FROM sessions WHERE path=?", (self._key(path),))
+            conn.commit()
@@ -0,0 +1,170 @@
+"""
+============================================
+DomiSafe IoT System - Background Upload Service
+============================================
+Keeps logs/ and captures/ flowing to Google Drive while the
+system runs, instead of one big upload at exit:
+
+- Polls every `upload_interval` s; notify() wakes it right
+  after a motion capture so evidence leaves within seconds
+- The active log is re-sent at most every
+  `upload_active_log_interval` s (it changes constantly)
+- Token buckets cap files/min and KB/s
+- stop() cancels between chunks, so shutdown stays fast;
+  interrupted resumable uploads continue on the next start
+"""
+
+import logging
+import os
+import threading
+import time
+
+from modules.config_loader import load_config, subscribe
+from modules.drive_uploader import GoogleDriveUploader, TOKEN_FILE
+
+log = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """`rate` tokens/s, bursts up to `burst`; rate 0 = unlimited."""
+
+    def __init__(self, rate, burst=None):
+        self.lock = threading.Lock()
+        self.set_rate(rate, burst)
+
+    def set_rate(self, rate, burst=None):
+        with self.lock:
+            self.rate = float(rate or 0)
+            self.capacity = float(burst or self.rate)
+            self.tokens = self.capacity
+            self.stamp = time.monotonic()
+
+    def take(self, n, cancel=None):
+        """Consume `n` tokens (may go into debt); False if `cancel` was set while waiting."""
+        if not n:
+            return True
+        with self.lock:
+            if not self.rate:
+                return True
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+            self.stamp = now
+            self.tokens -= n
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+
+        if wait:
+            if cancel is not None:
+                return not cancel.wait(wait)
+            time.sleep(wait)
+        return True
+
+
+class UploadService:
+    def __init__(self, config_path="config.json", uploader=None):
+        cfg = load_config(config_path)
+        self.config_path = config_path
+        self.interval = cfg.get("upload_interval", 10)
+        self.active_log_interval = cfg.get("upload_active_log_interval", 300)
+        self.uploader = uploader or GoogleDriveUploader(config_path)
+        self.enabled = self.uploader.enabled
+
+        # Bandwidth bucket holds ~2 s worth so one chunk doesn't stall forever
+        kbps = cfg.get("upload_bandwidth_kbps", 0)
+        self.files_bucket = TokenBucket(cfg.get("upload_max_files_per_min", 60) / 60.0, burst=5)
+        self.bytes_bucket = TokenBucket(kbps * 1024, burst=kbps * 2048)
+        self.uploader.throttle = self._throttle
+
+        self.running = False
+        self.thread = None
+        self.wake = threading.Event()
+        self.last_upload_time = None
+        self.last_active_log = 0
+        self.uploaded = 0
+        subscribe(self._on_config, ["upload_interval", "upload_active_log_interval",
+                                    "upload_max_files_per_min", "upload_bandwidth_kbps"],
+                  config_path)
+
+    def _on_config(self, changed, cfg):
+        self.interval = cfg["upload_interval"]
+        self.active_log_interval = cfg["upload_active_log_interval"]
+        if "upload_max_files_per_min" in changed:
+            self.files_bucket.set_rate(cfg["upload_max_files_per_min"] / 60.0, burst=5)
+        if "upload_bandwidth_kbps" in changed:
+            kbps = cfg["upload_bandwidth_kbps"]
+            self.bytes_bucket.set_rate(kbps * 1024, burst=kbps * 2048)
+
+    def _throttle(self, nbytes, files):
+        cancel = self.uploader.cancelled
+        return (self.files_bucket.take(files, cancel)
+                and self.bytes_bucket.take(nbytes, cancel))
+
+    def notify(self):
+        """Something new to send (e.g. a motion capture) — don't wait for the next poll."""
+        self.wake.set()
+
+    def start(self):
+        if not self.enabled:
+            log.info("⚠️ Drive upload disabled in config")
+            return
+        if self.uploader.service_factory is None and not os.path.exists(TOKEN_FILE):
+            # The OAuth login flow is interactive; it can't run in a background thread
+            log.warning(f"⚠️ No {TOKEN_FILE} — run upload_logs.py once to authorise Drive")
+            return
+        if self.running:
+            log.warning("Uploader already running")
+            return
+
+        self.running = True
+        self.uploader.cancelled.clear()
+        self.thread = threading.Thread(target=self._upload_loop, name="drive-uploader", daemon=True)
+        self.thread.start()
+        log.info(f"📤 Upload service started (interval: {self.interval}s)")
+
+    def stop(self, timeout=2):
+        # Cancel in-flight work; resumable sessions pick up where they stopped
+        self.running = False
+        self.uploader.cancelled.set()
+        self.wake.set()
+        if self.thread:
+            self.thread.join(timeout=timeout)
+            if self.thread.is_alive():
+                log.warning("Upload service still finishing a chunk — not waiting")
+        log.info("Upload service stopped")
+
+    def _upload_loop(self):
+        try:
+            self.uploader.authenticate()
+        except Exception as e:
+            log.error(f"❌ Drive auth failed: {e}")
+            self.running = False
+            return
+
+        while self.running:
+            try:
+                self.upload_once()
+            except Exception as e:
+                log.error(f"Upload error: {e}")
+            self.wake.wait(self.interval)
+            self.wake.clear()
+
+    def upload_once(self):
+        # Images first: motion evidence is what matters if power goes
+        count = self.uploader.upload_images()
+
+        now = time.monotonic()
+        include_active = now - self.last_active_log >= self.active_log_interval
+        count += self.uploader.upload_logs(include_active=include_active)
+        if include_active:
+            self.last_active_log = now
+
+        if count:
+            self.uploaded += count
+            self.last_upload_time = time.time()
+        return count
+
+    def get_upload_status(self):
+        return {
+            "running": self.running,
+            "last_upload": self.last_upload_time,
+            "uploaded": self.uploaded,
+        }
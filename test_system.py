@@ -208,7 +208,13 @@ def test_environment_monitor():
         from modules.environment_monitor import EnvironmentMonitor
         
         monitor = EnvironmentMonitor()
-        data = monitor.read()
+        data = monitor.read(wait=10)
+        monitor.stop()
+        
+        if data is None:
+            print_warning("No valid sensor reading (no DHT11 attached?)")
+            print_success("(Module loads correctly)")
+            return True
         
         # Check data structure
         if ("temperature" in data and "humidity" in data and 
@@ -353,7 +359,51 @@ def test_flask_app():
         return False
 
 # ============================================
-# TEST 10: Directory Structure
+# TEST 10: Log Upload (compression off)
+# ============================================
+def test_log_upload_uncompressed():
+    print_test("Log Upload (log_compression: none)")
+    import json
+    import tempfile
+    cwd = os.getcwd()
+    try:
+        from modules.drive_uploader import GoogleDriveUploader
+        from modules.fake_drive import FakeDriveService
+
+        os.chdir(tempfile.mkdtemp())
+        with open("config.json", "w") as f:
+            json.dump({"log_compression": "none"}, f)
+        os.makedirs("logs")
+        # Rotated name as written by SizeTimeRotatingFileHandler
+        with open("logs/domisafe.log.2026-01-01_00-00-00", "w") as f:
+            f.write("rotated\n")
+        time.sleep(0.01)
+        with open("logs/domisafe.log", "w") as f:
+            f.write("active\n")
+
+        drive = FakeDriveService("drive")
+        uploader = GoogleDriveUploader("config.json", service_factory=lambda: drive)
+        uploaded = uploader.upload_logs(include_active=False)
+        names = [meta.get("name") for meta in drive.files_by_id.values()]
+
+        # Asserts, not return False: pytest collects this file too
+        assert uploaded == 1 and names == ["domisafe.log.2026-01-01_00-00-00"], \
+            f"Uploaded {uploaded}: {names}"
+        assert uploader.upload_logs(include_active=False) == 0, "Rotated log uploaded twice"
+
+        print_success()
+        return True
+    except AssertionError as e:
+        print_fail(str(e))
+        raise
+    except Exception as e:
+        print_fail(str(e))
+        return False
+    finally:
+        os.chdir(cwd)
+
+# ============================================
+# TEST 11: Directory Structure
 # ============================================
 def test_directories():
     print_test("Directory Structure")
@@ -406,6 +456,7 @@ def main():
     run_test(test_camera)
     run_test(test_sync_service)
     run_test(test_flask_app)
+    run_test(test_log_upload_uncompressed)
     
     # Print summary
     print_header("Test Summary")
@@ -6,25 +6,47 @@ Fixes:
 - Hybrid config: config.json → env → default → error
 - Removed duplicate CloudDB initialization
 - Proper Adafruit feed-name normalization
+- Multi-device: every page takes ?device=<device_id>
+- Cloud DB / MQTT / Adafruit connect in the background on first
+  request (and again if lost); requests never connect, pages show
+  empty data and JSON APIs answer 503 meanwhile; /healthz and
+  /readyz report on them
+- Static files (incl. vendored Chart.js) fingerprinted, pre-compressed,
+  cached immutably; HTML/JSON gzipped
+- Dashboard blocks cached as fragments, dropped on MQTT updates and
+  sync notifications; templates precompiled with a bytecode cache
 ============================================================
 """
 
-from flask import Flask, render_template, request, jsonify
+from flask import (Flask, render_template, make_response, request, jsonify, g, Response,
+                   stream_with_context, send_file, abort)
 import requests
 import logging
-from datetime import date
+from datetime import date, datetime
 import sys
 import os
 import time
+import functools
+import gzip
+import threading
+from collections import OrderedDict
+from jinja2 import FileSystemBytecodeCache
+from markupsafe import Markup
 from typing import Optional
 
 # Allow imports from root/modules
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from modules.config_loader import load_config
-from modules.cloud_db import CloudDB
-from modules.local_db import fetch_unsynced
-from modules.mqtt_client import MqttClient
+from modules.cloud_db import CloudDB, CloudUnavailable, PAGE_SIZE, encode_cursor, decode_cursor
+from modules.local_db import count_unsynced
+from modules.mqtt_client import MqttClient, feed_key
+from modules.config_loader import DEVICE_ID_RE
+from modules import metrics
+from modules.export import EXPORT_COLUMNS, FORMATS, HAS_PARQUET, export_stream
+from modules.service_init import ServiceDisabled, ServiceStarter
+from modules.static_assets import MAX_AGE, AssetManifest
+from modules.response_cache import CacheEntry, FragmentCache, ResponseCache, make_etag, ttl_for
 
 # ============================================================
 # Flask App Setup
@@ -32,6 +54,11 @@ from modules.mqtt_client import MqttClient
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'domisafe-secret-key-change-me'
 
+# Compiled templates survive restarts (must be set before jinja_env is built).
+# No directory given: Jinja uses a per-user 0700 temp dir and checks its owner
+# (the cache is loaded with marshal, so a shared path would run planted code)
+app.jinja_options = {**app.jinja_options, "bytecode_cache": FileSystemBytecodeCache()}
+
 logging.basicConfig(level=logging.INFO)
 log = logging.getLogger(__name__)
 
@@ -70,40 +97,160 @@ def get_config_value(key: str, default: Optional[str] = None) -> Optional[str]:
     raise RuntimeError(f"Missing required config: {key}")
 
 
-# Required Config Values
-AIO_USERNAME = get_config_value('ADAFRUIT_IO_USERNAME')
-AIO_KEY = get_config_value('ADAFRUIT_IO_KEY')
+def optional_config_value(key: str) -> Optional[str]:
+    """get_config_value() that leaves the dependent feature off instead of raising."""
+    try:
+        return get_config_value(key)
+    except RuntimeError:
+        log.warning(f"⚠️ Missing config {key} — dependent features disabled")
+        return None
+
+
+# Service Config Values (a missing one disables that service, see SERVICES)
+AIO_USERNAME = optional_config_value('ADAFRUIT_IO_USERNAME')
+AIO_KEY = optional_config_value('ADAFRUIT_IO_KEY')
 AIO_BASE_URL = f"https://io.adafruit.com/api/v2/{AIO_USERNAME}"
 
-NEON_DB_URL = get_config_value('NEON_DB_URL')
+NEON_DB_URL = optional_config_value('NEON_DB_URL')
 
 # ============================================================
-# Initialize Cloud Database (FINAL / ONLY ONE INSTANCE)
+# SERVICES (connected in the background, never at import)
 # ============================================================
+# Cloud Database (FINAL / ONLY ONE INSTANCE); constructing it is cheap
 cloud_db = CloudDB(db_url=NEON_DB_URL)
-cloud_db.connect()
 
-# MQTT Client (publish-only)
-mqtt = MqttClient(subscribe=False)
+# MQTT Client (publish-only) and Adafruit IO HTTP session: None until up
+mqtt = None
+aio_session = None
+
+
+def _cloud_db_up():
+    return cloud_db.conn is not None and not cloud_db.conn.closed
+
+
+def _init_cloud_db():
+    if not NEON_DB_URL:
+        raise ServiceDisabled("NEON_DB_URL not configured")
+    # A closed handle (server restart, dropped link) needs a real reconnect
+    return _cloud_db_up() or cloud_db.connect()
+
+
+def _init_mqtt():
+    global mqtt
+    if mqtt is None:
+        if not (cfg.get("ADAFRUIT_IO_USERNAME") and cfg.get("ADAFRUIT_IO_KEY")):
+            raise ServiceDisabled("Adafruit IO credentials not in config.json")
+        client = MqttClient(subscribe=False, start=False)
+        client.start(wait=0)
+        mqtt = client
+    # paho keeps reconnecting on its own; we only wait for it
+    return mqtt.connected.wait(10)
+
+
+def _init_adafruit():
+    global aio_session
+    if not (AIO_USERNAME and AIO_KEY):
+        raise ServiceDisabled("Adafruit IO credentials not configured")
+    if aio_session is None:
+        session = requests.Session()
+        session.headers['X-AIO-Key'] = AIO_KEY
+        aio_session = session
+    # Warms the pooled TLS connection and checks the key
+    return aio_session.get(f"{AIO_BASE_URL}/throttle", timeout=5).status_code == 200
+
+
+def _init_sync_listener():
+    if not NEON_DB_URL:
+        raise ServiceDisabled("NEON_DB_URL not configured")
+    # Blocks for the life of the process (reconnecting on its own)
+    threading.Thread(target=cloud_db.listen, args=(_on_synced,), name="sync-listener", daemon=True).start()
+    return True
+
+
+services = ServiceStarter()
+# Re-checked on every readiness query: a dropped connection flips it back
+# to "starting" and reconnects off the request path
+services.add("cloud_db", _init_cloud_db, check=_cloud_db_up)
+services.add("mqtt", _init_mqtt, required=False)
+services.add("adafruit", _init_adafruit, required=False)
+services.add("sync_events", _init_sync_listener, required=False)
+
+
+@app.before_request
+def _start_services():
+    services.start()
+
+
+def after_fork():
+    """
+    Per-worker state for pre-forking servers (gunicorn post_fork hook):
+    drop connections, clients and caches a worker may have inherited,
+    so each worker connects on its own first request.
+    """
+    global mqtt, aio_session
+    cloud_db.after_fork()
+    mqtt = None
+    aio_session = None
+    services.reset()
+    page_cache.clear()
+    fragments.clear()
+    feed_values.clear()
+    _watched_devices.clear()
+    _gzip_memo.clear()
+    _device_cache.update(at=0.0, devices=[])
+
+
+# ============================================================
+# DEVICE SELECTION
+# ============================================================
+DEFAULT_DEVICE = cfg.get("device_id") or "pi_home_security"
+DEVICE_LIST_TTL = 60
+_device_cache = {"at": 0.0, "devices": []}
+
+
+def current_device() -> str:
+    device = request.args.get("device", "")
+    return device if DEVICE_ID_RE.match(device) else DEFAULT_DEVICE
+
+
+def known_devices():
+    stale = time.monotonic() - _device_cache["at"] > DEVICE_LIST_TTL
+    if stale and services.is_ready("cloud_db"):
+        _device_cache["devices"] = cloud_db.get_devices()
+        _device_cache["at"] = time.monotonic()
+    return sorted(set(_device_cache["devices"]) | {DEFAULT_DEVICE})
+
+
+@app.context_processor
+def inject_device():
+    device = current_device()
+    return {
+        "asset": assets.url,
+        "device_id": device,
+        "devices": known_devices(),
+        "device_qs": "" if device == DEFAULT_DEVICE else f"?device={device}",
+        "parquet_export": HAS_PARQUET,
+    }
 
 
 # ============================================================
 # FEED KEY NORMALIZATION
 # ============================================================
-def to_feed_key(feed_name: str) -> str:
-    return feed_name.replace("_", "-")
+def to_feed_key(feed_name: str, device_id: Optional[str] = None) -> str:
+    return feed_key(feed_name, device_id or current_device())
 
 
 # ============================================================
 # Adafruit IO Helper Functions
 # ============================================================
 def get_adafruit(feed_name):
+    if aio_session is None:
+        return None
     try:
         feed_key = to_feed_key(feed_name)
         url = f"{AIO_BASE_URL}/feeds/{feed_key}/data/last"
-        headers = {'X-AIO-Key': AIO_KEY}
 
-        r = requests.get(url, headers=headers, timeout=5)
+        r = aio_session.get(url, timeout=5)
         if r.status_code == 200:
             return r.json().get("value")
 
@@ -116,14 +263,16 @@ def get_adafruit(feed_name):
 
 
 def set_adafruit(feed_name, value):
+    if aio_session is None:
+        log.warning(f"Adafruit IO not available, {feed_name} not set")
+        return False
     try:
         time.sleep(0.3)
         feed_key = to_feed_key(feed_name)
         url = f"{AIO_BASE_URL}/feeds/{feed_key}/data"
-        headers = {'X-AIO-Key': AIO_KEY, 'Content-Type': 'application/json'}
         data = {'value': str(value)}
 
-        r = requests.post(url, headers=headers, json=data, timeout=5)
+        r = aio_session.post(url, json=data, timeout=5)
         success = r.status_code in (200, 201)
 
         if success:
@@ -138,50 +287,268 @@ def set_adafruit(feed_name, value):
         return False
 
 
+def publish(feed, value):
+    if mqtt is None:
+        log.warning(f"MQTT not available, {feed} not published")
+        return
+    mqtt.publish(feed, value, device_id=current_device())
+
+
 def get_sync_pending():
     try:
         return {
-            'env': len(fetch_unsynced('environment')),
-            'motion': len(fetch_unsynced('motion'))
+            'env': count_unsynced('environment'),
+            'motion': count_unsynced('motion')
         }
     except Exception as e:
         log.error(f"Error getting sync status: {e}")
         return {'env': 0, 'motion': 0}
 
 
+# ============================================================
+# STATIC ASSETS / RESPONSE COMPRESSION
+# ============================================================
+assets = AssetManifest(app.static_folder)
+
+GZIP_TYPES = ("text/html", "application/json", "text/plain")
+GZIP_MIN_SIZE = 512
+GZIP_LEVEL = 6
+GZIP_MEMO_SIZE = 64
+_gzip_memo = OrderedDict()      # ETag → gzipped body (cached pages repeat)
+_gzip_lock = threading.Lock()
+
+
+@app.route('/assets/<path:name>')
+def asset_file(name):
+    asset = assets.lookup(name)
+    if asset is None:
+        abort(404)
+    path, encoding = assets.pick(asset, request.accept_encodings)
+    response = send_file(path, mimetype=asset.mimetype, conditional=True, max_age=MAX_AGE)
+    if encoding:
+        response.content_encoding = encoding
+    response.vary.add("Accept-Encoding")
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+def _gzip(body, etag):
+    if etag:
+        with _gzip_lock:
+            cached = _gzip_memo.get(etag)
+        if cached is not None:
+            return cached
+    data = gzip.compress(body, GZIP_LEVEL)
+    if etag:
+        with _gzip_lock:
+            _gzip_memo[etag] = data
+            while len(_gzip_memo) > GZIP_MEMO_SIZE:
+                _gzip_memo.popitem(last=False)
+    return data
+
+
+@app.after_request
+def _compress_response(response):
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or response.content_encoding or response.mimetype not in GZIP_TYPES):
+        return response
+    response.vary.add("Accept-Encoding")
+    body = response.get_data()
+    if len(body) < GZIP_MIN_SIZE or not request.accept_encodings["gzip"]:
+        return response
+
+    etag, _ = response.get_etag()
+    response.set_data(_gzip(body, etag))
+    response.content_encoding = "gzip"
+    if etag:
+        # Same resource, different bytes: only weakly equal to the identity body
+        response.set_etag(etag, weak=True)
+    return response
+
+
+# ============================================================
+# HISTORY PAGE CACHE
+# ============================================================
+page_cache = ResponseCache()
+OPEN_DAY_TTL = cfg.get("web_cache_ttl", 30)
+CLOSED_DAY_TTL = cfg.get("web_cache_closed_ttl", 3600)
+
+
+def selected_day():
+    try:
+        return date.fromisoformat(request.values.get("date", ""))
+    except ValueError:
+        return date.today()
+
+
+def security_raw():
+    # Both the cache key and the page need it; kept current over MQTT,
+    # so a cache hit makes no Adafruit IO call
+    _watch_device(current_device())
+    return feed_value("security_enabled")
+
+
+def _cache_result(result):
+    metrics.registry.counter(
+        "page_cache_total", "History page cache lookups", {"result": result}
+    ).inc()
+
+
+def _cached_response(entry, ttl):
+    response = Response(entry.body, mimetype=entry.mimetype)
+    response.set_etag(entry.etag)
+    response.last_modified = entry.last_modified
+    response.cache_control.private = True
+    response.cache_control.max_age = ttl
+    return response.make_conditional(request)
+
+
+def cached_history(kind, motion=None, extra=None):
+    """
+    Cache a GET day view keyed by route/device/day(/extra()).
+
+    Fresh entries are served as-is; stale ones are revalidated against
+    (row count, newest timestamp) for that day and only re-rendered if
+    it moved. Responses carry ETag/Last-Modified for conditional GETs.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper():
+            if request.method != "GET":
+                return view()
+
+            day, device = selected_day(), current_device()
+            key = (request.endpoint, device, day, extra() if extra else None)
+            ttl = ttl_for(day, OPEN_DAY_TTL, CLOSED_DAY_TTL)
+            entry = page_cache.get(key)
+            if entry is not None and entry.fresh():
+                _cache_result("hit")
+                return _cached_response(entry, ttl)
+
+            stamp = cloud_db.get_day_stamp(kind, str(day), device_id=device, motion=motion)
+            if stamp is None:
+                return view()
+
+            count, newest = stamp
+            etag = make_etag(*key, count, newest, assets.version, *known_devices())
+            if entry is not None and entry.etag == etag:
+                _cache_result("revalidated")
+            else:
+                _cache_result("miss")
+                response = view()
+                if response.status_code != 200:
+                    return response
+                if isinstance(newest, str):
+                    newest = datetime.fromisoformat(newest)
+                last_modified = newest if isinstance(newest, datetime) else datetime.now()
+                # Naive timestamps are local time; astimezone() makes that explicit
+                entry = CacheEntry(etag, last_modified.astimezone(), response.get_data(), response.mimetype)
+            page_cache.put(key, entry, ttl)
+            return _cached_response(entry, ttl)
+        return wrapper
+    return decorator
+
+
+# ============================================================
+# DASHBOARD FRAGMENT CACHE
+# ============================================================
+fragments = FragmentCache(ttl=cfg.get("web_fragment_ttl", 30))
+
+# Feed updates (MQTT) → dashboard fragment they show up in
+FEED_FRAGMENTS = {
+    "temperature": "live",
+    "humidity": "live",
+    "motion": "live",
+    "led_status": "devices",
+    "buzzer_status": "devices",
+    "motor_status": "devices",
+}
+_watched_devices = set()
+
+# Single feed values pages depend on (armed state), per device: fetched
+# once, dropped when the feed's MQTT update arrives (or after the TTL)
+feed_values = FragmentCache(ttl=cfg.get("web_fragment_ttl", 30))
+WATCHED_VALUES = ("security_enabled",)
+
+
+def feed_value(feed):
+    value, _ = feed_values.get(feed, current_device(), lambda: get_adafruit(feed))
+    return value
+
+
+def _on_feed_update(feed, value, device_id):
+    if feed in FEED_FRAGMENTS:
+        fragments.invalidate(FEED_FRAGMENTS[feed], device_id)
+    else:
+        feed_values.invalidate(feed, device_id)
+
+
+def _on_synced(device_id):
+    fragments.invalidate("recent", device_id)
+
+
+def _watch_device(device):
+    # Subscribed on first dashboard/security view per device, once MQTT is up
+    if mqtt is not None and device not in _watched_devices:
+        _watched_devices.add(device)
+        mqtt.watch([*FEED_FRAGMENTS, *WATCHED_VALUES], device, _on_feed_update)
+
+
+def fragment(name, template, context):
+    """Cached render of `template` for the current device; context() only runs on a miss."""
+    html, result = fragments.get(
+        name, current_device(), lambda: Markup(render_template(template, **context()))
+    )
+    metrics.registry.counter(
+        "fragment_cache_total", "Dashboard fragment cache lookups", {"fragment": name, "result": result}
+    ).inc()
+    return html
+
+
 # ============================================================
 # DASHBOARD PAGE
 # ============================================================
 @app.route('/')
 def dashboard():
+    devices = ['led_status', 'buzzer_status', 'motor_status']
+    _watch_device(current_device())
+
     try:
-        live_data = {
-            'temperature': get_adafruit('temperature') or "N/A",
-            'humidity': get_adafruit('humidity') or "N/A",
-            'motion': get_adafruit('motion') or "0"
+        page_fragments = {
+            "live": fragment("live", "fragments/live_status.html", lambda: {"live_data": {
+                'temperature': get_adafruit('temperature') or "N/A",
+                'humidity': get_adafruit('humidity') or "N/A",
+                'motion': get_adafruit('motion') or "0"
+            }}),
+            "devices": fragment("devices", "fragments/device_states.html", lambda: {
+                "device_states": {dev: get_adafruit(dev) or "0" for dev in devices}
+            }),
+            # Not cached while the cloud DB is down (an empty table would stick)
+            "recent": fragment("recent", "fragments/recent_readings.html", lambda: {
+                "latest_env": cloud_db.get_latest_environment(limit=5, device_id=current_device())
+            }) if services.is_ready("cloud_db") else Markup(
+                render_template("fragments/recent_readings.html", latest_env=[])),
         }
 
-        latest_env = cloud_db.get_latest_environment(limit=5)
-
-        devices = ['led_status', 'buzzer_status', 'motor_status']
-        device_states = {dev: get_adafruit(dev) or "0" for dev in devices}
-
         sync_pending = get_sync_pending()
 
         return render_template(
             "dashboard.html",
-            live_data=live_data,
-            latest_env=latest_env,
-            device_states=device_states,
+            fragments=page_fragments,
             sync_pending=sync_pending
         )
     except Exception as e:
         log.error(f"DASHBOARD ERROR: {e}")
         return render_template(
             "dashboard.html",
-            live_data={'temperature': 'N/A', 'humidity': 'N/A', 'motion': '0'},
-            latest_env=[],
-            device_states={'led_status': '0', 'buzzer_status': '0', 'motor_status': '0'},
+            fragments={
+                "live": Markup(render_template("fragments/live_status.html", live_data={
+                    'temperature': 'N/A', 'humidity': 'N/A', 'motion': '0'})),
+                "devices": Markup(render_template("fragments/device_states.html", device_states={
+                    dev: '0' for dev in devices})),
+                "recent": Markup(render_template("fragments/recent_readings.html", latest_env=[])),
+            },
             sync_pending={'env': 0, 'motion': 0}
         )
 
@@ -190,11 +557,12 @@ def dashboard():
 # ENVIRONMENT PAGE
 # ============================================================
 @app.route('/environment', methods=['GET', 'POST'])
+@cached_history("environment")
 def environment():
-    selected_date = request.form.get('date', str(date.today()))
+    selected_date = str(selected_day())
 
     try:
-        rows = cloud_db.get_environment_by_date(selected_date)
+        rows = cloud_db.get_environment_by_date(selected_date, device_id=current_device())
     except Exception as e:
         log.error(f"DB query error: {e}")
         rows = []
@@ -206,7 +574,7 @@ def environment():
         temps.append(float(t))
         hums.append(float(h))
 
-    return render_template(
+    return make_response(render_template(
         "environment.html",
         selected_date=selected_date,
         data_count=len(rows),
@@ -218,17 +586,18 @@ def environment():
         min_hum=min(hums) if hums else None,
         max_hum=max(hums) if hums else None,
         env_data=rows
-    )
+    ))
 
 
 # ============================================================
 # SECURITY PAGE
 # ============================================================
 @app.route('/security', methods=['GET', 'POST'])
+@cached_history("motion", motion=1, extra=security_raw)
 def security_page():
-    selected_date = request.form.get('date', str(date.today()))
+    selected_date = str(selected_day())
 
-    raw = get_adafruit("security_enabled")
+    raw = security_raw()
     is_enabled = (raw == "1")
 
     if request.method == 'POST':
@@ -236,23 +605,23 @@ def security_page():
         if action:
             new_state = 1 if action == "enable" else 0
             set_adafruit("security_enabled", new_state)
-            mqtt.publish("security_enabled", new_state)
+            publish("security_enabled", new_state)
+            feed_values.invalidate("security_enabled", current_device())
             is_enabled = (new_state == 1)
 
     try:
-        motion_rows = cloud_db.get_motion_by_date(selected_date)
-        intrusions = [r for r in motion_rows if r[1] == 1]
+        intrusions = cloud_db.get_motion_by_date(selected_date, device_id=current_device(), motion=1)
     except Exception as e:
         log.error(f"Motion query error: {e}")
         intrusions = []
 
-    return render_template(
+    return make_response(render_template(
         "security.html",
         selected_date=selected_date,
         is_enabled=is_enabled,
         intrusions=intrusions,
         total_intrusions=len(intrusions)
-    )
+    ))
 
 
 # ============================================================
@@ -268,7 +637,8 @@ def control_page():
 
         if device and value is not None:
             success = set_adafruit(device, value)
-            mqtt.publish(device, value)
+            publish(device, value)
+            fragments.invalidate("devices", current_device())
 
             if success:
                 state = "ON" if value == "1" else "OFF"
@@ -285,6 +655,11 @@ def control_page():
 # ============================================================
 # API for Live Refresh
 # ============================================================
+@app.route("/api/devices")
+def api_devices():
+    return jsonify({"default": DEFAULT_DEVICE, "devices": known_devices()})
+
+
 @app.route("/api/live-data")
 def api_live():
     try:
@@ -300,6 +675,149 @@ def api_live():
         return jsonify({"error": str(e)}), 500
 
 
+# ============================================================
+# PAGED HISTORY (keyset pagination)
+# ============================================================
+PAGE_FIELDS = {
+    "environment": ("id", "timestamp", "temperature", "humidity"),
+    "motion": ("id", "timestamp", "motion", "image_name"),
+}
+
+
+def cloud_unavailable():
+    return jsonify({"error": "cloud database unavailable", "services": services.status()}), 503
+
+
+def _paged(kind):
+    """?limit=&cursor=&start=&end=&order=asc|desc (+ &motion= for motion)"""
+    if not services.is_ready("cloud_db"):
+        return cloud_unavailable()
+    args = request.args
+    try:
+        after = decode_cursor(args["cursor"]) if args.get("cursor") else None
+        limit = int(args.get("limit", PAGE_SIZE))
+        motion = int(args["motion"]) if args.get("motion") not in (None, "") else None
+        for day in (args.get("start"), args.get("end")):
+            if day:
+                date.fromisoformat(day)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        rows, next_key = cloud_db.get_page(
+            kind, device_id=current_device(), after=after, limit=limit,
+            start=args.get("start"), end=args.get("end"), motion=motion,
+            ascending=args.get("order") == "asc",
+        )
+    except CloudUnavailable:
+        # Not an empty page: the client should retry this cursor, not stop
+        return cloud_unavailable()
+    items = [dict(zip(PAGE_FIELDS[kind], row)) for row in rows]
+    for item in items:
+        item["timestamp"] = item["timestamp"].isoformat()
+    return jsonify({
+        "device": current_device(),
+        "items": items,
+        "next_cursor": encode_cursor(next_key) if next_key else None,
+    })
+
+
+@app.route("/api/environment")
+def api_environment():
+    return _paged("environment")
+
+
+@app.route("/api/motion")
+def api_motion():
+    return _paged("motion")
+
+
+# ============================================================
+# EXPORT (streamed CSV / Parquet)
+# ============================================================
+@app.route("/api/export/<kind>")
+def api_export(kind):
+    """?start=YYYY-MM-DD&end=YYYY-MM-DD (inclusive, default start) &format=csv|parquet"""
+    if kind not in EXPORT_COLUMNS:
+        return jsonify({"error": f"unknown export '{kind}'"}), 404
+
+    fmt = request.args.get("format", "csv")
+    if fmt not in FORMATS:
+        return jsonify({"error": f"format must be one of {sorted(FORMATS)}"}), 400
+    if fmt == "parquet" and not HAS_PARQUET:
+        return jsonify({"error": "Parquet export needs pyarrow on the server"}), 501
+
+    start = request.args.get("start", str(date.today()))
+    end = request.args.get("end", start)
+    try:
+        if date.fromisoformat(start) > date.fromisoformat(end):
+            raise ValueError("start is after end")
+    except ValueError as e:
+        return jsonify({"error": f"bad date range: {e}"}), 400
+
+    if not services.is_ready("cloud_db"):
+        return cloud_unavailable()
+
+    device = current_device()
+    mimetype, ext = FORMATS[fmt]
+    # Rows come off a server-side cursor batch by batch as the client reads
+    batches = cloud_db.stream_rows(kind, start, end, device_id=device)
+    return Response(
+        stream_with_context(export_stream(kind, fmt, batches)),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f'attachment; filename="{device}-{kind}-{start}_{end}.{ext}"'},
+    )
+
+
+# ============================================================
+# METRICS (Prometheus)
+# ============================================================
+@app.before_request
+def _start_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def _record_latency(response):
+    start = g.pop("request_start", None)
+    if start is not None and request.endpoint != "metrics_page":
+        metrics.registry.histogram(
+            "http_request_seconds", "Flask request latency",
+            {"endpoint": request.endpoint or "unknown"}
+        ).observe(time.perf_counter() - start)
+    return response
+
+
+@app.route('/metrics')
+def metrics_page():
+    # This process under web_*, plus the edge daemon's last export (if on this host)
+    body = metrics.registry.render(prefix="web_")
+    daemon_file = os.path.join(os.path.dirname(__file__), '..', cfg.get("metrics_file") or "")
+    if cfg.get("metrics_file") and os.path.isfile(daemon_file):
+        try:
+            with open(daemon_file) as f:
+                body += f.read()
+        except OSError as e:
+            log.warning(f"Could not read daemon metrics: {e}")
+    return Response(body, mimetype="text/plain; version=0.0.4")
+
+
+# ============================================================
+# HEALTH / READINESS
+# ============================================================
+@app.route('/healthz')
+def healthz():
+    # Liveness: the worker answers; dependencies are /readyz's business
+    return jsonify({"status": "ok"})
+
+
+@app.route('/readyz')
+def readyz():
+    ready = services.ready()
+    body = {"status": "ready" if ready else "starting", "services": services.status()}
+    return jsonify(body), 200 if ready else 503
+
+
 # ============================================================
 # ABOUT PAGE
 # ============================================================
@@ -308,11 +826,22 @@ def about_page():
     return render_template("about.html")
 
 
+# ============================================================
+# TEMPLATE PRECOMPILATION
+# ============================================================
+# Compile every template once at import (shared by preloaded workers);
+# later boots load the bytecode instead of re-parsing
+for _name in app.jinja_env.list_templates():
+    app.jinja_env.get_template(_name)
+
+
 # ============================================================
 # RUN APP
 # ============================================================
+# Development server only; production goes through wsgi.py (gunicorn / waitress)
 if __name__ == "__main__":
-    log.info("🚀 Starting DomiSafe Flask App...")
+    host, port = cfg.get("web_host", "0.0.0.0"), cfg.get("web_port", 5000)
+    log.info("🚀 Starting DomiSafe Flask App (development server)...")
     log.info(f"📡 Adafruit IO User: {AIO_USERNAME}")
-    log.info(f"🌐 Access at: http://0.0.0.0:5000")
-    app.run(host="0.0.0.0", port=5000, debug=True)
+    log.info(f"🌐 Access at: http://{host}:{port}")
+    app.run(host=host, port=port, debug=os.getenv("FLASK_DEBUG") == "1", threaded=True)
@@ -0,0 +1,52 @@
+"""
+============================================================
+DOMISAFE FLASK APPLICATION - GUNICORN SETTINGS
+============================================================
+    cd web_app && gunicorn -c gunicorn.conf.py wsgi:app
+
+- gthread workers: a slow Adafruit IO or Neon call ties up one
+  thread, not the whole worker
+- web_workers = 0 → 2 × CPUs, at most 4 (a Pi has ~1 GB of RAM)
+- preload_app: importing the app is cheap and network-free, so the
+  code is loaded once and shared copy-on-write; post_fork then
+  gives every worker its own connections (app.after_fork)
+- worker_connections capped so keep-alive clients spread over
+  workers instead of piling onto whichever accepted first
+- workers are recycled every ~1000 requests to cap slow leaks
+============================================================
+"""
+
+import multiprocessing
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules.config_loader import load_config  # noqa: E402
+
+_cfg = load_config('config.json')
+
+bind = f"{_cfg.get('web_host', '0.0.0.0')}:{_cfg.get('web_port', 5000)}"
+workers = _cfg.get("web_workers") or min(2 * multiprocessing.cpu_count(), 4)
+worker_class = "gthread"
+threads = _cfg.get("web_threads", 4)
+# Without a cap, the first worker to wake accepts every keep-alive
+# connection and the others sit idle. At the cap gthread stops
+# keeping connections alive, so clients rotate across workers.
+worker_connections = threads
+
+preload_app = True
+timeout = 30                # Adafruit/Neon calls time out well before this
+graceful_timeout = 10
+keepalive = 5
+max_requests = 1000
+max_requests_jitter = 100
+
+accesslog = "-"
+errorlog = "-"
+
+
+def post_fork(server, worker):
+    from app import after_fork
+    after_fork()
@@ -0,0 +1,35 @@
+"""
+============================================================
+DOMISAFE FLASK APPLICATION - PRODUCTION ENTRY POINT
+============================================================
+    cd web_app && gunicorn -c gunicorn.conf.py wsgi:app
+    cd web_app && python wsgi.py            # waitress, no fork() needed
+
+gunicorn: pre-forked gthread workers (gunicorn.conf.py), each with
+its own cloud DB connection, MQTT client and caches (app.after_fork).
+waitress: one process, web_threads request threads; the fallback
+where gunicorn isn't available (Windows) or memory is tight.
+============================================================
+"""
+
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import app, cfg  # noqa: E402
+
+log = logging.getLogger(__name__)
+
+
+if __name__ == "__main__":
+    try:
+        from waitress import serve
+    except ImportError:
+        sys.exit("waitress is not installed: pip install waitress (or use gunicorn -c gunicorn.conf.py wsgi:app)")
+
+    host, port = cfg.get("web_host", "0.0.0.0"), cfg.get("web_port", 5000)
+    threads = cfg.get("web_threads", 4)
+    log.info(f"🚀 Serving DomiSafe on http://{host}:{port} (waitress, {threads} threads)")
+    serve(app, host=host, port=port, threads=threads)